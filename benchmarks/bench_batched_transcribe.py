@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""逐段转写 vs 按 30 秒窗口批量解码的吞吐（每墙钟秒转写的音频秒数）。
+
+给定 --audio 时用真实的 Whisper 模型（需要 whisper/torch/ffmpeg）：基线是逐段调用 model.transcribe() 的现有循环，
+其余各行是不同批大小的批量解码；模型在计时前加载。
+--simulate 时每个窗口的解码用若干步矩阵乘法代替：批大小为 1 时是矩阵-向量乘，攒批后是矩阵-矩阵乘，
+只看批处理对 CPU 矩阵乘法效率的影响。
+
+用法：
+    python benchmarks/bench_batched_transcribe.py --audio news.mp3 --batch-sizes 4 8 16
+    python benchmarks/bench_batched_transcribe.py --simulate --minutes 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.audio_windows import SAMPLE_RATE, split_windows
+from scripts.batch_transcribe import transcribe_batched
+
+
+def simulated_decoder(width: int, steps: int):
+    rng = np.random.default_rng(0)
+    weights = rng.standard_normal((width, width), dtype=np.float32) / np.sqrt(width)
+
+    def decode(chunks: list[np.ndarray]) -> list[str]:
+        state = rng.standard_normal((len(chunks), width), dtype=np.float32)
+        for _ in range(steps):
+            state = np.tanh(state @ weights)
+        return [""] * len(chunks)
+
+    return decode
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="逐段转写与批量解码的吞吐对比")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--audio", help="用真实的 Whisper 模型转写该音频")
+    source.add_argument("--simulate", action="store_true", help="用矩阵乘法模拟每个窗口的解码")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8, 16], help="要测量的批大小")
+    parser.add_argument("--minutes", type=float, default=30, help="模拟模式下的音频时长（分钟）")
+    parser.add_argument("--width", type=int, default=512, help="模拟模式下的隐藏层宽度")
+    parser.add_argument("--steps", type=int, default=64, help="模拟模式下每个窗口的解码步数")
+    parser.add_argument("--json", help="把结果写入该 JSON 文件")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.simulate:
+        audio = np.zeros(int(args.minutes * 60 * SAMPLE_RATE), dtype=np.float32)
+        parts = [(f"{start:.0f}s", window) for start, window in split_windows(audio, 60)]
+        decode = simulated_decoder(args.width, args.steps)
+
+        def baseline() -> None:
+            transcribe_batched(parts, decode, batch_size=1)
+
+        def batched(batch_size: int) -> None:
+            transcribe_batched(parts, decode, batch_size=batch_size)
+    else:
+        from scripts import mp3_2_txt
+
+        parts = mp3_2_txt.load_audio_windows(args.audio)
+        if parts is None:
+            raise SystemExit(f"无法解码音频: {args.audio}")
+        mp3_2_txt.load_model()
+
+        def baseline() -> None:
+            mp3_2_txt.transcribe_parts(parts)
+
+        def batched(batch_size: int) -> None:
+            mp3_2_txt.transcribe_parts(parts, batch_size=batch_size)
+
+    audio_seconds = sum(len(window) for _, window in parts) / SAMPLE_RATE
+    runs = [("loop", None, baseline)] + [
+        (f"batch={size}", size, lambda size=size: batched(size)) for size in args.batch_sizes
+    ]
+    results = []
+    for label, batch_size, run in runs:
+        started = time.perf_counter()
+        run()
+        wall = time.perf_counter() - started
+        results.append({
+            "mode": label,
+            "batch_size": batch_size,
+            "wall_seconds": round(wall, 3),
+            "audio_seconds": audio_seconds,
+            "audio_seconds_per_second": round(audio_seconds / wall, 2),
+        })
+
+    baseline_rate = results[0]["audio_seconds_per_second"]
+    for result in results:
+        print(
+            f"{result['mode']:<10} 耗时 {result['wall_seconds']:.2f}s "
+            f"吞吐 {result['audio_seconds_per_second']:.1f} 音频秒/秒 "
+            f"相对逐段 {result['audio_seconds_per_second'] / baseline_rate:.2f}x"
+        )
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
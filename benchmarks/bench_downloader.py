@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""下载器端到端基准：在本地替身服务上测量解析延迟、下载吞吐和每 MB 的 CPU 时间。
+
+替身服务运行在子进程中，CPU 时间只统计下载器所在进程。
+
+用法：
+    python benchmarks/bench_downloader.py
+    python benchmarks/bench_downloader.py --video-mb 200 --bandwidth-mb 20 --json bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Iterator
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.douyin_fixture_server import RESOLVE_PATHS, FixtureConfig, FixtureServer, mount_fixture
+from scripts.douyin_download import SimpleDouyinDownloader
+
+
+def _serve(config: FixtureConfig, ready, stop) -> None:
+    server = FixtureServer(config).start()
+    ready.put(server.base_url)
+    stop.wait()
+    server.stop()
+
+
+@contextmanager
+def fixture_process(config: FixtureConfig) -> Iterator[str]:
+    """在子进程中启动替身服务，产出其 base_url。"""
+    ready = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve, args=(config, ready, stop), daemon=True)
+    process.start()
+    try:
+        yield ready.get(timeout=10)
+    finally:
+        stop.set()
+        process.join(timeout=5)
+
+
+def new_downloader(base_url: str) -> SimpleDouyinDownloader:
+    downloader = SimpleDouyinDownloader(prefer_low_bitrate=True)
+    downloader.show_progress = False
+    mount_fixture(downloader.session, base_url)
+    return downloader
+
+
+def bench_resolve(config: FixtureConfig, rounds: int) -> dict[str, Any]:
+    """短链解析 + 获取视频信息的耗时，每轮使用新的下载器（不命中任何缓存）。"""
+    samples = []
+    with fixture_process(config) as base_url:
+        short_url = f"https://v.douyin.com/{config.short_code}/"
+        for _ in range(rounds):
+            downloader = new_downloader(base_url)
+            started = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                video_id = downloader.extract_video_id(short_url)
+                video_info = downloader.get_video_info(video_id)
+            samples.append(time.perf_counter() - started)
+            if not video_info or not video_info["video_url"]:
+                raise RuntimeError(f"resolve via {config.resolve_via} failed")
+    return {
+        "name": f"resolve/{config.resolve_via}",
+        "median_ms": statistics.median(samples) * 1000,
+        "min_ms": min(samples) * 1000,
+    }
+
+
+def bench_download(config: FixtureConfig, name: str, rounds: int, connections: int) -> dict[str, Any]:
+    """完整的 download_by_url，取最好的一轮。"""
+    walls = []
+    cpus = []
+    with fixture_process(config) as base_url, tempfile.TemporaryDirectory() as tmp_dir:
+        short_url = f"https://v.douyin.com/{config.short_code}/"
+        for _ in range(rounds):
+            downloader = new_downloader(base_url)
+            wall_started = time.perf_counter()
+            cpu_started = time.process_time()
+            with redirect_stdout(io.StringIO()):
+                path = downloader.download_by_url(short_url, tmp_dir, connections=connections)
+            cpus.append(time.process_time() - cpu_started)
+            walls.append(time.perf_counter() - wall_started)
+            if not path or os.path.getsize(path) != config.video_size:
+                raise RuntimeError(f"{name}: download failed")
+            os.remove(path)
+
+    size_mb = config.video_size / 1024 / 1024
+    wall = min(walls)
+    cpu = min(cpus)
+    return {
+        "name": name,
+        "seconds": wall,
+        "mb_per_second": size_mb / wall,
+        "cpu_ms_per_mb": cpu / size_mb * 1000,
+    }
+
+
+def print_results(results: list[dict[str, Any]]) -> None:
+    for result in results:
+        if "median_ms" in result:
+            print(f"{result['name']:<22} 中位数 {result['median_ms']:>8.1f} ms  最快 {result['min_ms']:>8.1f} ms")
+        else:
+            print(
+                f"{result['name']:<22} 耗时 {result['seconds']:>7.2f} s  吞吐 {result['mb_per_second']:>8.1f} MB/s  "
+                f"CPU {result['cpu_ms_per_mb']:>6.2f} ms/MB"
+            )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="下载器端到端基准（本地替身服务）")
+    parser.add_argument("--video-mb", type=float, default=64, help="视频文件大小（MB）")
+    parser.add_argument("--bandwidth-mb", type=float, default=0, help="CDN 每个连接的带宽上限（MB/s），0 表示不限")
+    parser.add_argument("--cdn-latency", type=float, default=0.02, help="CDN 首字节延迟（秒）")
+    parser.add_argument("--resolve-latency", type=float, default=0.02, help="接口与页面的响应延迟（秒）")
+    parser.add_argument("--connections", type=int, default=4, help="分段下载场景的连接数")
+    parser.add_argument("--rounds", type=int, default=3, help="每个场景重复次数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件，便于和历史结果对比")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    base_config = FixtureConfig(
+        video_size=int(args.video_mb * 1024 * 1024),
+        resolve_latency=args.resolve_latency,
+        cdn_latency=args.cdn_latency,
+        bandwidth=int(args.bandwidth_mb * 1024 * 1024),
+    )
+
+    results = [bench_resolve(replace(base_config, resolve_via=via), args.rounds) for via in RESOLVE_PATHS]
+    results.append(bench_download(base_config, "download/1-connection", args.rounds, 1))
+    results.append(
+        bench_download(base_config, f"download/{args.connections}-connections", args.rounds, args.connections)
+    )
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump({"config": vars(args), "results": results}, handle, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
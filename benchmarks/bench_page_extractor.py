@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""对比页面视频地址提取：旧版逐模式 findall 与单次扫描提取器。
+
+用法：
+    python benchmarks/bench_page_extractor.py                     # 使用合成的多 MB 页面
+    python benchmarks/bench_page_extractor.py --page saved.html   # 使用保存下来的真实页面
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import re
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.douyin_download import extract_page_video_url
+
+
+LEGACY_VIDEO_PATTERNS = [
+    r'"play_addr":\{"uri":"([^"]+)","url_list":\["([^"]+)"',
+    r'"playAddr":"([^"]+)"',
+    r'"downloadAddr":"([^"]+)"',
+    r'https://[^"]*\.douyinvod\.com[^"]*',
+    r'https://[^"]*\.amazonaws\.com[^"]*',
+    r'https://[^"]*\.mp4[^"]*',
+]
+
+
+def legacy_extract_page_video_url(content: str) -> str | None:
+    """改造前 `_get_from_page` 中的提取逻辑。"""
+    for pattern in LEGACY_VIDEO_PATTERNS:
+        for match in re.findall(pattern, content):
+            if isinstance(match, tuple):
+                if len(match) != 2:
+                    continue
+                video_url = match[1]
+            else:
+                video_url = match
+            if video_url.startswith("http") and (
+                "douyinvod" in video_url or "amazonaws" in video_url or "mp4" in video_url or "snssdk" in video_url
+            ):
+                video_url = html.unescape(video_url).replace("\\u002F", "/")
+                return video_url.replace("playwm", "play")
+    return None
+
+
+def build_synthetic_page(size_mb: float, target: str, data_at_head: bool = False) -> str:
+    """生成接近真实分享页结构的页面：大量脚本/样式噪声，视频数据默认位于文档末尾。"""
+    filler_unit = (
+        '<div class="item" data-e2e="feed"><a href="https://www.douyin.com/user/MS4wLjAB">作者</a>'
+        '<img src="https://p3-pc.douyinpic.com/img/tos-cn-i/cover.jpeg?x-expires=1750000000"></div>\n'
+        '<script>window.__INIT__={"key":"value","list":[1,2,3],"cdn":"https://lf-cdn.example.com/a.js"};</script>\n'
+    )
+    repeat = max(1, int(size_mb * 1024 * 1024 / len(filler_unit)))
+    body = filler_unit * repeat
+    if target == "play_addr":
+        data = (
+            '"play_addr":{"uri":"v0200fg10000","url_list":["https:\\u002F\\u002Faweme.snssdk.com'
+            '\\u002Faweme\\u002Fv1\\u002Fplaywm\\u002F?video_id=v0200fg10000&ratio=720p"]}'
+        )
+    elif target == "douyinvod":
+        data = '"src":"https://v26-web.douyinvod.com/abc/video.mp4?a=6383&br=900"'
+    else:
+        data = '"src":"https://www.douyin.com/"'
+    if data_at_head:
+        return f"<html><head><title>抖音</title><script>{data}</script></head><body>{body}</body></html>"
+    return f"<html><head><title>抖音</title></head><body>{body}<script>{data}</script></body></html>"
+
+
+def time_call(func, content: str, rounds: int) -> tuple[float, str | None]:
+    result = None
+    started = time.perf_counter()
+    for _ in range(rounds):
+        result = func(content)
+    return (time.perf_counter() - started) / rounds, result
+
+
+def run_case(name: str, content: str, rounds: int) -> None:
+    legacy_seconds, legacy_result = time_call(legacy_extract_page_video_url, content, rounds)
+    new_seconds, new_result = time_call(extract_page_video_url, content, rounds)
+    status = "一致" if legacy_result == new_result else f"不一致: {legacy_result!r} != {new_result!r}"
+    print(
+        f"{name:<28} {len(content) / 1024 / 1024:>6.2f} MB  "
+        f"旧版 {legacy_seconds * 1000:>8.1f} ms  新版 {new_seconds * 1000:>8.1f} ms  "
+        f"加速 {legacy_seconds / new_seconds:>5.1f}x  结果{status}"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="页面视频地址提取微基准")
+    parser.add_argument("--page", action="append", default=[], help="保存的真实页面 HTML，可重复指定")
+    parser.add_argument("--size-mb", type=float, default=4.0, help="合成页面大小（MB）")
+    parser.add_argument("--rounds", type=int, default=5, help="每个用例重复次数")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.page:
+        for page in args.page:
+            content = Path(page).read_text(encoding="utf-8", errors="replace")
+            run_case(Path(page).name, content, args.rounds)
+        return 0
+
+    run_case("synthetic/play_addr", build_synthetic_page(args.size_mb, "play_addr"), args.rounds)
+    run_case("synthetic/douyinvod", build_synthetic_page(args.size_mb, "douyinvod"), args.rounds)
+    run_case("synthetic/play_addr@head", build_synthetic_page(args.size_mb, "play_addr", True), args.rounds)
+    run_case("synthetic/douyinvod@head", build_synthetic_page(args.size_mb, "douyinvod", True), args.rounds)
+    run_case("synthetic/no-match", build_synthetic_page(args.size_mb, "none"), args.rounds)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
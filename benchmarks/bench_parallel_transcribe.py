@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""不同转写进程数下的实时率（RTF = 转写耗时 / 音频时长）。
+
+给定 --audio 时用真实的 Whisper 模型转写（需要 whisper/torch/ffmpeg），音频按 SEGMENT_SECONDS 在内存中切片；
+--simulate 时每个切片用一段纯 Python 的 CPU 计算代替 Whisper，只看进程池本身的扩展性。
+单进程的数据不含模型加载时间，多进程的数据包含每个工作进程加载一次模型的时间。
+
+用法：
+    python benchmarks/bench_parallel_transcribe.py --audio news.mp3 --workers 1 2 4 8
+    python benchmarks/bench_parallel_transcribe.py --simulate --segments 16 --workers 1 2 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import SEGMENT_SECONDS
+from scripts.segment_pool import available_cpus, real_time_factor, transcribe_segments_parallel
+
+
+def simulated_transcribe(work: int) -> str:
+    total = 0
+    for value in range(work):
+        total += value * value
+    return str(total)
+
+
+def run_simulated(segments: int, work: int, workers: int) -> tuple[float, float]:
+    parts = [(f"part{index}", work) for index in range(segments)]
+    started = time.perf_counter()
+    if workers == 1:
+        for _, audio in parts:
+            simulated_transcribe(audio)
+    else:
+        transcribe_segments_parallel(parts, simulated_transcribe, workers)
+    return time.perf_counter() - started, float(segments * SEGMENT_SECONDS)
+
+
+def run_whisper(audio_path: str, workers: int) -> tuple[float, float]:
+    from scripts import mp3_2_txt
+    from scripts.audio_windows import SAMPLE_RATE
+
+    parts = mp3_2_txt.load_audio_windows(audio_path)
+    if parts is None:
+        raise SystemExit(f"无法解码音频: {audio_path}")
+    if workers == 1:
+        mp3_2_txt.load_model()
+    started = time.perf_counter()
+    mp3_2_txt.transcribe_parts(parts, workers)
+    return time.perf_counter() - started, sum(len(audio) for _, audio in parts) / SAMPLE_RATE
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="不同转写进程数下的实时率")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--audio", help="用真实的 Whisper 模型转写该音频")
+    source.add_argument("--simulate", action="store_true", help="用 CPU 计算模拟每个切片的转写")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="要测量的进程数")
+    parser.add_argument("--segments", type=int, default=16, help="模拟模式下的切片数")
+    parser.add_argument("--work", type=int, default=2_000_000, help="模拟模式下每个切片的计算量")
+    parser.add_argument("--json", help="把结果写入该 JSON 文件")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    print(f"可用 CPU: {available_cpus()}")
+    results = []
+    for workers in args.workers:
+        if args.simulate:
+            wall, audio_seconds = run_simulated(args.segments, args.work, workers)
+        else:
+            wall, audio_seconds = run_whisper(args.audio, workers)
+        rtf = real_time_factor(wall, audio_seconds)
+        results.append({"workers": workers, "wall_seconds": round(wall, 3), "audio_seconds": audio_seconds, "rtf": round(rtf, 4)})
+
+    baseline = results[0]["wall_seconds"]
+    for result in results:
+        print(
+            f"workers={result['workers']:<3} 耗时 {result['wall_seconds']:.2f}s "
+            f"RTF={result['rtf']:.4f} 相对 workers={results[0]['workers']} 加速 {baseline / result['wall_seconds']:.2f}x"
+        )
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""单视频流水线的固定开销：每个阶段一个子进程 vs 进程内调用阶段函数。
+
+子进程模式下每个视频依次启动 run_pipeline.py、douyin_download.py、mp3_2_txt.py 和总结脚本，
+每个解释器都要重新启动、重新导入依赖，mp3_2_txt 还要重新加载 Whisper 模型。
+进程内模式只有第一个视频付出这些开销。
+
+测量内容不含下载、转写和总结本身：
+- 冷启动：新解释器执行 `import <阶段模块>` 的耗时
+- 进程内：模块已导入后再次取用的耗时
+- 安装了 whisper 时，模型首次加载与复用的耗时
+
+用法：
+    python benchmarks/bench_pipeline_overhead.py --rounds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import importlib.util
+import io
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# 子进程模式下每个视频依次启动的解释器
+STAGE_MODULES = (
+    "scripts.run_pipeline",
+    "scripts.douyin_download",
+    "scripts.mp3_2_txt",
+    "scripts.openai_news_summary",
+)
+
+
+def cold_start_seconds(code: str, rounds: int) -> float | None:
+    """新解释器执行 code 的耗时中位数，执行失败（依赖未安装）时返回 None。"""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True)
+        samples.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            return None
+    return statistics.median(samples)
+
+
+def warm_import_seconds(module: str, rounds: int) -> float | None:
+    try:
+        with redirect_stdout(io.StringIO()):
+            importlib.import_module(module)
+    except (ImportError, SystemExit):
+        return None
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        importlib.import_module(module)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def model_load_seconds() -> tuple[float, float] | None:
+    """Whisper 模型首次加载和第二次取用的耗时；未安装 whisper 时返回 None。"""
+    if importlib.util.find_spec("whisper") is None:
+        return None
+    with redirect_stdout(io.StringIO()):
+        mp3_2_txt = importlib.import_module("scripts.mp3_2_txt")
+        started = time.perf_counter()
+        mp3_2_txt.load_model()
+        first = time.perf_counter() - started
+        started = time.perf_counter()
+        mp3_2_txt.load_model()
+        second = time.perf_counter() - started
+    return first, second
+
+
+def format_ms(seconds: float | None) -> str:
+    return "    未安装" if seconds is None else f"{seconds * 1000:>8.1f} ms"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="单视频流水线的解释器启动与导入开销")
+    parser.add_argument("--rounds", type=int, default=5, help="每项测量重复次数，取中位数")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    baseline = cold_start_seconds("pass", args.rounds)
+    print(f"{'空解释器启动':<28} {format_ms(baseline)}")
+
+    cold_total = 0.0
+    warm_total = 0.0
+    missing = []
+    for module in STAGE_MODULES:
+        cold = cold_start_seconds(f"import {module}", args.rounds)
+        warm = warm_import_seconds(module, args.rounds)
+        print(f"{module:<28} 冷启动 {format_ms(cold)}  进程内 {format_ms(warm)}")
+        if cold is None or warm is None:
+            missing.append(module)
+            continue
+        cold_total += cold
+        warm_total += warm
+
+    model = model_load_seconds()
+    if model is not None:
+        print(f"{'Whisper 模型加载':<28} 首次 {format_ms(model[0])}  复用 {format_ms(model[1])}")
+        cold_total += model[0]
+        warm_total += model[1]
+
+    print(f"每个视频的固定开销：子进程模式 {cold_total * 1000:.0f} ms，进程内模式 {warm_total * 1000:.3f} ms")
+    if missing:
+        print(f"以下模块的依赖未安装，未计入合计：{', '.join(missing)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
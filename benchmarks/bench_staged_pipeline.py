@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""逐个处理 vs 分阶段重叠处理一批视频的吞吐。
+
+各阶段用 sleep 模拟耗时（下载和大模型调用在等网络，转写占满一个核心），
+不访问线上服务也不需要 Whisper，用来估算 `--all-history` 回填时分阶段执行能省多少时间。
+
+用法：
+    python benchmarks/bench_staged_pipeline.py --videos 8 --download 2 --transcribe 3 --summarize 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.run_daily_author_pipeline import DEFAULT_STAGE_WORKERS
+from scripts.staged_pipeline import PipelineStage, StagedExecutor, format_throughput_report
+
+
+def simulated_stage(seconds: float):
+    def run(item: int) -> int:
+        time.sleep(seconds)
+        return item
+    return run
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="逐个处理与分阶段处理的吞吐对比（模拟各阶段耗时）")
+    parser.add_argument("--videos", type=int, default=8, help="视频数量")
+    parser.add_argument("--scale", type=float, default=0.1, help="把下面的秒数乘以该系数后再 sleep，缩短基准耗时")
+    for name, default in (("download", 2.0), ("extract_audio", 0.5), ("transcribe", 3.0), ("summarize", 2.0)):
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=default, help=f"{name} 阶段耗时（秒）")
+    parser.add_argument("--queue-size", type=int, default=2, help="阶段之间的队列长度")
+    parser.add_argument("--json", help="把两种模式的结果写入该 JSON 文件")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    durations = {name: getattr(args, name) * args.scale for name in DEFAULT_STAGE_WORKERS}
+    items = list(range(1, args.videos + 1))
+
+    sequential = StagedExecutor(
+        [PipelineStage(name, simulated_stage(seconds)) for name, seconds in durations.items()], queue_size=1
+    )
+    started = time.perf_counter()
+    for item in items:
+        list(sequential.run([item]))
+    sequential_seconds = time.perf_counter() - started
+
+    staged = StagedExecutor(
+        [
+            PipelineStage(name, simulated_stage(seconds), DEFAULT_STAGE_WORKERS[name])
+            for name, seconds in durations.items()
+        ],
+        queue_size=args.queue_size,
+    )
+    list(staged.run(items))
+    report = staged.report()
+
+    print(f"逐个处理: {sequential_seconds:.2f}s，{args.videos * 3600 / sequential_seconds:.1f} 个/小时")
+    print(format_throughput_report(report))
+    print(f"分阶段执行相对逐个处理的加速: {sequential_seconds / report['wall_seconds']:.2f}x")
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps({"sequential_seconds": round(sequential_seconds, 3), "staged": report}, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
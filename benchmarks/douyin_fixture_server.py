@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""本地抖音替身服务：模拟下载器访问的短链、接口、分享页和 CDN。
+
+下载器里的域名都是写死的，客户端通过 `mount_fixture(session, base_url)` 在 requests 会话上
+为这些域名挂载改写地址的适配器：`https://<host>/<path>` 会被发到 `<base_url>/<host>/<path>`，
+服务端按路径第一段区分被模拟的域名。
+
+支持的端点：
+- `v.douyin.com/<code>/`：302 跳转到 `www.iesdouyin.com/share/video/<id>/`
+- `www.iesdouyin.com/web/api/v2/aweme/iteminfo/?item_ids=<id>`：iteminfo JSON
+- `m.douyin.com/share/video/<id>`：移动端分享页，视频地址在 `play_addr` 中
+- `www.douyin.com/video/<id>`：PC 端页面，视频数据在 URL 编码的 RENDER_DATA 中
+- `<cdn>.douyinvod.com/<id>/<gear>.mp4`：支持 Range 的视频文件，可配置首字节延迟和带宽
+
+`resolve_via` 决定哪条解析路径能拿到视频地址，其余路径返回与线上相同的“无数据”响应，
+用来覆盖下载器的回退逻辑。
+
+单独运行：
+    python benchmarks/douyin_fixture_server.py --port 8765 --video-mb 50 --bandwidth-mb 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, quote, urlsplit
+
+from requests.adapters import HTTPAdapter
+
+
+FIXTURE_HOSTS = (
+    "v.douyin.com",
+    "www.iesdouyin.com",
+    "m.douyin.com",
+    "www.douyin.com",
+)
+CDN_HOSTS = ("v26-web.douyinvod.com", "v3-web.douyinvod.com")
+DEFAULT_VIDEO_ID = "7500000000000000001"
+DEFAULT_SHORT_CODE = "fixture"
+RESOLVE_PATHS = ("api", "mobile", "pc")
+BLOCK_SIZE = 64 * 1024
+# 视频内容按固定模式生成，任意区间都能直接算出来，不需要在内存里放整个文件
+PATTERN = bytes(range(256)) * (BLOCK_SIZE // 256)
+
+
+@dataclass
+class FixtureConfig:
+    video_id: str = DEFAULT_VIDEO_ID
+    short_code: str = DEFAULT_SHORT_CODE
+    video_size: int = 8 * 1024 * 1024
+    # 解析接口和页面的响应延迟（秒）
+    resolve_latency: float = 0.0
+    # CDN 首字节延迟（秒）与每个连接的带宽上限（字节/秒，0 表示不限）
+    cdn_latency: float = 0.0
+    bandwidth: int = 0
+    # 个别 CDN 主机的额外首字节延迟，用来模拟慢镜像
+    host_latency: dict[str, float] = field(default_factory=dict)
+    resolve_via: str = "api"
+    # 分享页中视频数据之前的填充大小，模拟真实页面的体积
+    page_padding: int = 512 * 1024
+
+
+def payload_bytes(start: int, end: int) -> bytes:
+    """返回视频内容中 [start, end] 闭区间的字节。"""
+    offset = start % len(PATTERN)
+    length = end - start + 1
+    repeated = PATTERN[offset:] + PATTERN * (length // len(PATTERN) + 1)
+    return repeated[:length]
+
+
+def video_urls(config: FixtureConfig, gear: str) -> list[str]:
+    return [f"https://{host}/{config.video_id}/{gear}.mp4" for host in CDN_HOSTS]
+
+
+def build_video_object(config: FixtureConfig, camel_case: bool = False) -> dict[str, Any]:
+    size = config.video_size
+    if camel_case:
+        return {
+            "playAddr": [{"src": url.replace("https:", "")} for url in video_urls(config, "default")],
+            "bitRateList": [
+                {
+                    "gearName": "adapt_lowest",
+                    "bitRate": 400_000,
+                    "dataSize": size,
+                    "playAddr": [{"src": url.replace("https:", "")} for url in video_urls(config, "low")],
+                },
+            ],
+        }
+    return {
+        "play_addr": {"url_list": video_urls(config, "default"), "data_size": size},
+        "bit_rate": [
+            {
+                "gear_name": "lower_540_0",
+                "bit_rate": 400_000,
+                "play_addr": {"url_list": video_urls(config, "low"), "data_size": size},
+            },
+        ],
+    }
+
+
+def build_iteminfo(config: FixtureConfig) -> dict[str, Any]:
+    return {
+        "status_code": 0,
+        "item_list": [
+            {
+                "desc": "本地替身视频",
+                "author": {"nickname": "fixture"},
+                "video": build_video_object(config),
+            }
+        ],
+    }
+
+
+def build_mobile_page(config: FixtureConfig, with_video: bool) -> str:
+    padding = _page_padding(config.page_padding)
+    data = ""
+    if with_video:
+        escaped = video_urls(config, "low")[0].replace("/", "\\u002F")
+        data = f'<script>{{"play_addr":{{"uri":"{config.video_id}","url_list":["{escaped}"]}}}}</script>'
+    return f"<html><head><title>本地替身视频</title></head><body>{padding}{data}</body></html>"
+
+
+def build_pc_page(config: FixtureConfig, with_video: bool) -> str:
+    padding = _page_padding(config.page_padding)
+    render_data: dict[str, Any] = {"app": {"user": {}}}
+    if with_video:
+        render_data["app"]["videoDetail"] = {
+            "awemeId": config.video_id,
+            "desc": "本地替身视频",
+            "authorInfo": {"nickname": "fixture"},
+            "video": build_video_object(config, camel_case=True),
+        }
+    blob = quote(json.dumps(render_data, ensure_ascii=False))
+    return (
+        f"<html><head><title>本地替身视频</title></head><body>{padding}"
+        f'<script id="RENDER_DATA" type="application/json">{blob}</script></body></html>'
+    )
+
+
+def _page_padding(size: int) -> str:
+    unit = '<div class="item"><a href="https://www.douyin.com/user/fixture">作者</a></div>\n'
+    return unit * max(0, size // len(unit))
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写出，开着 Nagle 时会撞上客户端的延迟 ACK，每个请求多等 40ms
+    disable_nagle_algorithm = True
+    config = FixtureConfig()
+
+    def do_GET(self) -> None:
+        host, _, rest = self.path.lstrip("/").partition("/")
+        parsed = urlsplit(f"/{rest}")
+        path = parsed.path
+        config = self.config
+
+        if host == "v.douyin.com":
+            self._delay(config.resolve_latency)
+            self._redirect(f"https://www.iesdouyin.com/share/video/{config.video_id}/?region=CN")
+        elif host == "www.iesdouyin.com" and path.startswith("/web/api/v2/aweme/iteminfo"):
+            self._delay(config.resolve_latency)
+            item_ids = parse_qs(parsed.query).get("item_ids", [""])[0]
+            if config.resolve_via == "api" and item_ids == config.video_id:
+                self._send(200, json.dumps(build_iteminfo(config)).encode("utf-8"), "application/json")
+            else:
+                # 线上接口被风控时返回空响应体
+                self._send(200, b"", "application/json")
+        elif host == "www.iesdouyin.com" and path.startswith("/share/video/"):
+            self._delay(config.resolve_latency)
+            self._send(200, b"<html><title>share</title></html>", "text/html")
+        elif host == "m.douyin.com" and path.startswith("/share/video/"):
+            self._delay(config.resolve_latency)
+            page = build_mobile_page(config, config.resolve_via == "mobile")
+            self._send(200, page.encode("utf-8"), "text/html; charset=utf-8")
+        elif host == "www.douyin.com" and path.startswith("/video/"):
+            self._delay(config.resolve_latency)
+            page = build_pc_page(config, config.resolve_via == "pc")
+            self._send(200, page.encode("utf-8"), "text/html; charset=utf-8")
+        elif host in CDN_HOSTS and path.endswith(".mp4"):
+            self._delay(config.cdn_latency + config.host_latency.get(host, 0.0))
+            self._send_video()
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def _send_video(self) -> None:
+        size = self.config.video_size
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            first, _, last = range_header[len("bytes="):].partition("-")
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if start >= size or start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        bandwidth = self.config.bandwidth
+        started = time.monotonic()
+        sent = 0
+        position = start
+        try:
+            while position <= end:
+                chunk = payload_bytes(position, min(end, position + BLOCK_SIZE - 1))
+                self.wfile.write(chunk)
+                position += len(chunk)
+                sent += len(chunk)
+                if bandwidth:
+                    # 按累计发送量限速，避免逐块 sleep 的误差累积
+                    ahead = sent / bandwidth - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端取消（例如对冲请求的落后方）时直接结束
+            pass
+
+    def _redirect(self, location: str) -> None:
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def _delay(seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+class FixtureServer:
+    """在后台线程运行的替身服务。"""
+
+    def __init__(self, config: FixtureConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FixtureConfig()
+        handler = type("BoundFixtureHandler", (FixtureHandler,), {"config": self.config})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def short_url(self) -> str:
+        return f"https://v.douyin.com/{self.config.short_code}/"
+
+    def start(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.stop()
+
+
+class FixtureAdapter(HTTPAdapter):
+    """把 `https://<host>/<path>` 改写为 `<base_url>/<host>/<path>` 后再发送。"""
+
+    def __init__(self, base_url: str, pool_maxsize: int = 32):
+        self.base_url = base_url.rstrip("/")
+        super().__init__(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+
+    def send(self, request, **kwargs):
+        parsed = urlsplit(request.url)
+        if not request.url.startswith(self.base_url):
+            request.url = f"{self.base_url}/{parsed.netloc}{parsed.path}"
+            if parsed.query:
+                request.url += f"?{parsed.query}"
+        return super().send(request, **kwargs)
+
+
+def mount_fixture(session, base_url: str) -> FixtureAdapter:
+    """让 session 对所有被模拟域名的请求都发往替身服务。
+
+    按域名挂载前缀，比下载器自己挂在 `https://` 上的连接池适配器更具体，不会被它覆盖。
+    """
+    adapter = FixtureAdapter(base_url)
+    for host in FIXTURE_HOSTS + CDN_HOSTS:
+        session.mount(f"https://{host}", adapter)
+    return adapter
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="本地抖音替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--video-mb", type=float, default=8, help="视频文件大小（MB）")
+    parser.add_argument("--resolve-via", choices=RESOLVE_PATHS, default="api", help="能解析出视频地址的路径")
+    parser.add_argument("--resolve-latency", type=float, default=0.0, help="接口与页面的响应延迟（秒）")
+    parser.add_argument("--cdn-latency", type=float, default=0.0, help="CDN 首字节延迟（秒）")
+    parser.add_argument("--bandwidth-mb", type=float, default=0.0, help="每个连接的带宽上限（MB/s），0 表示不限")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    config = FixtureConfig(
+        video_size=int(args.video_mb * 1024 * 1024),
+        resolve_latency=args.resolve_latency,
+        cdn_latency=args.cdn_latency,
+        bandwidth=int(args.bandwidth_mb * 1024 * 1024),
+        resolve_via=args.resolve_via,
+    )
+    server = FixtureServer(config, args.host, args.port).start()
+    print(f"替身服务已启动: {server.base_url}")
+    print(f"短链: {server.short_url}")
+    print(json.dumps(asdict(config), ensure_ascii=False))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -30,6 +30,7 @@ NEWS_DIR = "news"  # 新闻文件目录
 
 # 音频处理配置
 SEGMENT_SECONDS = 60  # 每段音频长度（秒）
+SEGMENTATION = "fixed"  # 切片方式：fixed 按固定时长切分，vad 在静音处切分并跳过静音
 MODEL_NAME = "base"   # Whisper模型名称，可选：tiny, base, small, medium, large
 
 # Git配置
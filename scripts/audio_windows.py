@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""把整段音频解码一次为 16kHz float32 数组，再按固定时长切成窗口视图交给 Whisper。
+
+与 `ffmpeg -f segment` 先写切片文件、Whisper 再为每个切片启动 ffmpeg 解码相比，
+只启动一次 ffmpeg、不写临时文件，每个窗口都是同一块内存上的切片，不复制数据。
+解码方式与 whisper.audio.load_audio 相同，Whisper 可以直接转写这些数组。
+"""
+
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+
+# Whisper 模型要求的采样率
+SAMPLE_RATE = 16000
+# 切片方式：fixed 按固定时长切分，vad 用能量 VAD 在静音处切分并跳过静音（见 scripts/vad.py）
+SEGMENTATION_MODES = ("fixed", "vad")
+DEFAULT_SEGMENTATION = "fixed"
+
+
+class AudioDecodeError(RuntimeError):
+    pass
+
+
+def decode_audio(
+    audio_path: str | Path,
+    sample_rate: int = SAMPLE_RATE,
+    run: Callable[..., subprocess.CompletedProcess] = subprocess.run,
+) -> np.ndarray:
+    """用 ffmpeg 把音频解码为单声道 float32 数组（取值 [-1, 1)），失败时抛出 AudioDecodeError。"""
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", str(audio_path),
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-",
+    ]
+    try:
+        result = run(cmd, capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        stderr = getattr(exc, "stderr", b"") or b""
+        raise AudioDecodeError(f"ffmpeg failed to decode {audio_path}: {stderr.decode(errors='replace')[-500:] or exc}") from exc
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def probe_duration(
+    audio_path: str | Path, run: Callable[..., subprocess.CompletedProcess] = subprocess.run
+) -> float | None:
+    """用 ffprobe 读取音频时长（秒），读取失败时返回 None。"""
+    cmd = [
+        "ffprobe", "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", str(audio_path),
+    ]
+    try:
+        result = run(cmd, capture_output=True, check=True, text=True)
+        return float(result.stdout.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def split_windows(
+    audio: np.ndarray, window_seconds: float, sample_rate: int = SAMPLE_RATE
+) -> list[tuple[float, np.ndarray]]:
+    """按 window_seconds 切分，返回 (起始秒数, 窗口视图) 列表；最后一个窗口可能较短。"""
+    window = int(window_seconds * sample_rate)
+    if window <= 0:
+        raise ValueError("window_seconds must be positive")
+    return [(start / sample_rate, audio[start:start + window]) for start in range(0, len(audio), window)]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""把多个切片的 30 秒窗口攒成一批，一次前向解码。
+
+Whisper 每次前向只处理一个 30 秒的 log-mel 窗口，逐段 model.transcribe() 时批大小恒为 1，
+CPU 上矩阵乘法效率很低。这里把所有切片按 30 秒切成窗口，每 batch_size 个窗口交给 decode_batch
+一次解码，再按切片顺序把各窗口的文本拼回去。具体的 log-mel 计算和解码由调用方（mp3_2_txt）提供。
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Sequence
+
+import numpy as np
+
+from scripts.audio_windows import SAMPLE_RATE
+from scripts.segment_pool import SegmentOutcome
+
+
+# Whisper 单次前向的音频长度
+CHUNK_SECONDS = 30
+DEFAULT_BATCH_SIZE = 8
+
+
+def chunk_parts(
+    parts: Sequence[tuple[str, np.ndarray]], chunk_seconds: float = CHUNK_SECONDS, sample_rate: int = SAMPLE_RATE
+) -> list[tuple[int, np.ndarray]]:
+    """把每个切片切成不超过 chunk_seconds 的窗口视图，返回 (切片序号, 窗口) 列表。"""
+    size = int(chunk_seconds * sample_rate)
+    return [
+        (index, audio[start:start + size])
+        for index, (_, audio) in enumerate(parts)
+        for start in range(0, len(audio), size)
+    ]
+
+
+def transcribe_batched(
+    parts: Sequence[tuple[str, np.ndarray]],
+    decode_batch: Callable[[list[np.ndarray]], list[str]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    chunk_seconds: float = CHUNK_SECONDS,
+    sample_rate: int = SAMPLE_RATE,
+    on_batch: Callable[[int], None] | None = None,
+) -> list[SegmentOutcome]:
+    """按切片顺序返回结果；某一批解码失败时，涉及到的切片都记为失败。
+
+    on_batch 在每批解码结束后以该批窗口数调用，用于更新进度。
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    chunks = chunk_parts(parts, chunk_seconds, sample_rate)
+    texts: list[list[str]] = [[] for _ in parts]
+    errors: list[str | None] = [None] * len(parts)
+    seconds = [0.0] * len(parts)
+
+    for offset in range(0, len(chunks), batch_size):
+        batch = chunks[offset:offset + batch_size]
+        started = time.perf_counter()
+        try:
+            decoded = decode_batch([audio for _, audio in batch])
+            if len(decoded) != len(batch):
+                raise RuntimeError(f"decoder returned {len(decoded)} results for {len(batch)} windows")
+        except Exception as exc:
+            decoded = None
+            for index, _ in batch:
+                errors[index] = errors[index] or str(exc)
+        elapsed = time.perf_counter() - started
+        for position, (index, _) in enumerate(batch):
+            seconds[index] += elapsed / len(batch)
+            if decoded is not None:
+                texts[index].append(decoded[position])
+        if on_batch is not None:
+            on_batch(len(batch))
+
+    return [
+        SegmentOutcome(index, name, None if errors[index] else "".join(texts[index]), errors[index], seconds[index])
+        for index, (name, _) in enumerate(parts)
+    ]
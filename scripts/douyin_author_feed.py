@@ -6,12 +6,16 @@ from __future__ import annotations
 import re
 from http.cookies import SimpleCookie
 import os
+import time
 from contextlib import contextmanager
 from datetime import date, datetime
+from functools import lru_cache
 from typing import Any, Iterator
 from urllib.parse import urlparse
 from zoneinfo import ZoneInfo
 
+from scripts.douyin_proxy_pool import ProxyPool, playwright_proxy, route_label
+
 
 SHANGHAI_TZ = ZoneInfo("Asia/Shanghai")
 PUBLISH_TIME_PATTERN = re.compile(r"发布时间[:：]\s*(\d{4}-\d{2}-\d{2})\s+(\d{2}:\d{2})")
@@ -163,7 +167,19 @@ def _playwright_browser() -> Iterator[Any]:
             browser.close()
 
 
-def _new_douyin_context(browser: Any) -> Any:
+@lru_cache(maxsize=1)
+def _douyin_proxy_pool() -> ProxyPool | None:
+    """进程内共享的出口池，由 DOUYIN_PROXIES 环境变量配置。"""
+    return ProxyPool.from_env()
+
+
+def _new_douyin_context(browser: Any, proxy_route: str | None = None) -> Any:
+    context_options: dict[str, Any] = {}
+    proxy = playwright_proxy(proxy_route)
+    if proxy is not None:
+        print(f"[douyin] browser context via proxy {route_label(proxy_route)}")
+        context_options["proxy"] = proxy
+
     context = browser.new_context(
         locale="zh-CN",
         timezone_id="Asia/Shanghai",
@@ -173,6 +189,7 @@ def _new_douyin_context(browser: Any) -> Any:
             "Chrome/137.0.0.0 Safari/537.36"
         ),
         viewport={"width": 1440, "height": 1200},
+        **context_options,
     )
 
     cookie_header = os.getenv("DOUYIN_COOKIE", "").strip()
@@ -416,13 +433,52 @@ def _extract_author_video_cards(page: Any, author_url: str) -> list[dict[str, st
     return []
 
 
-def get_author_video_urls(author_url: str) -> list[str]:
-    """抓取作者主页作品 URL，按页面顺序返回。"""
-    with _playwright_browser() as browser:
+def _open_author_cards(browser: Any, author_url: str) -> tuple[Any, list[dict[str, str]]]:
+    """新建浏览器上下文并抓取作者主页作品卡片，返回 (context, cards)。
+
+    配置了出口池时上下文走最健康的代理；抓不到作品且页面是风控验证页时，
+    记录该出口被风控，换下一个出口重新打开，直到所有出口都试过一次。
+    """
+    pool = _douyin_proxy_pool()
+    if pool is None:
         context = _new_douyin_context(browser)
+        return context, _extract_author_video_cards(context.new_page(), author_url)
+
+    tried: list[str] = []
+    context = None
+    cards: list[dict[str, str]] = []
+    for _attempt in range(len(pool.routes)):
+        if context is not None:
+            context.close()
+        route = pool.choose(exclude=tried)
+        tried.append(route)
+        context = _new_douyin_context(browser, route)
         author_page = context.new_page()
+
+        pool.start(route)
+        started = time.monotonic()
         try:
             cards = _extract_author_video_cards(author_page, author_url)
+        except Exception:
+            pool.record_failure(route)
+            context.close()
+            raise
+        if cards:
+            pool.record_success(route, time.monotonic() - started)
+            break
+
+        pool.record_failure(route)
+        if not _looks_like_challenge_page(author_page):
+            break
+        pool.record_ban(route)
+    return context, cards
+
+
+def get_author_video_urls(author_url: str) -> list[str]:
+    """抓取作者主页作品 URL，按页面顺序返回。"""
+    with _playwright_browser() as browser:
+        context, cards = _open_author_cards(browser, author_url)
+        try:
             if not cards:
                 raise RuntimeError(f"no douyin videos found for {normalize_author_url(author_url)}")
             return [card["video_url"] for card in cards]
@@ -445,11 +501,24 @@ def _extract_video_publish_time(page: Any, video_url: str) -> datetime | None:
 
 def get_video_publish_time(video_url: str) -> datetime | None:
     """抓取单个抖音视频页的发布时间。"""
+    pool = _douyin_proxy_pool()
+    route = pool.choose() if pool is not None else None
     with _playwright_browser() as browser:
-        context = _new_douyin_context(browser)
+        context = _new_douyin_context(browser, route)
         page = context.new_page()
+        if pool is not None:
+            pool.start(route)
+        started = time.monotonic()
         try:
-            return _extract_video_publish_time(page, video_url)
+            published_at = _extract_video_publish_time(page, video_url)
+        except Exception:
+            if pool is not None:
+                pool.record_failure(route)
+            raise
+        else:
+            if pool is not None:
+                pool.record_success(route, time.monotonic() - started)
+            return published_at
         finally:
             context.close()
 
@@ -488,14 +557,12 @@ def get_author_videos(
         target_day = datetime.now(SHANGHAI_TZ).date()
 
     with _playwright_browser() as browser:
-        context = _new_douyin_context(browser)
-        author_page = context.new_page()
-        detail_page = context.new_page()
+        context, cards = _open_author_cards(browser, author_url)
         try:
-            cards = _extract_author_video_cards(author_page, author_url)
             if not cards:
                 raise RuntimeError(f"no douyin videos found for {normalize_author_url(author_url)}")
 
+            detail_page = context.new_page()
             videos: list[dict[str, Any]] = []
             consecutive_old_count = 0
 
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""抖音视频元数据磁盘缓存。"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlparse
+
+from scripts.pipeline_artifacts import temp_artifact_path
+
+
+DEFAULT_CACHE_FILE = Path("data/douyin_video_cache.json")
+DEFAULT_VIDEO_TTL_SECONDS = 6 * 3600
+DEFAULT_LINK_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+# CDN 地址到期前预留的余量，避免拿到缓存后下载到一半签名过期
+EXPIRY_MARGIN_SECONDS = 10 * 60
+EXPIRY_QUERY_KEYS = ("x-expires", "expires", "expire", "x-expire")
+
+
+def parse_url_expiry(url: str) -> int | None:
+    """从 CDN 签名地址的查询参数中解析过期时间（epoch 秒）。"""
+    query = parse_qs(urlparse(url).query)
+    for key in EXPIRY_QUERY_KEYS:
+        values = query.get(key)
+        if values and values[0].isdigit():
+            return int(values[0])
+    return None
+
+
+class VideoMetadataCache:
+    """短链 → video_id、video_id → 视频元数据的 JSON 文件缓存。
+
+    视频条目的有效期取 `video_ttl` 与播放地址签名过期时间中较早的一个；
+    两类条目各自最多保留 `max_entries` 条，超出时淘汰最久未使用的条目。
+    读写都加锁，批量下载的多个线程可以共享同一个实例。
+
+    命中只在内存中更新最近使用时间，不重写整个文件；写入、失效时落盘，
+    其余未落盘的使用记录由 flush() 写出（进程退出时自动调用）。
+    """
+
+    def __init__(
+        self,
+        cache_path: str | Path = DEFAULT_CACHE_FILE,
+        video_ttl: int = DEFAULT_VIDEO_TTL_SECONDS,
+        link_ttl: int = DEFAULT_LINK_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.cache_path = Path(cache_path)
+        self.video_ttl = video_ttl
+        self.link_ttl = link_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._data = self._load()
+        atexit.register(self.flush)
+
+    def get_video_id(self, url: str) -> str | None:
+        entry = self._get_entry("links", url)
+        return entry["video_id"] if entry else None
+
+    def put_video_id(self, url: str, video_id: str) -> None:
+        now = int(self._clock())
+        self._put_entry(
+            "links",
+            url,
+            {"video_id": video_id, "fetched_at": now, "expires_at": now + self.link_ttl},
+        )
+
+    def get_video_info(self, video_id: str) -> dict[str, Any] | None:
+        entry = self._get_entry("videos", video_id)
+        return dict(entry["info"]) if entry else None
+
+    def put_video_info(self, video_id: str, video_info: dict[str, Any]) -> None:
+        now = int(self._clock())
+        expires_at = now + self.video_ttl
+        urls = [*video_info.get("video_urls", [])]
+        urls.extend(url for rendition in video_info.get("renditions", []) for url in rendition.get("urls", []))
+        if video_info.get("video_url"):
+            urls.append(video_info["video_url"])
+        for url in urls:
+            url_expiry = parse_url_expiry(url)
+            if url_expiry is not None:
+                expires_at = min(expires_at, url_expiry - EXPIRY_MARGIN_SECONDS)
+        if expires_at <= now:
+            return
+
+        info = {key: value for key, value in video_info.items() if key != "from_cache"}
+        self._put_entry("videos", video_id, {"info": info, "fetched_at": now, "expires_at": expires_at})
+
+    def invalidate_video(self, video_id: str) -> None:
+        with self._lock:
+            if self._data["videos"].pop(video_id, None) is not None:
+                self._save()
+
+    def flush(self) -> None:
+        """把命中时在内存中更新的使用时间和过期删除写回文件。"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _get_entry(self, section: str, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            entries = self._data[section]
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            now = int(self._clock())
+            if entry.get("expires_at", 0) <= now:
+                del entries[key]
+                self._dirty = True
+                return None
+            entry["last_used_at"] = now
+            self._dirty = True
+            return entry
+
+    def _put_entry(self, section: str, key: str, entry: dict[str, Any]) -> None:
+        with self._lock:
+            entries = self._data[section]
+            entry["last_used_at"] = entry["fetched_at"]
+            entries[key] = entry
+            self._evict(entries)
+            self._save()
+
+    def _evict(self, entries: dict[str, dict[str, Any]]) -> None:
+        now = int(self._clock())
+        for key in [key for key, entry in entries.items() if entry.get("expires_at", 0) <= now]:
+            del entries[key]
+        overflow = len(entries) - self.max_entries
+        if overflow <= 0:
+            return
+        least_recent = sorted(entries, key=lambda key: entries[key].get("last_used_at", 0))
+        for key in least_recent[:overflow]:
+            del entries[key]
+
+    def _load(self) -> dict[str, Any]:
+        if not self.cache_path.exists():
+            return self._empty_payload()
+
+        try:
+            with self.cache_path.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            # 缓存损坏时直接丢弃，不影响下载流程
+            return self._empty_payload()
+
+        if (
+            not isinstance(payload, dict)
+            or payload.get("version") != 1
+            or not isinstance(payload.get("links"), dict)
+            or not isinstance(payload.get("videos"), dict)
+        ):
+            return self._empty_payload()
+        return payload
+
+    def _save(self) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = temp_artifact_path(self.cache_path)
+        with temp_path.open("w", encoding="utf-8") as handle:
+            json.dump(self._data, handle, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.cache_path)
+        self._dirty = False
+
+    @staticmethod
+    def _empty_payload() -> dict[str, Any]:
+        return {"version": 1, "links": {}, "videos": {}}
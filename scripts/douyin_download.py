@@ -5,17 +5,217 @@
 使用移动端API和更直接的方法
 """
 
+import html
 import re
 import sys
 import os
+import subprocess
+import tempfile
 import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 import argparse
-from urllib.parse import urlparse, parse_qs
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs, unquote
 from pathlib import Path
 import json
 
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from scripts.douyin_cache import DEFAULT_CACHE_FILE, VideoMetadataCache
+from scripts.douyin_mirrors import DEFAULT_STATS_FILE, MirrorStatsStore, mirror_host
+from scripts.douyin_proxy_pool import ProxyPool, ProxyPoolAdapter, make_ban_hook
+from scripts.douyin_store import DEFAULT_STORE_DIR, DownloadArtifactStore, link_or_copy
+from scripts.pipeline_artifacts import commit_artifact
+from scripts.retry_policy import AdaptiveTimeout, RetryPolicy, is_connection_refused
+
+# 纯音频流的最低可接受码率（bps），低于此值的音频会明显影响语音识别效果
+MIN_AUDIO_BITRATE = 32000
+
+# 下载读取块大小的自适应范围：读得快时翻倍，读一次超过 SLOW_READ_SECONDS 时减半
+MIN_READ_SIZE = 64 * 1024
+MAX_READ_SIZE = 4 * 1024 * 1024
+FAST_READ_SECONDS = 0.05
+SLOW_READ_SECONDS = 0.5
+# 写入 .part 文件的缓冲区大小
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+# 进度回调的最小间隔（秒）
+PROGRESS_INTERVAL = 0.5
+
+# 移动端分享页中视频地址的候选，按优先级排列。
+# 每种候选先用 str.find 定位字面量锚点，再在该位置做一次正则匹配：
+# CPython 的 re 对多分支合并的正则无法使用字面量前缀快速查找，逐锚点定位反而更快
+PAGE_VIDEO_URL_KEYS = (
+    ('"play_addr":{"uri":"', re.compile(r'"play_addr":\{"uri":"[^"]+","url_list":\["([^"]+)"')),
+    ('"playAddr":"', re.compile(r'"playAddr":"([^"]+)"')),
+    ('"downloadAddr":"', re.compile(r'"downloadAddr":"([^"]+)"')),
+)
+# 没有字段名时，直接在引号内查找带这些域名/后缀的 https 地址
+PAGE_VIDEO_URL_HOSTS = ('.douyinvod.com', '.amazonaws.com', '.mp4')
+PAGE_VIDEO_URL_MARKERS = ('douyinvod', 'amazonaws', 'mp4', 'snssdk')
+PAGE_TITLE_PATTERN = re.compile(r'<title>(.*?)</title>')
+# PC端页面内嵌的 JSON 数据，按优先级排列
+PAGE_JSON_PATTERNS = (
+    re.compile(r'<script id="RENDER_DATA" type="application/json">(.*?)</script>', re.DOTALL),
+    re.compile(r'window\._SSR_HYDRATED_DATA\s*=\s*({.*?})</script>', re.DOTALL),
+)
+
+# 批量模式下从分享文案中提取链接
+SHARE_URL_PATTERN = re.compile(r'https?://[^\s"\'<>，。]+')
+
+# 页面 JSON 中视频详情（含 `video` 字段）的已知路径，`*` 表示任意顶层键
+JSON_VIDEO_DETAIL_PATHS = (
+    ('*', 'aweme', 'detail'),
+    ('app', 'videoDetail'),
+    ('anyVideo', 'gidInformation', 'packerData'),
+)
+# 兜底遍历的深度与节点上限，避免在异常巨大的 JSON 上耗时过久
+JSON_WALK_MAX_DEPTH = 16
+JSON_WALK_MAX_NODES = 200000
+JSON_VIDEO_OBJECT_KEYS = ('bitRateList', 'bit_rate', 'playAddr', 'bitRateAudio', 'bit_rate_audio')
+JSON_VIDEO_URL_KEYS = ('playAddr', 'downloadAddr', 'play_addr', 'download_addr', 'url')
+
+
+def _iter_keyed_urls(content, anchor, pattern):
+    """按出现顺序产出 `"字段名":"地址"` 形式的候选地址"""
+    position = content.find(anchor)
+    while position >= 0:
+        match = pattern.match(content, position)
+        if match:
+            yield match.group(1)
+            position = content.find(anchor, match.end())
+        else:
+            position = content.find(anchor, position + 1)
+
+
+def _iter_host_urls(content, host):
+    """按出现顺序产出引号内包含 host 的 https 地址，等价于 `https://[^"]*<host>[^"]*`"""
+    position = content.find(host)
+    while position >= 0:
+        span_start = content.rfind('"', 0, position) + 1
+        url_start = content.find('https://', span_start, position)
+        if url_start >= 0:
+            url_end = content.find('"', position)
+            if url_end < 0:
+                url_end = len(content)
+            yield content[url_start:url_end]
+            position = content.find(host, url_end)
+        else:
+            position = content.find(host, position + 1)
+
+
+def extract_page_video_url(content):
+    """按优先级返回页面中第一个可用的视频地址（已解码），找不到时返回 None
+
+    找到可用地址后立即停止，只对命中的片段做反转义。
+    """
+    candidate_groups = [_iter_keyed_urls(content, anchor, pattern) for anchor, pattern in PAGE_VIDEO_URL_KEYS]
+    candidate_groups.extend(_iter_host_urls(content, host) for host in PAGE_VIDEO_URL_HOSTS)
+    
+    for candidates in candidate_groups:
+        for video_url in candidates:
+            if video_url.startswith('http') and any(marker in video_url for marker in PAGE_VIDEO_URL_MARKERS):
+                # 解码Unicode转义字符
+                video_url = html.unescape(video_url).replace('\\u002F', '/')
+                # 如果是带水印的URL，转换为无水印版本
+                return video_url.replace('playwm', 'play')
+    return None
+
+
+def extract_page_title(content):
+    """提取页面标题，默认的“抖音”标题视为没有标题"""
+    match = PAGE_TITLE_PATTERN.search(content)
+    if match and match.group(1) and match.group(1) != '抖音':
+        return match.group(1)
+    return None
+
+
+def iter_page_json(content):
+    """按优先级依次产出页面内嵌的 JSON 文本（已解码），每种只取第一处"""
+    for pattern in PAGE_JSON_PATTERNS:
+        match = pattern.search(content)
+        if not match:
+            continue
+        json_data = match.group(1).strip()
+        if json_data.startswith('%7B'):
+            # RENDER_DATA 是 URL 编码的 JSON
+            json_data = unquote(json_data)
+        elif '&' in json_data:
+            json_data = html.unescape(json_data)
+        yield json_data
+
+
+def read_url_list(stream):
+    """从文本流读取待下载链接，每行一个，忽略空行和 # 开头的注释
+
+    行内可以是完整的分享文案，只取其中第一个 http(s) 链接。
+    """
+    urls = []
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        match = SHARE_URL_PATTERN.search(line)
+        if match:
+            urls.append(match.group(0))
+    return urls
+
+
+def format_download_summary(results, wall_seconds):
+    """把 download_many 的结果格式化为汇总表"""
+    lines = [
+        "",
+        "📊 批量下载汇总",
+        f"{'状态':<4} {'大小(MB)':>9} {'耗时(s)':>8} {'速度(MB/s)':>10}  文件/链接",
+    ]
+    for result in results:
+        size_mb = result['size'] / (1024 * 1024)
+        speed = size_mb / result['seconds'] if result['seconds'] > 0 else 0.0
+        status = '✅' if result['path'] else '❌'
+        target = result['path'] or result['url']
+        lines.append(f"{status:<4} {size_mb:>9.2f} {result['seconds']:>8.1f} {speed:>10.2f}  {target}")
+    
+    succeeded = sum(1 for result in results if result['path'])
+    total_mb = sum(result['size'] for result in results) / (1024 * 1024)
+    throughput = total_mb / wall_seconds if wall_seconds > 0 else 0.0
+    lines.append(
+        f"成功 {succeeded} 个，失败 {len(results) - succeeded} 个，共 {total_mb:.2f} MB，"
+        f"总耗时 {wall_seconds:.1f}s，整体吞吐 {throughput:.2f} MB/s"
+    )
+    return "\n".join(lines)
+
+
 class SimpleDouyinDownloader:
-    def __init__(self):
+    def __init__(self, prefer_low_bitrate=False, cache=None, mirror_stats=None, hedge_delay=0, store=None,
+                 proxy_pool=None):
+        # 只需要音频（转写）时优先下载码率最低的版本
+        self.prefer_low_bitrate = prefer_low_bitrate
+        # VideoMetadataCache 实例，命中时跳过短链解析和视频信息接口请求
+        self.cache = cache
+        # MirrorStatsStore 实例，记录各 CDN 镜像的延迟与吞吐并据此排序
+        self.mirror_stats = mirror_stats
+        # 对冲请求的等待秒数，0 表示不对冲，只按排序依次尝试镜像
+        self.hedge_delay = hedge_delay
+        # DownloadArtifactStore 实例，同一视频已下载过时直接复用制品文件
+        self.store = store
+        # ProxyPool 实例，配置后每个请求都从出口池中挑选最健康的代理
+        self.proxy_pool = proxy_pool
+        # 批量并发下载时关闭逐块进度输出，避免多个线程的进度行互相覆盖
+        self.show_progress = True
+        # 进度回调 callback(已下载字节数, 总字节数)，默认打印进度行；最多每 progress_interval 秒调用一次
+        self.progress_callback = None
+        self.progress_interval = PROGRESS_INTERVAL
+        # 每个主机允许的最大并发连接数，设置后连接池按该上限阻塞等待
+        self.host_connection_limit = None
+        # 解析接口和页面请求的超时按实测延迟自适应，失败时按抖动指数退避重试
+        self.retry_policy = RetryPolicy(timeouts=AdaptiveTimeout("douyin-api", initial=(5.0, 15.0)))
+        # CDN 视频流的超时：连接超时跟随首字节延迟，读取超时按实测吞吐覆盖一次读取
+        self.cdn_timeouts = AdaptiveTimeout("douyin-cdn", initial=(5.0, 30.0))
         self.session = requests.Session()
         # 使用移动端User-Agent
         self.session.headers.update({
@@ -25,17 +225,27 @@ class SimpleDouyinDownloader:
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
         })
+        if proxy_pool is not None:
+            self._mount_adapter(self._new_adapter())
+            self.session.hooks['response'].append(make_ban_hook(proxy_pool))
     
     def extract_video_id(self, url):
         """提取视频ID"""
         try:
             print(f"正在解析URL: {url}")
+            original_url = url
+            
+            if self.cache is not None:
+                cached_video_id = self.cache.get_video_id(url)
+                if cached_video_id:
+                    print(f"命中缓存，视频ID: {cached_video_id}")
+                    return cached_video_id
             
             # 处理短链接
             if 'v.douyin.com' in url:
                 print("检测到短链接，正在获取重定向后的真实URL...")
                 try:
-                    response = self.session.get(url, allow_redirects=True, timeout=10)
+                    response = self.retry_policy.request(self.session, 'GET', url, allow_redirects=True)
                     url = response.url
                     print(f"重定向后的URL: {url}")
                 except Exception as e:
@@ -54,6 +264,8 @@ class SimpleDouyinDownloader:
                 if match:
                     video_id = match.group(1)
                     print(f"提取到视频ID: {video_id}")
+                    if self.cache is not None and original_url != url:
+                        self.cache.put_video_id(original_url, video_id)
                     return video_id
             
             print(f"无法从URL中提取视频ID: {url}")
@@ -64,7 +276,24 @@ class SimpleDouyinDownloader:
             return None
     
     def get_video_info(self, video_id):
-        """获取视频信息"""
+        """获取视频信息，优先使用元数据缓存"""
+        if self.cache is not None:
+            cached_info = self.cache.get_video_info(video_id)
+            if cached_info and cached_info.get('video_url'):
+                print("命中视频信息缓存")
+                if cached_info.get('renditions'):
+                    # 缓存保存的是全部版本，按当前的清晰度策略重新选择
+                    self._apply_renditions(cached_info, cached_info['renditions'])
+                cached_info['from_cache'] = True
+                return cached_info
+        
+        video_info = self._fetch_video_info(video_id)
+        if self.cache is not None and video_info and video_info.get('video_url'):
+            self.cache.put_video_info(video_id, video_info)
+        return video_info
+    
+    def _fetch_video_info(self, video_id):
+        """从接口或页面获取视频信息"""
         try:
             print("尝试使用移动端API获取视频信息...")
             
@@ -79,7 +308,7 @@ class SimpleDouyinDownloader:
             }
             
             try:
-                response = self.session.get(mobile_api_url, headers=headers, timeout=15)
+                response = self.retry_policy.request(self.session, 'GET', mobile_api_url, headers=headers)
                 print(f"移动端API响应状态码: {response.status_code}")
                 
                 if response.status_code == 200 and response.text.strip():
@@ -96,13 +325,9 @@ class SimpleDouyinDownloader:
                             'cover_url': None
                         }
                         
-                        # 获取视频URL
-                        if item.get('video', {}).get('play_addr', {}).get('url_list'):
-                            video_url = item['video']['play_addr']['url_list'][0]
-                            # 替换域名获取无水印版本
-                            video_url = video_url.replace('playwm', 'play')
-                            video_info['video_url'] = video_url
-                            print(f"成功获取视频URL: {video_url}")
+                        # 获取视频URL（按清晰度选择策略挑选版本，并替换为无水印地址）
+                        if self._apply_rendition(video_info, item.get('video')):
+                            print(f"成功获取视频URL: {video_info['video_url']}")
                             return video_info
                 
             except Exception as e:
@@ -116,6 +341,145 @@ class SimpleDouyinDownloader:
             print(f"获取视频信息时出错: {e}")
             return None
     
+    def _normalize_play_url(self, url):
+        """补全协议并替换为无水印地址"""
+        if url.startswith('//'):
+            url = f"https:{url}"
+        return url.replace('playwm', 'play')
+    
+    def _rendition_urls(self, play_addr):
+        """从 play_addr/playAddr 字段取出全部镜像地址"""
+        if isinstance(play_addr, dict):
+            candidates = play_addr.get('url_list') or play_addr.get('urlList') or []
+        elif isinstance(play_addr, list):
+            candidates = [item.get('src') if isinstance(item, dict) else item for item in play_addr]
+        else:
+            candidates = []
+        
+        urls = []
+        for url in candidates:
+            if isinstance(url, str) and (url.startswith('http') or url.startswith('//')):
+                url = self._normalize_play_url(url)
+                if url not in urls:
+                    urls.append(url)
+        return urls
+    
+    def _collect_renditions(self, video):
+        """收集 aweme `video` 字段中列出的全部清晰度版本
+
+        同时兼容 iteminfo 接口的下划线命名和 RENDER_DATA 的驼峰命名。
+        """
+        renditions = []
+        if not isinstance(video, dict):
+            return renditions
+        
+        default_addr = video.get('play_addr') or video.get('playAddr')
+        default_urls = self._rendition_urls(default_addr)
+        if default_urls:
+            default_size = default_addr.get('data_size') if isinstance(default_addr, dict) else None
+            renditions.append({
+                'kind': 'video',
+                'name': 'default',
+                'bit_rate': None,
+                'size': default_size or video.get('dataSize'),
+                'urls': default_urls,
+            })
+        
+        for item in video.get('bit_rate') or video.get('bitRateList') or []:
+            if not isinstance(item, dict):
+                continue
+            play_addr = item.get('play_addr') or item.get('playAddr')
+            urls = self._rendition_urls(play_addr)
+            if not urls:
+                continue
+            size = play_addr.get('data_size') if isinstance(play_addr, dict) else None
+            renditions.append({
+                'kind': 'video',
+                'name': item.get('gear_name') or item.get('gearName') or 'unknown',
+                'bit_rate': item.get('bit_rate') or item.get('bitRate'),
+                'size': size or item.get('dataSize'),
+                'urls': urls,
+            })
+        
+        for item in video.get('bit_rate_audio') or video.get('bitRateAudio') or []:
+            if not isinstance(item, dict):
+                continue
+            audio_meta = item.get('audio_meta') or item.get('audioMeta') or {}
+            url_list = audio_meta.get('url_list') or audio_meta.get('urlList') or {}
+            urls = [
+                self._normalize_play_url(url_list[key])
+                for key in ('main_url', 'backup_url', 'fallback_url', 'mainUrl', 'backupUrl', 'fallbackUrl')
+                if isinstance(url_list.get(key), str) and url_list[key]
+            ]
+            if not urls:
+                continue
+            renditions.append({
+                'kind': 'audio',
+                'name': f"audio_{audio_meta.get('quality', item.get('audio_quality', 'unknown'))}",
+                'bit_rate': audio_meta.get('bitrate') or audio_meta.get('bit_rate'),
+                'size': audio_meta.get('size'),
+                'urls': urls,
+            })
+        
+        return renditions
+    
+    def _select_rendition(self, renditions):
+        """选择要下载的版本
+
+        默认沿用接口给出的默认版本；prefer_low_bitrate 时优先选择码率不低于
+        MIN_AUDIO_BITRATE 的纯音频流，其次选择码率最低的视频版本（各版本的音轨相同）。
+        """
+        if not renditions:
+            return None
+        
+        videos = [item for item in renditions if item['kind'] == 'video']
+        if not self.prefer_low_bitrate:
+            return videos[0] if videos else renditions[0]
+        
+        audios = [
+            item for item in renditions
+            if item['kind'] == 'audio' and (item['bit_rate'] or 0) >= MIN_AUDIO_BITRATE
+        ]
+        if audios:
+            return min(audios, key=lambda item: (item['bit_rate'], item['size'] or 0))
+        
+        rated_videos = [item for item in videos if item['bit_rate']]
+        if rated_videos:
+            return min(rated_videos, key=lambda item: (item['bit_rate'], item['size'] or 0))
+        
+        sized_videos = [item for item in videos if item['size']]
+        if sized_videos:
+            return min(sized_videos, key=lambda item: item['size'])
+        return videos[0] if videos else renditions[0]
+    
+    def _apply_rendition(self, video_info, video):
+        """按清晰度选择策略填充 video_info 中的下载地址，并报告节省的字节数"""
+        return self._apply_renditions(video_info, self._collect_renditions(video))
+    
+    def _apply_renditions(self, video_info, renditions):
+        """从已收集的版本列表中选择下载地址"""
+        selected = self._select_rendition(renditions)
+        if selected is None:
+            return False
+        
+        video_info['video_url'] = selected['urls'][0]
+        video_info['video_urls'] = selected['urls']
+        video_info['rendition'] = selected['name']
+        video_info['renditions'] = renditions
+        video_info['bytes_saved'] = 0
+        
+        if self.prefer_low_bitrate and len(renditions) > 1:
+            largest_size = max((item['size'] or 0 for item in renditions if item['kind'] == 'video'), default=0)
+            if selected['size'] and largest_size > selected['size']:
+                video_info['bytes_saved'] = largest_size - selected['size']
+            print(
+                f"共 {len(renditions)} 个可选版本，选择 {selected['kind']}:{selected['name']} "
+                f"(码率: {selected['bit_rate'] or '未知'}, 大小: {selected['size'] or '未知'} bytes)"
+            )
+            if video_info['bytes_saved']:
+                print(f"相比最大版本预计少下载 {video_info['bytes_saved']} bytes")
+        return True
+    
     def _get_from_page(self, video_id):
         """从页面获取视频信息"""
         try:
@@ -129,7 +493,7 @@ class SimpleDouyinDownloader:
                 'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
             }
             
-            response = self.session.get(mobile_url, headers=headers, timeout=15)
+            response = self.retry_policy.request(self.session, 'GET', mobile_url, headers=headers)
             print(f"移动端页面响应状态码: {response.status_code}")
             print(f"页面内容长度: {len(response.text)}")
             
@@ -137,62 +501,15 @@ class SimpleDouyinDownloader:
                 content = response.text
                 
                 # 查找视频URL
-                video_patterns = [
-                    r'"play_addr":\{"uri":"([^"]+)","url_list":\["([^"]+)"',
-                    r'"playAddr":"([^"]+)"',
-                    r'"downloadAddr":"([^"]+)"',
-                    r'https://[^"]*\.douyinvod\.com[^"]*',
-                    r'https://[^"]*\.amazonaws\.com[^"]*',
-                    r'https://[^"]*\.mp4[^"]*'
-                ]
-                
-                for pattern in video_patterns:
-                    matches = re.findall(pattern, content)
-                    if matches:
-                        for match in matches:
-                            # 处理不同的匹配结果
-                            if isinstance(match, tuple):
-                                # 对于新的正则表达式，match是一个元组
-                                if len(match) == 2:
-                                    video_uri = match[0]
-                                    video_url = match[1]
-                                else:
-                                    continue
-                            else:
-                                # 对于旧的正则表达式，match是一个字符串
-                                video_url = match
-                                video_uri = None
-                            
-                            if video_url.startswith('http') and ('douyinvod' in video_url or 'amazonaws' in video_url or 'mp4' in video_url or 'snssdk' in video_url):
-                                print(f"找到视频URL: {video_url}")
-                                
-                                # 解码Unicode转义字符
-                                import html
-                                video_url = html.unescape(video_url)
-                                # 手动替换剩余的转义字符
-                                video_url = video_url.replace('\\u002F', '/')
-                                print(f"解码后的URL: {video_url}")
-                                
-                                # 如果是带水印的URL，尝试获取无水印版本
-                                if 'playwm' in video_url:
-                                    video_url = video_url.replace('playwm', 'play')
-                                    print(f"转换为无水印URL: {video_url}")
-                                
-                                video_info = {
-                                    'title': f'douyin_{video_id}',
-                                    'author': 'unknown',
-                                    'video_url': video_url,
-                                    'cover_url': None
-                                }
-                                
-                                # 尝试获取标题
-                                title_match = re.search(r'<title>(.*?)</title>', content)
-                                if title_match:
-                                    title = title_match.group(1)
-                                    if title and title != '抖音':
-                                        video_info['title'] = title
-                                
-                                return video_info
+                video_url = extract_page_video_url(content)
+                if video_url:
+                    print(f"找到视频URL: {video_url}")
+                    return {
+                        'title': extract_page_title(content) or f'douyin_{video_id}',
+                        'author': 'unknown',
+                        'video_url': video_url,
+                        'cover_url': None
+                    }
             
             print("移动端页面解析失败，尝试PC端页面...")
             
@@ -200,7 +517,7 @@ class SimpleDouyinDownloader:
             pc_url = f"https://www.douyin.com/video/{video_id}"
             print(f"尝试PC端页面: {pc_url}")
             
-            response = self.session.get(pc_url, headers=headers, timeout=15)
+            response = self.retry_policy.request(self.session, 'GET', pc_url, headers=headers)
             print(f"PC端页面响应状态码: {response.status_code}")
             print(f"页面内容长度: {len(response.text)}")
             
@@ -208,37 +525,29 @@ class SimpleDouyinDownloader:
                 content = response.text
                 
                 # 查找JSON数据
-                json_patterns = [
-                    r'<script id="RENDER_DATA" type="application/json">(.*?)</script>',
-                    r'window\._SSR_HYDRATED_DATA\s*=\s*({.*?})</script>'
-                ]
-                
-                for pattern in json_patterns:
-                    matches = re.findall(pattern, content, re.DOTALL)
-                    if matches:
-                        try:
-                            json_data = matches[0]
-                            import html
-                            json_data = html.unescape(json_data)
-                            data = json.loads(json_data)
+                for json_data in iter_page_json(content):
+                    try:
+                        data = json.loads(json_data)
+                        
+                        # 按已知路径定位视频对象，一次收集全部版本
+                        renditions, detail = self._collect_json_renditions(data)
+                        if renditions:
+                            detail = detail or {}
+                            author = detail.get('authorInfo') or detail.get('author') or {}
+                            video_info = {
+                                'title': detail.get('desc') or f'douyin_{video_id}',
+                                'author': author.get('nickname') or 'unknown',
+                                'video_url': None,
+                                'cover_url': None
+                            }
+                            self._apply_renditions(video_info, renditions)
+                            print(f"从JSON数据找到视频URL: {video_info['video_url']}")
+                            
+                            return video_info
                             
-                            # 递归查找视频URL
-                            video_url = self._find_video_url_in_json(data)
-                            if video_url:
-                                print(f"从JSON数据找到视频URL: {video_url}")
-                                
-                                video_info = {
-                                    'title': f'douyin_{video_id}',
-                                    'author': 'unknown',
-                                    'video_url': video_url,
-                                    'cover_url': None
-                                }
-                                
-                                return video_info
-                                
-                        except Exception as e:
-                            print(f"解析JSON数据失败: {e}")
-                            continue
+                    except Exception as e:
+                        print(f"解析JSON数据失败: {e}")
+                        continue
             
             print("所有方法都失败了")
             return None
@@ -247,59 +556,731 @@ class SimpleDouyinDownloader:
             print(f"从页面获取视频信息失败: {e}")
             return None
     
-    def _find_video_url_in_json(self, data):
-        """递归查找JSON数据中的视频URL"""
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if key in ['playAddr', 'downloadAddr', 'play_addr', 'download_addr', 'url']:
-                    if isinstance(value, str) and value.startswith('http'):
-                        if 'douyinvod' in value or 'amazonaws' in value or 'mp4' in value:
-                            return value
-                    elif isinstance(value, dict) and 'url_list' in value:
-                        for url in value['url_list']:
-                            if url.startswith('http') and ('douyinvod' in url or 'amazonaws' in url or 'mp4' in url):
-                                return url
-                elif isinstance(value, (dict, list)):
-                    result = self._find_video_url_in_json(value)
-                    if result:
-                        return result
-        elif isinstance(data, list):
-            for item in data:
-                result = self._find_video_url_in_json(item)
-                if result:
-                    return result
-        return None
+    def _resolve_json_video(self, data):
+        """按已知路径定位页面 JSON 中的视频详情，返回 (video, detail)，找不到时返回 (None, None)"""
+        if not isinstance(data, dict):
+            return None, None
+        
+        for path in JSON_VIDEO_DETAIL_PATHS:
+            roots = data.values() if path[0] == '*' else [data.get(path[0])]
+            for node in roots:
+                for key in path[1:]:
+                    node = node.get(key) if isinstance(node, dict) else None
+                if isinstance(node, dict) and isinstance(node.get('video'), dict):
+                    return node['video'], node
+        return None, None
     
-    def download_video(self, video_url, filename, chunk_size=8192):
-        """下载视频文件"""
-        try:
-            print(f"开始下载视频: {filename}")
+    def _walk_json_renditions(self, data):
+        """有限深度地遍历 JSON，一次收集全部候选视频地址及其码率
+
+        已知路径都不匹配时的兜底：遇到视频对象（含 playAddr / bitRateList 等字段）时
+        整体交给 `_collect_renditions`，其他位置的地址字段按单个候选收集。
+        """
+        renditions = []
+        seen_urls = set()
+        
+        def add(rendition):
+            urls = [url for url in rendition['urls'] if url not in seen_urls]
+            if urls:
+                seen_urls.update(urls)
+                renditions.append({**rendition, 'urls': urls})
+        
+        stack = [(data, 0)]
+        visited = 0
+        while stack and visited < JSON_WALK_MAX_NODES:
+            node, depth = stack.pop()
+            visited += 1
             
-            response = self.session.get(video_url, stream=True, timeout=30)
-            response.raise_for_status()
+            if isinstance(node, list):
+                children = node
+            elif isinstance(node, dict):
+                if any(isinstance(node.get(key), list) for key in JSON_VIDEO_OBJECT_KEYS):
+                    for rendition in self._collect_renditions(node):
+                        add(rendition)
+                    continue
+                
+                children = []
+                bit_rate = node.get('bitRate') or node.get('bit_rate')
+                for key, value in node.items():
+                    if key in JSON_VIDEO_URL_KEYS:
+                        if isinstance(value, str):
+                            urls = [value]
+                        elif isinstance(value, dict):
+                            urls = value.get('url_list') or []
+                        else:
+                            urls = []
+                        urls = [
+                            self._normalize_play_url(url) for url in urls
+                            if isinstance(url, str) and url.startswith('http')
+                            and any(marker in url for marker in ('douyinvod', 'amazonaws', 'mp4'))
+                        ]
+                        if urls:
+                            add({
+                                'kind': 'video',
+                                'name': key,
+                                'bit_rate': bit_rate if isinstance(bit_rate, int) else None,
+                                'size': None,
+                                'urls': urls,
+                            })
+                    elif isinstance(value, (dict, list)):
+                        children.append(value)
+            else:
+                continue
             
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded_size = 0
+            if depth < JSON_WALK_MAX_DEPTH:
+                # 逆序入栈，保持文档顺序
+                stack.extend((child, depth + 1) for child in reversed(children) if isinstance(child, (dict, list)))
+        
+        return renditions
+    
+    def _collect_json_renditions(self, data):
+        """从页面 JSON 收集全部候选版本，返回 (renditions, detail)
+
+        先按已知路径直接取视频对象，取不到再做有限深度的兜底遍历。
+        """
+        video, detail = self._resolve_json_video(data)
+        if video is not None:
+            renditions = self._collect_renditions(video)
+            if renditions:
+                return renditions, detail
+        return self._walk_json_renditions(data), None
+    
+    def _read_part_state(self, part_path, state_path):
+        """读取断点续传状态文件，不存在或已损坏时返回 None"""
+        if not os.path.exists(part_path) or not os.path.exists(state_path):
+            return None
+        
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if isinstance(state, dict) else None
+    
+    def _load_part_state(self, part_path, state_path):
+        """读取单连接续传状态，返回已下载字节数和文件总大小"""
+        state = self._read_part_state(part_path, state_path)
+        if state is None:
+            return 0, 0
+        
+        try:
+            total_size = int(state.get('total_size', 0))
+            segments = state.get('segments')
+            if segments:
+                # 分段下载留下的文件已预分配到完整大小，只有开头连续完成的部分可以顺序续传
+                downloaded_size = self._contiguous_prefix(segments)
+                with open(part_path, 'r+b') as f:
+                    f.truncate(downloaded_size)
+                return downloaded_size, total_size
+        except (OSError, ValueError, TypeError, KeyError):
+            return 0, 0
+        
+        # 以 .part 文件实际大小为准，状态文件中的偏移量可能落后于最后一次写入
+        downloaded_size = os.path.getsize(part_path)
+        if total_size and downloaded_size > total_size:
+            return 0, 0
+        return downloaded_size, total_size
+    
+    def _save_part_state(self, state_path, video_url, downloaded_size, total_size, segments=None):
+        """保存断点续传状态"""
+        state = {
+            'video_url': video_url,
+            'downloaded': downloaded_size,
+            'total_size': total_size,
+        }
+        if segments is not None:
+            state['segments'] = segments
+        
+        temp_path = f"{state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, state_path)
+    
+    def _clear_part_files(self, part_path, state_path):
+        """删除断点续传的临时文件"""
+        for path in (part_path, state_path):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _finish_part_file(self, part_path, state_path, filename):
+        """下载完整后把 .part 文件 fsync 并原子重命名为最终文件"""
+        commit_artifact(part_path, filename)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        print(f"\n下载完成: {filename}")
+    
+    def _parse_content_range(self, content_range):
+        """解析 Content-Range 头，返回 (起始偏移, 文件总大小)"""
+        match = re.match(r'bytes\s+(\d+)-\d+/(\d+|\*)', content_range or '')
+        if not match:
+            return None, 0
+        total = match.group(2)
+        return int(match.group(1)), int(total) if total != '*' else 0
+    
+    def _hedged_get(self, urls, headers, timeout=None):
+        """对同一文件的多个镜像发起对冲请求，返回 (response, url)
+
+        先请求排名第一的镜像；超过 hedge_delay 秒仍未收到响应头时再请求下一个镜像，
+        采用最先成功响应的那个，其余请求返回后直接关闭连接。
+        hedge_delay 为 0 时不并发，只在镜像出错时按顺序切换到下一个。
+        每个镜像的首字节延迟和失败都会记录到 mirror_stats。
+        """
+        if timeout is None:
+            timeout = self._stream_timeout()
+        if self.mirror_stats is not None and len(urls) > 1:
+            urls = self.mirror_stats.rank(urls)
+        
+        if len(urls) == 1:
+            started = time.monotonic()
+            try:
+                response = self.session.get(urls[0], headers=headers, stream=True, timeout=timeout)
+            except Exception:
+                if self.mirror_stats is not None:
+                    self.mirror_stats.record_failure(urls[0])
+                raise
+            self._record_first_byte(urls[0], time.monotonic() - started)
+            return response, urls[0]
+        
+        results = queue.Queue()
+        
+        def fetch(url):
+            started = time.monotonic()
+            try:
+                response = self.session.get(url, headers=headers, stream=True, timeout=timeout)
+            except Exception as e:
+                results.put((url, None, e, 0))
+                return
+            results.put((url, response, None, time.monotonic() - started))
+        
+        launched = 0
+        pending = 0
+        last_error = None
+        last_response = None
+        winner = None
+        while launched < len(urls) or pending:
+            if pending == 0 or (launched < len(urls) and last_error is not None):
+                # 还没有在途请求，或上一个镜像已失败，立即请求下一个镜像
+                threading.Thread(target=fetch, args=(urls[launched],), daemon=True).start()
+                launched += 1
+                pending += 1
+                last_error = None
             
-            with open(filename, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        
-                        # 显示下载进度
-                        if total_size > 0:
-                            progress = (downloaded_size / total_size) * 100
-                            print(f"\r下载进度: {progress:.1f}% ({downloaded_size}/{total_size} bytes)", end='', flush=True)
+            try:
+                url, response, error, elapsed = results.get(
+                    timeout=self.hedge_delay if self.hedge_delay and launched < len(urls) else None
+                )
+            except queue.Empty:
+                print(f"镜像 {mirror_host(urls[launched - 1])} 超过 {self.hedge_delay}s 未响应，同时请求下一个镜像")
+                threading.Thread(target=fetch, args=(urls[launched],), daemon=True).start()
+                launched += 1
+                pending += 1
+                continue
             
-            print(f"\n下载完成: {filename}")
-            return True
+            pending -= 1
+            if error is None and (response.status_code < 400 or response.status_code == 416):
+                self._record_first_byte(url, elapsed)
+                winner = (response, url)
+                break
+            
+            if self.mirror_stats is not None:
+                self.mirror_stats.record_failure(url)
+            if response is not None:
+                if last_response is not None:
+                    last_response[0].close()
+                last_response = (response, url)
+                last_error = IOError(f"镜像 {mirror_host(url)} 返回状态码 {response.status_code}")
+            else:
+                last_error = error
+            print(f"镜像 {mirror_host(url)} 请求失败: {last_error}")
+        
+        if pending:
+            # 取消落后的请求：它们返回后直接关闭连接
+            def close_remaining(count):
+                for _ in range(count):
+                    _, response, _, _ = results.get()
+                    if response is not None:
+                        response.close()
+            threading.Thread(target=close_remaining, args=(pending,), daemon=True).start()
+        
+        if winner is not None:
+            if last_response is not None:
+                last_response[0].close()
+            if winner[1] != urls[0]:
+                print(f"使用响应更快的镜像: {mirror_host(winner[1])}")
+            return winner
+        if last_response is not None:
+            # 所有镜像都返回错误状态码，交给调用方按状态码处理
+            return last_response
+        raise last_error
+    
+    def _print_progress(self, downloaded_size, total_size):
+        if self.show_progress and total_size > 0:
+            progress = (downloaded_size / total_size) * 100
+            print(f"\r下载进度: {progress:.1f}% ({downloaded_size}/{total_size} bytes)", end='', flush=True)
+    
+    def _progress_reporter(self, total_size):
+        """返回按时间节流的进度上报函数 report(已下载字节数, final=False)"""
+        callback = self.progress_callback or self._print_progress
+        last_reported = [float('-inf')]
+        
+        def report(downloaded_size, final=False):
+            now = time.monotonic()
+            if final or now - last_reported[0] >= self.progress_interval:
+                last_reported[0] = now
+                callback(downloaded_size, total_size)
+        
+        return report
+    
+    @staticmethod
+    def _raw_body_reader(response):
+        """返回可以 readinto 复用缓冲区的 urllib3 响应（response.raw），不适用时返回 None
+
+        requests 请求 urllib3 时不解码响应体，响应体经过压缩时只能回退到 iter_content 由 requests 解码。
+        """
+        raw = getattr(response, 'raw', None)
+        if raw is None or not hasattr(raw, 'readinto'):
+            return None
+        encoding = response.headers.get('content-encoding', 'identity').lower()
+        if encoding not in ('', 'identity'):
+            return None
+        return raw
+    
+    def _copy_body(self, response, write, on_chunk, chunk_size=None, limit=None):
+        """把响应体写入 write，每写一块调用 on_chunk(字节数)，返回写入的总字节数
+
+        未压缩时经 response.raw.readinto 读入复用的 bytearray，经 memoryview 切片写出；
+        读完后由 urllib3 自己校验长度并把连接归还连接池。块大小在
+        MIN_READ_SIZE 与 MAX_READ_SIZE 之间按读取耗时自适应；指定 chunk_size 时固定块大小。
+        limit 为最多写入的字节数。
+        """
+        copied = 0
+        fp = self._raw_body_reader(response)
+        if fp is None:
+            for chunk in response.iter_content(chunk_size=chunk_size or MIN_READ_SIZE):
+                if not chunk:
+                    continue
+                if limit is not None:
+                    chunk = chunk[:limit - copied]
+                write(chunk)
+                copied += len(chunk)
+                on_chunk(len(chunk))
+                if limit is not None and copied >= limit:
+                    break
+            return copied
+        
+        read_size = chunk_size or MIN_READ_SIZE
+        buffer = bytearray(chunk_size or MAX_READ_SIZE)
+        view = memoryview(buffer)
+        while limit is None or copied < limit:
+            wanted = read_size if limit is None else min(read_size, limit - copied)
+            started = time.monotonic()
+            size = fp.readinto(view[:wanted])
+            if not size:
+                break
+            elapsed = time.monotonic() - started
+            write(view[:size])
+            copied += size
+            on_chunk(size)
             
+            if not chunk_size:
+                if size == wanted and elapsed < FAST_READ_SECONDS:
+                    read_size = min(read_size * 2, MAX_READ_SIZE)
+                elif elapsed > SLOW_READ_SECONDS:
+                    read_size = max(read_size // 2, MIN_READ_SIZE)
+        return copied
+    
+    @staticmethod
+    def _mirror_candidates(video_url, mirror_urls):
+        """把主地址和镜像地址合并为去重后的候选列表，主地址在前"""
+        urls = [video_url]
+        for url in mirror_urls or []:
+            if url and url not in urls:
+                urls.append(url)
+        return urls
+    
+    def _stream_timeout(self):
+        """视频流请求的 (connect, read) 超时；read 是两次收到数据之间的最长间隔"""
+        return self.cdn_timeouts.timeout(expected_bytes=MIN_READ_SIZE)
+    
+    def _record_first_byte(self, url, seconds):
+        self.cdn_timeouts.observe_latency(seconds)
+        if self.mirror_stats is not None:
+            self.mirror_stats.record_first_byte(url, seconds)
+    
+    def _record_transfer(self, url, size, started):
+        seconds = time.monotonic() - started
+        self.cdn_timeouts.observe_transfer(size, seconds)
+        if self.mirror_stats is not None:
+            self.mirror_stats.record_transfer(url, size, seconds)
+    
+    def _open_download_stream(self, urls, part_path, state_path):
+        """打开下载响应，能续传时发送 Range 请求
+
+        返回 (response, 起始偏移, 文件总大小, 实际使用的镜像地址)
+        """
+        offset, saved_total = self._load_part_state(part_path, state_path)
+        
+        if offset > 0 and saved_total and offset >= saved_total:
+            # 上次已经下载完整，只差重命名
+            return None, offset, saved_total, urls[0]
+        
+        headers = {'Accept-Encoding': 'identity'}
+        if offset > 0:
+            headers['Range'] = f'bytes={offset}-'
+            print(f"检测到未完成的下载，从 {offset} 字节处继续")
+        
+        response, video_url = self._hedged_get(urls, headers)
+        
+        if offset > 0 and response.status_code == 206:
+            start, total_size = self._parse_content_range(response.headers.get('content-range'))
+            if start == offset and (not saved_total or total_size == saved_total):
+                return response, offset, total_size or saved_total, video_url
+            print("服务器返回的分段与本地记录不一致，重新下载")
+        elif offset > 0:
+            print(f"服务器不支持断点续传 (状态码: {response.status_code})，重新下载")
+        
+        if offset > 0:
+            # 续传失败，丢弃本地分段后重新完整下载
+            response.close()
+            self._clear_part_files(part_path, state_path)
+            response = self.session.get(
+                video_url, headers={'Accept-Encoding': 'identity'}, stream=True, timeout=self._stream_timeout()
+            )
+        
+        response.raise_for_status()
+        total_size = int(response.headers.get('content-length', 0))
+        return response, 0, total_size, video_url
+    
+    def _probe_range_support(self, urls):
+        """探测服务器是否支持 Range 分段请求
+
+        返回 (文件总大小, 实际使用的镜像地址)，不支持时文件总大小为 0
+        """
+        try:
+            response, video_url = self._hedged_get(
+                urls,
+                {'Accept-Encoding': 'identity', 'Range': 'bytes=0-0'}
+            )
         except Exception as e:
-            print(f"\n下载视频时出错: {e}")
+            print(f"探测分段下载支持失败: {e}")
+            return 0, urls[0]
+        
+        try:
+            if response.status_code == 206:
+                _, total_size = self._parse_content_range(response.headers.get('content-range'))
+                return total_size, video_url
+            if response.status_code == 200 and response.headers.get('accept-ranges', '').lower() == 'bytes':
+                return int(response.headers.get('content-length', 0)), video_url
+            return 0, video_url
+        finally:
+            response.close()
+    
+    def _ensure_connection_pool(self, connections):
+        """并发连接数超过 requests 默认连接池大小时扩容，避免连接被反复丢弃重建"""
+        if self.host_connection_limit or connections <= DEFAULT_POOLSIZE:
+            # 已经按主机限制了连接数时保持原连接池，超出上限的请求排队等待
+            return
+        self._mount_adapter(self._new_adapter(pool_connections=connections, pool_maxsize=connections))
+    
+    def limit_host_connections(self, limit):
+        """限制共享会话对每个主机的并发连接数
+
+        urllib3 为每个主机维护独立的连接池，pool_block=True 时连接用尽的请求会等待空闲连接，
+        而不是临时新建连接。
+        """
+        self.host_connection_limit = limit
+        self._mount_adapter(
+            self._new_adapter(pool_connections=max(DEFAULT_POOLSIZE, limit), pool_maxsize=limit, pool_block=True)
+        )
+    
+    def _new_adapter(self, **kwargs):
+        """创建连接池适配器，配置了出口池时每个请求经由出口池选择代理"""
+        if self.proxy_pool is not None:
+            return ProxyPoolAdapter(self.proxy_pool, **kwargs)
+        return HTTPAdapter(**kwargs)
+    
+    def _mount_adapter(self, adapter):
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def _plan_segments(self, total_size, connections, prefix=0):
+        """把文件切成 N 个字节区间，开头 prefix 字节视为已完成"""
+        segment_size = -(-total_size // connections)
+        segments = []
+        for start in range(0, total_size, segment_size):
+            end = min(start + segment_size, total_size) - 1
+            done = min(max(prefix - start, 0), end - start + 1)
+            segments.append({'start': start, 'end': end, 'done': done})
+        return segments
+    
+    def _contiguous_prefix(self, segments):
+        """计算从文件开头起连续下载完成的字节数"""
+        prefix = 0
+        for segment in sorted(segments, key=lambda item: item['start']):
+            if segment['start'] != prefix:
+                break
+            prefix += segment['done']
+            if segment['done'] < segment['end'] - segment['start'] + 1:
+                break
+        return prefix
+    
+    def _load_segment_state(self, part_path, state_path, total_size, connections):
+        """读取分段续传状态，没有可用状态时重新规划分段"""
+        state = self._read_part_state(part_path, state_path)
+        try:
+            if state is not None and int(state.get('total_size', 0)) == total_size:
+                segments = state.get('segments')
+                if segments:
+                    segments = [
+                        {'start': int(item['start']), 'end': int(item['end']), 'done': int(item['done'])}
+                        for item in segments
+                    ]
+                    print(f"检测到未完成的分段下载，已完成 {sum(item['done'] for item in segments)} 字节")
+                    return segments
+                # 单连接下载留下的 .part 文件，开头部分可以直接复用
+                prefix = min(os.path.getsize(part_path), total_size)
+                print(f"检测到未完成的下载，复用开头 {prefix} 字节")
+                return self._plan_segments(total_size, connections, prefix)
+        except (OSError, ValueError, TypeError, KeyError):
+            pass
+        
+        self._clear_part_files(part_path, state_path)
+        return self._plan_segments(total_size, connections)
+    
+    def _download_segmented(self, video_url, filename, part_path, state_path, total_size, connections,
+                            chunk_size, max_retries, state_interval):
+        """多连接分段下载：每个分段用独立的 Range 请求并发拉取，写入预分配文件的对应偏移"""
+        segments = self._load_segment_state(part_path, state_path, total_size, connections)
+        print(f"使用 {len(segments)} 个连接分段下载，文件大小: {total_size} bytes")
+        
+        # 预分配完整大小，各分段直接写到自己的偏移位置
+        with open(part_path, 'r+b' if os.path.exists(part_path) else 'wb') as f:
+            f.truncate(total_size)
+        
+        self._ensure_connection_pool(connections)
+        started = time.monotonic()
+        lock = threading.Lock()
+        resumed_size = sum(segment['done'] for segment in segments)
+        progress = {
+            'downloaded': resumed_size,
+            'unsaved': 0,
+        }
+        self._save_part_state(state_path, video_url, progress['downloaded'], total_size, segments)
+        report = self._progress_reporter(total_size)
+        
+        def fetch_segment(segment):
+            for attempt in range(1, max_retries + 1):
+                position = segment['start'] + segment['done']
+                if position > segment['end']:
+                    return True
+                try:
+                    response = self.session.get(
+                        video_url,
+                        headers={'Accept-Encoding': 'identity', 'Range': f"bytes={position}-{segment['end']}"},
+                        stream=True,
+                        timeout=self._stream_timeout()
+                    )
+                    try:
+                        if response.status_code != 206:
+                            raise IOError(f"分段请求未返回 206 (状态码: {response.status_code})")
+                        
+                        def on_chunk(size):
+                            with lock:
+                                segment['done'] += size
+                                progress['downloaded'] += size
+                                progress['unsaved'] += size
+                                if progress['unsaved'] >= state_interval:
+                                    self._save_part_state(state_path, video_url, progress['downloaded'], total_size, segments)
+                                    progress['unsaved'] = 0
+                                report(progress['downloaded'])
+                        
+                        # 不使用用户态缓冲，保证记录到状态文件中的字节已经写入系统
+                        with open(part_path, 'r+b', buffering=0) as f:
+                            f.seek(position)
+                            position += self._copy_body(
+                                response, f.write, on_chunk, chunk_size, limit=segment['end'] + 1 - position
+                            )
+                    finally:
+                        response.close()
+                    
+                    if position > segment['end']:
+                        return True
+                    raise IOError(f"分段下载不完整: {position - segment['start']}/{segment['end'] - segment['start'] + 1} bytes")
+                    
+                except Exception as e:
+                    print(f"\n分段 {segment['start']}-{segment['end']} 下载出错 (第 {attempt}/{max_retries} 次): {e}")
+                    if is_connection_refused(e):
+                        # 镜像拒绝连接，重试也不会成功
+                        return False
+                    if attempt < max_retries:
+                        time.sleep(self.retry_policy.backoff(attempt - 1))
             return False
+        
+        with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+            results = list(executor.map(fetch_segment, segments))
+        report(progress['downloaded'], final=True)
+        
+        self._record_transfer(video_url, progress['downloaded'] - resumed_size, started)
+        self._save_part_state(state_path, video_url, progress['downloaded'], total_size, segments)
+        if all(results):
+            self._finish_part_file(part_path, state_path, filename)
+            return True
+        
+        print(f"已保留未完成的分段下载，重新运行可继续: {part_path}")
+        return False
+    
+    def download_video(self, video_url, filename, chunk_size=None, max_retries=3, state_interval=8 * 1024 * 1024,
+                       connections=1, mirror_urls=None):
+        """下载视频文件
+
+        数据先写入 `<filename>.part`，偏移量记录在 `<filename>.part.json`。
+        响应体读入复用的缓冲区后经大缓冲文件句柄写出，chunk_size 为空时读取块大小自适应。
+        连接中断后重试或重新运行时通过 Range 请求续传，
+        校验大小与 content-length 一致后再原子重命名为最终文件。
+        connections 大于 1 且服务器支持 Range 时按字节区间多连接并发下载。
+        mirror_urls 为同一文件的其他 CDN 镜像地址，按历史表现排序后对冲请求。
+        """
+        part_path = f"{filename}.part"
+        state_path = f"{part_path}.json"
+        urls = self._mirror_candidates(video_url, mirror_urls)
+        print(f"开始下载视频: {filename}")
+        
+        if connections > 1:
+            total_size, video_url = self._probe_range_support(urls)
+            if total_size > 0:
+                return self._download_segmented(
+                    video_url, filename, part_path, state_path, total_size,
+                    connections, chunk_size, max_retries, state_interval
+                )
+            print("服务器未声明支持 Accept-Ranges，回退为单连接下载")
+        
+        for attempt in range(1, max_retries + 1):
+            try:
+                response, downloaded_size, total_size, video_url = self._open_download_stream(urls, part_path, state_path)
+                
+                if response is not None:
+                    started = time.monotonic()
+                    resumed_size = downloaded_size
+                    self._save_part_state(state_path, video_url, downloaded_size, total_size)
+                    report = self._progress_reporter(total_size)
+                    progress = {'downloaded': downloaded_size, 'unsaved': 0}
+                    mode = 'ab' if downloaded_size > 0 else 'wb'
+                    try:
+                        with open(part_path, mode, buffering=WRITE_BUFFER_SIZE) as f:
+                            def on_chunk(size):
+                                progress['downloaded'] += size
+                                progress['unsaved'] += size
+                                if progress['unsaved'] >= state_interval:
+                                    f.flush()
+                                    self._save_part_state(state_path, video_url, progress['downloaded'], total_size)
+                                    progress['unsaved'] = 0
+                                # 显示下载进度
+                                report(progress['downloaded'])
+                            
+                            self._copy_body(response, f.write, on_chunk, chunk_size)
+                    finally:
+                        downloaded_size = progress['downloaded']
+                        response.close()
+                        report(downloaded_size, final=True)
+                        self._save_part_state(state_path, video_url, downloaded_size, total_size)
+                        self._record_transfer(video_url, downloaded_size - resumed_size, started)
+                
+                if total_size > 0 and downloaded_size != total_size:
+                    raise IOError(f"下载不完整: {downloaded_size}/{total_size} bytes")
+                
+                self._finish_part_file(part_path, state_path, filename)
+                return True
+                
+            except Exception as e:
+                print(f"\n下载视频时出错 (第 {attempt}/{max_retries} 次): {e}")
+                if is_connection_refused(e):
+                    break
+                if attempt < max_retries:
+                    time.sleep(self.retry_policy.backoff(attempt - 1))
+        
+        print(f"已保留未完成的下载，重新运行可继续: {part_path}")
+        return False
     
+    def download_audio(self, video_url, filename, chunk_size=None, mirror_urls=None):
+        """边下载边提取音频
 
+        把响应体直接通过管道送入 `ffmpeg -i pipe:0 -vn`，只落盘 16kHz 单声道 MP3，
+        下载与音频提取同时进行，不再写出完整的 MP4。
+        moov 位于文件末尾的 MP4 无法从管道解析，此时返回 False，由调用方回退到普通下载。
+        """
+        temp_path = f"{filename}.part"
+        cmd = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-vn",  # 不包含视频
+            "-acodec", "libmp3lame",  # 使用MP3编码器
+            "-ar", "16000",  # 采样率16kHz
+            "-ac", "1",  # 单声道
+            "-q:a", "2",  # 音频质量
+            "-f", "mp3",
+            "-y", temp_path
+        ]
+        print(f"开始流式下载音频: {filename}")
+        
+        try:
+            response, video_url = self._hedged_get(
+                self._mirror_candidates(video_url, mirror_urls),
+                {'Accept-Encoding': 'identity'}
+            )
+            response.raise_for_status()
+        except Exception as e:
+            print(f"流式下载请求失败: {e}")
+            return False
+        
+        total_size = int(response.headers.get('content-length', 0))
+        progress = {'downloaded': 0}
+        report = self._progress_reporter(total_size)
+        started = time.monotonic()
+        
+        def on_chunk(size):
+            progress['downloaded'] += size
+            report(progress['downloaded'])
+        
+        # ffmpeg 的错误输出写入临时文件，避免管道写满导致死锁
+        with tempfile.TemporaryFile() as stderr_file:
+            try:
+                process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr_file)
+            except FileNotFoundError:
+                response.close()
+                print("未找到 ffmpeg，无法流式提取音频")
+                return False
+            
+            try:
+                self._copy_body(response, process.stdin.write, on_chunk, chunk_size)
+            except BrokenPipeError:
+                print("\nffmpeg 提前退出")
+            except Exception as e:
+                print(f"\n流式下载出错: {e}")
+            finally:
+                response.close()
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+            
+            downloaded_size = progress['downloaded']
+            report(downloaded_size, final=True)
+            self._record_transfer(video_url, downloaded_size, started)
+            returncode = process.wait()
+            stderr_file.seek(0)
+            stderr_output = stderr_file.read().decode('utf-8', errors='replace').strip()
+        
+        if returncode != 0 or (total_size > 0 and downloaded_size != total_size):
+            print(f"\n流式提取音频失败 (ffmpeg 返回码: {returncode}, 已接收 {downloaded_size}/{total_size} bytes)")
+            if stderr_output:
+                print(f"错误: {stderr_output}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+        
+        commit_artifact(temp_path, filename)
+        print(f"\n音频提取完成: {filename}")
+        return True
     
     def sanitize_filename(self, filename):
         """清理文件名"""
@@ -311,21 +1292,35 @@ class SimpleDouyinDownloader:
         
         return filename
     
-    def download_by_url(self, url, output_dir="downloads", custom_name=None):
-        """根据URL下载视频"""
+    def download_by_url(self, url, output_dir="downloads", custom_name=None, connections=1, audio_only=False):
+        """根据URL下载视频，成功时返回保存的文件路径，失败时返回 None
+
+        audio_only 为 True 时边下载边用 ffmpeg 提取 MP3，失败时回退为下载 MP4。
+        制品库中已有该视频时不再请求视频信息，直接把已有文件放到 output_dir 并返回其路径。
+        """
         print(f"正在处理URL: {url}")
         
         # 提取视频ID
         video_id = self.extract_video_id(url)
         if not video_id:
             print("无法提取视频ID，请检查URL格式")
-            return False
+            return None
+        
+        # 短链和完整链接可能指向同一个视频，同一视频同时只允许一个线程下载，
+        # 否则会写同一个 .part/.part.json；后到的线程等前一个结束后直接命中制品库
+        with _video_lock(video_id):
+            return self._download_video_id(video_id, output_dir, custom_name, connections, audio_only)
+    
+    def _download_video_id(self, video_id, output_dir, custom_name, connections, audio_only):
+        stored_path = self._reuse_stored_artifact(video_id, output_dir, custom_name, audio_only)
+        if stored_path:
+            return stored_path
         
         # 获取视频信息
         video_info = self.get_video_info(video_id)
         if not video_info or not video_info['video_url']:
             print("无法获取视频信息或视频URL")
-            return False
+            return None
         
         print(f"视频标题: {video_info['title']}")
         print(f"作者: {video_info['author']}")
@@ -347,28 +1342,216 @@ class SimpleDouyinDownloader:
         
         filepath = os.path.join(output_dir, filename)
         
+        saved_path = self._download_file(video_info, filepath, connections, audio_only)
+        if not saved_path and video_info.get('from_cache'):
+            # 缓存中的签名地址可能已提前失效，重新获取一次
+            print("⚠️ 缓存的视频地址可能已失效，重新获取视频信息后重试")
+            self.cache.invalidate_video(video_id)
+            video_info = self.get_video_info(video_id)
+            if video_info and video_info['video_url']:
+                saved_path = self._download_file(video_info, filepath, connections, audio_only)
+        
+        if not saved_path:
+            print("❌ 视频下载失败")
+            return None
+        
+        if self.store is not None:
+            if saved_path.endswith('.mp3'):
+                kind = 'audio'
+            else:
+                kind = 'low_bitrate_video' if self.prefer_low_bitrate else 'video'
+            artifact = self.store.add(video_id, kind, saved_path)
+            duplicates = [other for other in self.store.find_by_hash(artifact['sha256']) if other != video_id]
+            if duplicates:
+                print(f"♻️ 内容与已下载的视频 {', '.join(duplicates)} 完全相同，制品库只保留一份")
+        return saved_path
+    
+    def _reuse_stored_artifact(self, video_id, output_dir, custom_name, audio_only):
+        """制品库命中时把已有文件链接到 output_dir，返回其路径；未命中返回 None"""
+        if self.store is None:
+            return None
+        
+        # 只需要音频时任何版本都能用，后续步骤会自行提取音频；要求低码率时默认版本也能用；
+        # 默认下载只复用默认版本，不会拿到低码率视频
+        if audio_only:
+            kinds = ('audio', 'low_bitrate_video', 'video')
+        elif self.prefer_low_bitrate:
+            kinds = ('low_bitrate_video', 'video')
+        else:
+            kinds = ('video',)
+        for kind in kinds:
+            artifact = self.store.lookup(video_id, kind)
+            if artifact is None:
+                continue
+            
+            suffix = os.path.splitext(artifact['filename'])[1]
+            if custom_name:
+                filename = f"{self.sanitize_filename(custom_name)}{suffix}"
+            else:
+                filename = artifact['filename']
+            filepath = os.path.join(output_dir, filename)
+            link_or_copy(artifact['path'], filepath)
+            print(f"✅ 制品库中已有该视频，跳过下载: {filepath}")
+            return filepath
+        return None
+    
+    def _download_file(self, video_info, filepath, connections, audio_only):
+        """按下载模式把视频或音频保存到 filepath 附近，返回实际保存的路径"""
+        if audio_only:
+            audio_path = os.path.splitext(filepath)[0] + ".mp3"
+            print("🎵 开始流式下载并提取音频...")
+            if self.download_audio(video_info['video_url'], audio_path, mirror_urls=video_info.get('video_urls')):
+                print(f"✅ 音频已保存到: {audio_path}")
+                return audio_path
+            print("⚠️ 流式提取音频失败，回退为下载完整视频")
+        
         # 下载视频
         print("📥 开始下载视频...")
-        success = self.download_video(video_info['video_url'], filepath)
+        success = self.download_video(
+            video_info['video_url'], filepath, connections=connections, mirror_urls=video_info.get('video_urls')
+        )
         
-        if success:
-            print(f"✅ 视频已保存到: {filepath}")
-            return True
-        else:
-            print("❌ 视频下载失败")
-            return False
+        if not success:
+            return None
+        print(f"✅ 视频已保存到: {filepath}")
+        return filepath
+    
+    def download_many(self, urls, output_dir="downloads", max_workers=4, connections=1, audio_only=False,
+                      per_host_connections=8):
+        """用固定大小的线程池并发下载多个视频，所有线程共享同一个连接池
+
+        per_host_connections 限制对同一主机（短链服务、接口、每个 CDN 节点）的并发连接数。
+        返回与去重后的 urls 顺序一致的结果列表，并打印成功、失败与吞吐汇总表。
+        """
+        urls = list(dict.fromkeys(url for url in urls if url))
+        if not urls:
+            print("没有需要下载的链接")
+            return []
+        
+        if per_host_connections:
+            self.limit_host_connections(per_host_connections)
+        show_progress = self.show_progress
+        self.show_progress = False
+        
+        def download_one(url):
+            started = time.monotonic()
+            error = None
+            try:
+                path = self.download_by_url(url, output_dir, connections=connections, audio_only=audio_only)
+            except Exception as e:
+                # 单个视频出错不影响批次中的其他视频
+                path = None
+                error = str(e)
+                print(f"❌ 处理 {url} 时出错: {e}")
+            return {
+                'url': url,
+                'path': path,
+                'size': os.path.getsize(path) if path else 0,
+                'seconds': time.monotonic() - started,
+                'error': error,
+            }
+        
+        started = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as executor:
+                results = list(executor.map(download_one, urls))
+        finally:
+            self.show_progress = show_progress
+        
+        print(format_download_summary(results, time.monotonic() - started))
+        if self.proxy_pool is not None:
+            print("🌐 出口健康状况")
+            for line in self.proxy_pool.summary_lines():
+                print(f"   {line}")
+        return results
+
+_PIPELINE_STORES = {}
+_PIPELINE_STORES_LOCK = threading.Lock()
+_VIDEO_LOCKS = {}
+_VIDEO_LOCKS_LOCK = threading.Lock()
+
+def _video_lock(video_id):
+    """同一进程内每个 video_id 一把锁，所有下载器实例共用"""
+    with _VIDEO_LOCKS_LOCK:
+        return _VIDEO_LOCKS.setdefault(video_id, threading.Lock())
+
+def _pipeline_stores():
+    """download_url 共用的元数据缓存、镜像统计、制品库和代理池
+
+    同一进程内只创建一次：多个线程同时下载时共享带锁的实例，不会各自改写同一个状态文件。
+    """
+    with _PIPELINE_STORES_LOCK:
+        if not _PIPELINE_STORES:
+            _PIPELINE_STORES.update(
+                cache=VideoMetadataCache(DEFAULT_CACHE_FILE),
+                mirror_stats=MirrorStatsStore(DEFAULT_STATS_FILE),
+                store=DownloadArtifactStore(DEFAULT_STORE_DIR),
+                proxy_pool=ProxyPool.from_env(),
+            )
+        return _PIPELINE_STORES
+
+def download_url(url, output_dir='downloads', name=None, connections=1, audio_only=False, lowest_bitrate=False,
+                 use_store=True):
+    """流水线阶段：按命令行的默认配置下载单个视频
+
+    使用默认位置的元数据缓存、镜像统计和制品库（use_store 为 False 时不查询制品库，总是重新下载），
+    出口代理读取 DOUYIN_PROXIES。可以在多个线程中同时调用。
+    返回保存的文件路径（audio_only 时可能是 MP3，也可能回退为 MP4），失败时返回 None。
+    """
+    stores = _pipeline_stores()
+    downloader = SimpleDouyinDownloader(
+        prefer_low_bitrate=lowest_bitrate or audio_only,
+        cache=stores['cache'],
+        mirror_stats=stores['mirror_stats'],
+        store=stores['store'] if use_store else None,
+        proxy_pool=stores['proxy_pool'],
+    )
+    return downloader.download_by_url(url, output_dir, name, max(1, connections), audio_only)
 
 def main():
     parser = argparse.ArgumentParser(description='简化版抖音视频下载器')
     parser.add_argument('--url', '-u', help='抖音视频链接')
     parser.add_argument('-o', '--output', default='downloads', help='输出目录 (默认: downloads)')
     parser.add_argument('-n', '--name', help='指定下载文件名 (不包含扩展名)')
+    parser.add_argument('--url-file', help='批量下载：每行一个链接的文本文件，传 - 时从标准输入读取')
+    parser.add_argument('-j', '--workers', type=int, default=4, help='批量下载的并发视频数 (默认: 4)')
+    parser.add_argument('--per-host-connections', type=int, default=8,
+                        help='批量下载时对每个主机的最大并发连接数 (默认: 8)')
+    parser.add_argument('-c', '--connections', type=int, default=1,
+                        help='分段下载的并发连接数，服务器不支持Range时自动回退为单连接 (默认: 1)')
+    parser.add_argument('--audio-only', action='store_true',
+                        help='边下载边用ffmpeg提取16kHz单声道MP3，不落盘MP4')
+    parser.add_argument('--lowest-bitrate', action='store_true',
+                        help='只需要音频时选择码率最低的版本下载 (--audio-only 时自动启用)')
+    parser.add_argument('--cache-file', default=str(DEFAULT_CACHE_FILE),
+                        help=f'视频元数据缓存文件 (默认: {DEFAULT_CACHE_FILE})')
+    parser.add_argument('--no-cache', action='store_true', help='不读写视频元数据缓存和镜像统计')
+    parser.add_argument('--store-dir', default=str(DEFAULT_STORE_DIR),
+                        help=f'按内容哈希保存已下载文件的制品库目录 (默认: {DEFAULT_STORE_DIR})')
+    parser.add_argument('--no-store', action='store_true', help='不查询也不写入制品库，总是重新下载')
+    parser.add_argument('--proxy', action='append', default=[],
+                        help='出口代理，可重复指定，direct 表示本机出口；也可用 DOUYIN_PROXIES 环境变量配置')
+    parser.add_argument('--hedge-delay', type=float, default=0,
+                        help='首选镜像超过该秒数未响应时并发请求下一个镜像，0 表示不对冲 (默认: 0)')
+    parser.add_argument('--mirror-stats-file', default=str(DEFAULT_STATS_FILE),
+                        help=f'CDN 镜像延迟与吞吐统计文件 (默认: {DEFAULT_STATS_FILE})')
     
     args = parser.parse_args()
     
+    urls = None
+    if args.url_file:
+        if args.url_file == '-':
+            urls = read_url_list(sys.stdin)
+        else:
+            with open(args.url_file, 'r', encoding='utf-8') as f:
+                urls = read_url_list(f)
+        if not urls:
+            print(f"没有从 {args.url_file} 读取到任何链接")
+            sys.exit(1)
+    
     url = args.url or os.environ.get('DOUYIN_URL')
     
-    if not url:
+    if not url and urls is None:
         print("请提供抖音视频链接")
         print("使用方法:")
         print("1. 命令行参数: python douyin_download.py --url 'https://v.douyin.com/xxx/'")
@@ -378,8 +1561,17 @@ def main():
         print("  -u, --url URL       抖音视频链接")
         print("  -o, --output DIR    指定输出目录 (默认: downloads)")
         print("  -n, --name NAME     指定下载文件名 (不包含扩展名)")
+        print("  --url-file FILE     批量下载文件中的所有链接，- 表示标准输入")
+        print("  -j, --workers N     批量下载的并发视频数 (默认: 4)")
+        print("  -c, --connections N 分段下载的并发连接数 (默认: 1)")
+        print("  --audio-only        边下载边提取MP3音频，不保存MP4")
+        print("  --lowest-bitrate    选择码率最低的版本下载")
+        print("  --hedge-delay SEC   首选镜像响应慢时并发请求备用镜像")
+        print("  --no-cache          不使用视频元数据缓存")
+        print("  --no-store          不复用制品库中已下载的文件")
         print("\n示例:")
         print("  python douyin_download.py --url '链接' -o my_videos -n 我的视频")
+        print("  cat urls.txt | python douyin_download.py --url-file - -j 4")
         
         try:
             url = input("请输入抖音视频链接: ").strip()
@@ -391,8 +1583,34 @@ def main():
             return
     
     # 创建下载器实例并下载
-    downloader = SimpleDouyinDownloader()
-    success = downloader.download_by_url(url, args.output, args.name)
+    cache = None if args.no_cache else VideoMetadataCache(args.cache_file)
+    mirror_stats = None if args.no_cache else MirrorStatsStore(args.mirror_stats_file)
+    downloader = SimpleDouyinDownloader(
+        prefer_low_bitrate=args.lowest_bitrate or args.audio_only,
+        cache=cache,
+        mirror_stats=mirror_stats,
+        hedge_delay=max(0, args.hedge_delay),
+        store=None if args.no_store else DownloadArtifactStore(args.store_dir),
+        proxy_pool=ProxyPool.from_env(args.proxy),
+    )
+    
+    if urls is not None:
+        results = downloader.download_many(
+            urls,
+            args.output,
+            max_workers=max(1, args.workers),
+            connections=max(1, args.connections),
+            audio_only=args.audio_only,
+            per_host_connections=max(1, args.per_host_connections),
+        )
+        if all(result['path'] for result in results):
+            print("批量下载任务完成！")
+        else:
+            print("部分视频下载失败！")
+            sys.exit(1)
+        return
+    
+    success = downloader.download_by_url(url, args.output, args.name, max(1, args.connections), args.audio_only)
     
     if success:
         print("下载任务完成！")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""抖音 CDN 镜像的延迟与吞吐统计。"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+from scripts.pipeline_artifacts import temp_artifact_path
+
+
+DEFAULT_STATS_FILE = Path("data/douyin_mirror_stats.json")
+# 指数滑动平均中新样本的权重
+EWMA_ALPHA = 0.3
+# 失败一次按多少秒的首字节延迟计入评分
+FAILURE_PENALTY_SECONDS = 5.0
+# 评分时假定的下载量，用于把吞吐折算成耗时
+REFERENCE_TRANSFER_BYTES = 20 * 1024 * 1024
+
+
+def mirror_host(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+class MirrorStatsStore:
+    """按 CDN 主机记录首字节延迟、吞吐和失败次数，并据此给镜像排序。
+
+    签名地址会过期，但同一批边缘节点的主机名是稳定的，因此按主机而不是完整 URL 统计。
+    """
+
+    def __init__(self, store_path: str | Path = DEFAULT_STATS_FILE, clock: Callable[[], float] = time.time):
+        self.store_path = Path(store_path)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def record_first_byte(self, url: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._entry(url)
+            entry["ttfb_seconds"] = self._ewma(entry.get("ttfb_seconds"), seconds)
+            entry["requests"] += 1
+            self._save()
+
+    def record_transfer(self, url: str, size: int, seconds: float) -> None:
+        if size <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            entry = self._entry(url)
+            entry["bytes_per_second"] = self._ewma(entry.get("bytes_per_second"), size / seconds)
+            self._save()
+
+    def record_failure(self, url: str) -> None:
+        with self._lock:
+            entry = self._entry(url)
+            entry["requests"] += 1
+            entry["failures"] += 1
+            self._save()
+
+    def score(self, url: str) -> float | None:
+        """估计从该镜像下载参考大小文件的秒数，越小越好；没有统计时返回 None。"""
+        entry = self._data["hosts"].get(mirror_host(url))
+        if entry is None or not entry.get("requests"):
+            return None
+        score = entry.get("ttfb_seconds") or 0.0
+        if entry.get("bytes_per_second"):
+            score += REFERENCE_TRANSFER_BYTES / entry["bytes_per_second"]
+        return score + FAILURE_PENALTY_SECONDS * entry["failures"] / entry["requests"]
+
+    def rank(self, urls: list[str]) -> list[str]:
+        """按评分从好到差排序镜像；没有统计的镜像按已知镜像的平均评分参与排序。"""
+        scores = {url: self.score(url) for url in urls}
+        known = [score for score in scores.values() if score is not None]
+        default_score = sum(known) / len(known) if known else 0.0
+        return sorted(urls, key=lambda url: default_score if scores[url] is None else scores[url])
+
+    def _entry(self, url: str) -> dict[str, Any]:
+        hosts = self._data["hosts"]
+        entry = hosts.setdefault(mirror_host(url), {"requests": 0, "failures": 0})
+        entry["updated_at"] = int(self._clock())
+        return entry
+
+    @staticmethod
+    def _ewma(previous: float | None, sample: float) -> float:
+        if previous is None:
+            return sample
+        return previous + EWMA_ALPHA * (sample - previous)
+
+    def _load(self) -> dict[str, Any]:
+        if not self.store_path.exists():
+            return self._empty_payload()
+
+        try:
+            with self.store_path.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            return self._empty_payload()
+
+        if not isinstance(payload, dict) or payload.get("version") != 1 or not isinstance(payload.get("hosts"), dict):
+            return self._empty_payload()
+        return payload
+
+    def _save(self) -> None:
+        self.store_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = temp_artifact_path(self.store_path)
+        with temp_path.open("w", encoding="utf-8") as handle:
+            json.dump(self._data, handle, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.store_path)
+
+    @staticmethod
+    def _empty_payload() -> dict[str, Any]:
+        return {"version": 1, "hosts": {}}
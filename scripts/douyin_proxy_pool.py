@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""抖音请求出口（代理）池与健康评分。"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Callable
+from urllib.parse import unquote, urlparse
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, ProxyError, Timeout
+
+
+PROXY_ENV_VAR = "DOUYIN_PROXIES"
+# 不走代理、直接用本机出口
+DIRECT_ROUTE = "direct"
+# 指数滑动平均中新样本的权重
+EWMA_ALPHA = 0.3
+# 错误率为 1 时按多少秒的延迟计入评分
+ERROR_PENALTY_SECONDS = 5.0
+# 第一次被风控后的冷却时间，连续被风控时翻倍，最长 MAX_BAN_SECONDS
+DEFAULT_BAN_SECONDS = 10 * 60
+MAX_BAN_SECONDS = 2 * 3600
+# 风控验证页只有几 KB；正常页面也会加载 acrawler 脚本，只看标记容易误判
+BAN_MARKER = "__ac_signature"
+CHALLENGE_PAGE_MAX_CHARS = 100_000
+# CDN 签名过期也会返回 403，只把 429 视为出口被限流
+BAN_STATUS_CODES = (429,)
+
+
+def parse_proxy_list(value: str) -> list[str]:
+    """解析逗号、空白或换行分隔的代理列表，`direct` 表示本机出口。"""
+    routes = []
+    for item in re.split(r"[,\s]+", value.strip()):
+        if item and item not in routes:
+            routes.append(item)
+    return routes
+
+
+def looks_like_ban(text: str) -> bool:
+    return BAN_MARKER in text and len(text) < CHALLENGE_PAGE_MAX_CHARS
+
+
+def requests_proxies(route: str) -> dict[str, str]:
+    if route == DIRECT_ROUTE:
+        return {}
+    return {"http": route, "https": route}
+
+
+def playwright_proxy(route: str | None) -> dict[str, str] | None:
+    """把代理地址转换为 Playwright `new_context(proxy=...)` 的参数。"""
+    if route is None or route == DIRECT_ROUTE:
+        return None
+    parsed = urlparse(route)
+    proxy = {"server": f"{parsed.scheme}://{route_label(route)}"}
+    if parsed.username:
+        proxy["username"] = unquote(parsed.username)
+        proxy["password"] = unquote(parsed.password or "")
+    return proxy
+
+
+def route_label(route: str) -> str:
+    """日志中使用的代理名称，隐藏账号密码。"""
+    if route == DIRECT_ROUTE:
+        return route
+    parsed = urlparse(route)
+    return f"{parsed.hostname}:{parsed.port}" if parsed.port else str(parsed.hostname)
+
+
+class ProxyPool:
+    """按近期延迟、错误率和风控信号给出口打分，每次选择最健康的一个。
+
+    评分约等于预计耗时（秒）：延迟的滑动平均按在途请求数放大，再加上错误率惩罚；
+    被风控的出口在冷却期内不参与选择，全部被风控时选冷却最先结束的那个。
+    没有统计的出口评分为 0，会被优先尝试一次。
+    """
+
+    def __init__(
+        self,
+        routes: list[str],
+        ban_seconds: float = DEFAULT_BAN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not routes:
+            raise ValueError("proxy pool needs at least one route")
+        self.routes = list(routes)
+        self.ban_seconds = ban_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stats = {
+            route: {"latency": None, "error_rate": 0.0, "in_flight": 0, "requests": 0, "bans": 0, "banned_until": 0.0}
+            for route in self.routes
+        }
+
+    @classmethod
+    def from_env(cls, extra_routes: list[str] | None = None) -> "ProxyPool | None":
+        """从 DOUYIN_PROXIES 环境变量和额外传入的代理构建出口池，都没有配置时返回 None。"""
+        routes = parse_proxy_list(os.getenv(PROXY_ENV_VAR, ""))
+        for route in extra_routes or []:
+            if route not in routes:
+                routes.append(route)
+        return cls(routes) if routes else None
+
+    def choose(self, exclude: tuple[str, ...] | list[str] = ()) -> str:
+        with self._lock:
+            candidates = [route for route in self.routes if route not in exclude] or list(self.routes)
+            now = self._clock()
+            available = [route for route in candidates if self._stats[route]["banned_until"] <= now]
+            if not available:
+                return min(candidates, key=lambda route: self._stats[route]["banned_until"])
+            return min(available, key=self._score)
+
+    def start(self, route: str) -> None:
+        with self._lock:
+            self._stats[route]["in_flight"] += 1
+
+    def record_success(self, route: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._finish(route)
+            stats["latency"] = self._ewma(stats["latency"], seconds)
+            stats["error_rate"] = self._ewma(stats["error_rate"], 0.0)
+
+    def record_failure(self, route: str) -> None:
+        with self._lock:
+            stats = self._finish(route)
+            stats["error_rate"] = self._ewma(stats["error_rate"], 1.0)
+
+    def record_ban(self, route: str) -> None:
+        with self._lock:
+            stats = self._stats[route]
+            stats["bans"] += 1
+            cooldown = min(self.ban_seconds * 2 ** (stats["bans"] - 1), MAX_BAN_SECONDS)
+            stats["banned_until"] = self._clock() + cooldown
+            stats["error_rate"] = self._ewma(stats["error_rate"], 1.0)
+        print(f"[douyin] 出口 {route_label(route)} 触发风控验证，冷却 {cooldown:.0f}s")
+
+    def is_banned(self, route: str) -> bool:
+        with self._lock:
+            return self._stats[route]["banned_until"] > self._clock()
+
+    def score(self, route: str) -> float:
+        with self._lock:
+            return self._score(route)
+
+    def summary_lines(self) -> list[str]:
+        with self._lock:
+            now = self._clock()
+            lines = []
+            for route in self.routes:
+                stats = self._stats[route]
+                latency = "-" if stats["latency"] is None else f"{stats['latency'] * 1000:.0f}ms"
+                banned = " 冷却中" if stats["banned_until"] > now else ""
+                lines.append(
+                    f"{route_label(route):<24} 请求 {stats['requests']:>4}  延迟 {latency:>7}  "
+                    f"错误率 {stats['error_rate']:.2f}  风控 {stats['bans']}{banned}"
+                )
+            return lines
+
+    def _score(self, route: str) -> float:
+        stats = self._stats[route]
+        latency = stats["latency"] or 0.0
+        return latency * (1 + stats["in_flight"]) + ERROR_PENALTY_SECONDS * stats["error_rate"]
+
+    def _finish(self, route: str) -> dict[str, Any]:
+        stats = self._stats[route]
+        stats["in_flight"] = max(0, stats["in_flight"] - 1)
+        stats["requests"] += 1
+        return stats
+
+    @staticmethod
+    def _ewma(previous: float | None, sample: float) -> float:
+        if previous is None:
+            return sample
+        return previous + EWMA_ALPHA * (sample - previous)
+
+
+class ProxyPoolAdapter(HTTPAdapter):
+    """每个请求从出口池挑选代理发送；连接失败或被限流时换下一个出口重试。"""
+
+    def __init__(self, pool: ProxyPool, max_attempts: int = 3, **kwargs: Any):
+        self.pool = pool
+        self.max_attempts = max_attempts
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        tried: list[str] = []
+        last_error: Exception | None = None
+        attempts = min(self.max_attempts, len(self.pool.routes))
+        for attempt in range(attempts):
+            route = self.pool.choose(exclude=tried)
+            tried.append(route)
+            self.pool.start(route)
+            started = time.monotonic()
+            try:
+                response = super().send(
+                    request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=requests_proxies(route)
+                )
+            except (ProxyError, ConnectionError, Timeout) as exc:
+                self.pool.record_failure(route)
+                last_error = exc
+                continue
+            except Exception:
+                self.pool.record_failure(route)
+                raise
+
+            response.proxy_route = route
+            if response.status_code in BAN_STATUS_CODES:
+                self.pool.record_failure(route)
+                self.pool.record_ban(route)
+                if attempt == attempts - 1:
+                    return response
+                response.close()
+                continue
+            self.pool.record_success(route, time.monotonic() - started)
+            return response
+
+        raise last_error
+
+
+def make_ban_hook(pool: ProxyPool) -> Callable[..., Any]:
+    """返回 requests 的 response 钩子：发现风控验证页时给出口记一次风控，并换出口重发一次。
+
+    重发的响应替换原响应交给调用方，`elapsed` 改为重发本身的耗时，超时统计不会拿到验证页的延迟。
+    """
+
+    def hook(response, *args, **kwargs):
+        route = getattr(response, "proxy_route", None)
+        if route is None or kwargs.get("stream"):
+            # 视频流不读取响应体
+            return None
+        content_type = response.headers.get("content-type", "")
+        if content_type and "html" not in content_type and "json" not in content_type and "text" not in content_type:
+            return None
+        if not looks_like_ban(response.text):
+            return None
+
+        pool.record_ban(route)
+        if all(pool.is_banned(other) for other in pool.routes):
+            return None
+        started = time.monotonic()
+        resent = response.connection.send(response.request, **kwargs)
+        resent.elapsed = timedelta(seconds=time.monotonic() - started)
+        return resent
+
+    return hook
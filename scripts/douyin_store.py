@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""按内容哈希存放已下载视频/音频的本地制品库。"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from scripts.pipeline_artifacts import temp_artifact_path
+
+
+DEFAULT_STORE_DIR = Path("data/douyin_store")
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(source: str | Path, target: str | Path) -> None:
+    """优先用硬链接把文件放到目标位置，跨文件系统时退回复制。"""
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = temp_artifact_path(target)
+    try:
+        os.link(source, temp_path)
+    except OSError:
+        shutil.copyfile(source, temp_path)
+    os.replace(temp_path, target)
+
+
+class DownloadArtifactStore:
+    """video_id → 内容哈希 → 制品文件的两级索引。
+
+    制品按 sha256 存放在 `objects/<前两位>/<哈希><扩展名>`，同一内容只保存一份；
+    `index.json` 记录每个 video_id 各版本对应的哈希与原始文件名：默认版本的视频、最低码率的视频和提取出的音频（mp3）。
+    总大小超过 `max_bytes` 时按最久未使用淘汰制品。
+
+    命中只在内存中更新最近使用时间，登记、淘汰时落盘，
+    其余未落盘的使用记录由 flush() 写出（进程退出时自动调用）。
+    """
+
+    # 最低码率版本单独登记，只要求完整画质的下载不会拿到它
+    KINDS = ("video", "low_bitrate_video", "audio")
+
+    def __init__(
+        self,
+        root: str | Path = DEFAULT_STORE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._data = self._load()
+        atexit.register(self.flush)
+
+    def lookup(self, video_id: str, kind: str) -> dict[str, Any] | None:
+        """返回制品记录（含 `path`、`filename`、`sha256`、`size`），文件缺失或大小不符时返回 None。"""
+        with self._lock:
+            entry = self._data["videos"].get(video_id, {}).get(kind)
+            if entry is None:
+                return None
+            obj = self._data["objects"].get(entry["sha256"])
+            path = self._object_path(entry["sha256"], obj["suffix"]) if obj else None
+            if path is None or not path.exists() or path.stat().st_size != obj["size"]:
+                self._forget_object(entry["sha256"])
+                self._save()
+                return None
+            obj["last_used_at"] = int(self._clock())
+            self._dirty = True
+            return {**entry, "path": str(path), "size": obj["size"]}
+
+    def add(self, video_id: str, kind: str, source_path: str | Path) -> dict[str, Any]:
+        """把下载好的文件登记到制品库，内容已存在时只增加索引。"""
+        if kind not in self.KINDS:
+            raise ValueError(f"unknown artifact kind: {kind}")
+        source_path = Path(source_path)
+        sha256 = file_sha256(source_path)
+        size = source_path.stat().st_size
+        now = int(self._clock())
+
+        with self._lock:
+            obj = self._data["objects"].get(sha256)
+            path = self._object_path(sha256, obj["suffix"] if obj else source_path.suffix)
+            if obj is None or not path.exists():
+                link_or_copy(source_path, path)
+                obj = {"suffix": source_path.suffix, "size": size, "stored_at": now}
+                self._data["objects"][sha256] = obj
+            obj["last_used_at"] = now
+
+            entry = {"sha256": sha256, "filename": source_path.name, "stored_at": now}
+            self._data["videos"].setdefault(video_id, {})[kind] = entry
+            self._evict(keep=sha256)
+            self._save()
+            return {**entry, "path": str(path), "size": size}
+
+    def flush(self) -> None:
+        """把命中时在内存中更新的使用时间写回索引。"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def find_by_hash(self, sha256: str) -> list[str]:
+        """返回内容哈希相同的所有 video_id。"""
+        with self._lock:
+            return sorted(
+                video_id
+                for video_id, kinds in self._data["videos"].items()
+                if any(entry["sha256"] == sha256 for entry in kinds.values())
+            )
+
+    def _object_path(self, sha256: str, suffix: str) -> Path:
+        return self.root / "objects" / sha256[:2] / f"{sha256}{suffix}"
+
+    def _forget_object(self, sha256: str) -> None:
+        obj = self._data["objects"].pop(sha256, None)
+        if obj is not None:
+            path = self._object_path(sha256, obj["suffix"])
+            if path.exists():
+                path.unlink()
+        for video_id in list(self._data["videos"]):
+            kinds = self._data["videos"][video_id]
+            for kind in [kind for kind, entry in kinds.items() if entry["sha256"] == sha256]:
+                del kinds[kind]
+            if not kinds:
+                del self._data["videos"][video_id]
+
+    def _evict(self, keep: str) -> None:
+        objects = self._data["objects"]
+        total = sum(obj["size"] for obj in objects.values())
+        least_recent = sorted(objects, key=lambda sha256: objects[sha256].get("last_used_at", 0))
+        for sha256 in least_recent:
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            total -= objects[sha256]["size"]
+            self._forget_object(sha256)
+
+    def _load(self) -> dict[str, Any]:
+        if not self.index_path.exists():
+            return self._empty_payload()
+
+        try:
+            with self.index_path.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            return self._empty_payload()
+
+        if (
+            not isinstance(payload, dict)
+            or payload.get("version") not in (1, 2)
+            or not isinstance(payload.get("videos"), dict)
+            or not isinstance(payload.get("objects"), dict)
+        ):
+            return self._empty_payload()
+        if payload["version"] == 1:
+            # 第 1 版不区分码率，流水线下载的低码率视频也记成了 video，一律当作低码率版本
+            for kinds in payload["videos"].values():
+                if "video" in kinds:
+                    kinds["low_bitrate_video"] = kinds.pop("video")
+            payload["version"] = 2
+        return payload
+
+    def _save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        temp_path = temp_artifact_path(self.index_path)
+        with temp_path.open("w", encoding="utf-8") as handle:
+            json.dump(self._data, handle, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.index_path)
+        self._dirty = False
+
+    @staticmethod
+    def _empty_payload() -> dict[str, Any]:
+        return {"version": 2, "videos": {}, "objects": {}}
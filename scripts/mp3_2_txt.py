@@ -3,6 +3,8 @@ import subprocess
 import argparse
 import sys
 import re
+import threading
+import time
 from pathlib import Path
 from tqdm import tqdm
 from opencc import OpenCC
@@ -21,6 +23,20 @@ except ImportError:
     print("❌ 无法导入配置文件，请确保config.py存在")
     sys.exit(1)
 
+from scripts.audio_windows import (
+    DEFAULT_SEGMENTATION, SAMPLE_RATE, SEGMENTATION_MODES, AudioDecodeError, decode_audio, probe_duration,
+    split_windows
+)
+from scripts.batch_transcribe import chunk_parts, transcribe_batched
+from scripts.pipeline_artifacts import atomic_write_text
+from scripts.segment_pool import real_time_factor, threads_per_worker, transcribe_segments_parallel
+from scripts.vad import detect_speech
+
+try:
+    from config import SEGMENTATION
+except ImportError:  # 旧的 config.py 没有这一项
+    SEGMENTATION = DEFAULT_SEGMENTATION
+
 def check_text_errors(text):
     """免费错别字校验函数"""
     print("🔍 开始错别字校验...")
@@ -74,6 +90,229 @@ def check_text_errors(text):
     
     return corrected_text, corrections
 
+_MODEL_CACHE = {}
+_MODEL_LOCK = threading.Lock()
+
+def load_model(model_name=MODEL_NAME):
+    """加载Whisper模型和繁简转换器，同一进程内只加载一次（多个流水线并发调用时也只加载一次）"""
+    with _MODEL_LOCK:
+        if model_name not in _MODEL_CACHE:
+            print("🤖 正在加载 Whisper 模型...")
+            _MODEL_CACHE[model_name] = (whisper.load_model(model_name), OpenCC('t2s'))  # 繁体转简体
+            print(f"✅ 模型加载完成: {model_name}")
+        else:
+            print(f"♻️  复用已加载的 Whisper 模型: {model_name}")
+        return _MODEL_CACHE[model_name]
+
+_WORKER_MODEL = {}
+
+def _init_transcribe_worker(model_name, threads):
+    """工作进程初始化：限制torch线程数并加载一次模型"""
+    import torch
+    torch.set_num_threads(threads)
+    _WORKER_MODEL["model"] = load_model(model_name)
+
+def _transcribe_in_worker(audio):
+    model, cc = _WORKER_MODEL["model"]
+    return cc.convert(model.transcribe(audio, language="zh")["text"])  # 转简体
+
+def _decode_batch(model, cc, chunks):
+    """把一批不超过30秒的音频窗口的log-mel叠成一个批次，一次前向解码"""
+    import torch
+    mels = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(chunk), model.dims.n_mels) for chunk in chunks
+    ]).to(model.device)
+    options = whisper.DecodingOptions(language="zh", fp16=model.device.type == "cuda")
+    return [cc.convert(result.text) for result in whisper.decode(model, mels, options)]  # 转简体
+
+def _outcome_texts(outcomes):
+    all_text = []
+    for outcome in outcomes:
+        if outcome.ok:
+            all_text.append(outcome.text)
+        else:
+            print(f"⚠️  转写失败 {outcome.name}: {outcome.error}")
+            all_text.append(f"[转写失败: {outcome.error}]")
+    return all_text
+
+def transcribe_parts(parts, workers=1, batch_size=1):
+    """转写 (名称, 音频) 切片，按切片顺序返回文本列表，失败的切片记为[转写失败: ...]，模型加载失败时返回None
+
+    workers 大于1时用多个进程并行转写，每个进程加载一次模型，CPU核心平分给各进程的torch线程。
+    batch_size 大于1时把切片按30秒窗口攒批一次解码（贪心解码，不做 transcribe() 的温度回退和上文提示）。
+    """
+    if workers > 1:
+        threads = threads_per_worker(workers)
+        print(f"⚙️  {workers} 个转写进程，每个 {threads} 个线程")
+        with tqdm(total=len(parts), desc="Transcribing", unit="segment") as progress:
+            outcomes = transcribe_segments_parallel(
+                parts, _transcribe_in_worker, workers,
+                initializer=_init_transcribe_worker, initargs=(MODEL_NAME, threads),
+                on_done=lambda outcome: progress.update(1),
+            )
+        return _outcome_texts(outcomes)
+    
+    try:
+        model, cc = load_model()
+    except Exception as e:
+        print(f"❌ 模型加载失败: {e}")
+        return None
+    
+    if batch_size > 1:
+        # 切片文件模式下先把每个切片解码成数组
+        parts = [(name, whisper.load_audio(audio) if isinstance(audio, str) else audio) for name, audio in parts]
+        print(f"⚙️  批量解码，每批 {batch_size} 个30秒窗口")
+        with tqdm(total=len(chunk_parts(parts)), desc="Transcribing", unit="window") as progress:
+            outcomes = transcribe_batched(
+                parts, lambda chunks: _decode_batch(model, cc, chunks), batch_size, on_batch=progress.update
+            )
+        return _outcome_texts(outcomes)
+    
+    all_text = []
+    for name, audio in tqdm(parts, desc="Transcribing", unit="segment"):
+        try:
+            result = model.transcribe(audio, language="zh")
+            text = cc.convert(result["text"])  # 转简体
+            all_text.append(text)
+        except Exception as e:
+            print(f"⚠️  转写失败 {name}: {e}")
+            all_text.append(f"[转写失败: {e}]")
+    return all_text
+
+def split_audio(audio_path, segment_dir=SEGMENT_DIR):
+    """把音频按SEGMENT_SECONDS切片，返回排好序的切片路径列表，失败时返回None"""
+    print("🎬 正在切片音频...")
+    segment_dir = Path(segment_dir)
+    segment_dir.mkdir(exist_ok=True)
+    
+    try:
+        subprocess.run([
+            "ffmpeg", "-i", str(audio_path), "-f", "segment",
+            "-segment_time", str(SEGMENT_SECONDS),
+            "-c", "copy", f"{segment_dir}/part_%03d.mp3"
+        ], check=True, capture_output=True, text=True)
+        print("✅ 音频切片完成")
+    except subprocess.CalledProcessError as e:
+        print(f"❌ 音频切片失败: {e}")
+        print(f"错误输出: {e.stderr}")
+        return None
+    
+    return sorted(segment_dir.glob("part_*.mp3"))
+
+def load_audio_windows(audio_path, vad=False):
+    """把整段音频解码一次为16kHz float32数组，返回 (名称, 窗口视图) 列表，失败时返回None
+
+    vad 为 True 时用能量VAD找出有声区间，在静音处切成不超过SEGMENT_SECONDS的切片，跳过静音；
+    否则按SEGMENT_SECONDS固定切分。
+    """
+    print("🎬 正在解码音频...")
+    try:
+        audio = decode_audio(audio_path)
+    except AudioDecodeError as e:
+        print(f"❌ 音频解码失败: {e}")
+        return None
+    print(f"✅ 音频解码完成: {len(audio) / SAMPLE_RATE:.1f} 秒，{audio.nbytes / 1024 / 1024:.1f} MB")
+    if not vad:
+        return [(f"{start:.0f}s", window) for start, window in split_windows(audio, SEGMENT_SECONDS)]
+    
+    result = detect_speech(audio, SEGMENT_SECONDS)
+    if not result.segments:
+        print("⚠️  未检测到语音")
+        return []
+    print(f"🔇 VAD: {len(result.segments)} 段语音共 {result.speech_seconds:.1f} 秒，"
+          f"跳过静音 {result.skipped_seconds:.1f} 秒（{result.skipped_seconds / result.total_seconds:.0%}）")
+    return [(f"{start / SAMPLE_RATE:.0f}s", audio[start:end]) for start, end in result.segments]
+
+def transcribe_audio(audio_path, timestamp, output_dir=None, segment_dir=None, in_memory=False, workers=1, batch_size=1, segmentation=SEGMENTATION):
+    """流水线阶段：切片、转写、错别字校验并保存，返回文字稿路径，失败时返回None
+
+    默认用 ffmpeg 把切片写入 segment_dir（本次运行专用的切片目录，默认使用config.py中的SEGMENT_DIR），
+    Whisper 再逐个解码切片文件；in_memory 为 True 时整段音频只解码一次，在内存中切片直接交给Whisper。
+    segmentation 为切片方式：fixed 按SEGMENT_SECONDS固定切分，vad 在静音处切分并跳过静音（需要整段解码，隐含 in_memory）。
+    workers 为并行转写的进程数，batch_size 为批量解码时每批的窗口数。
+    """
+    output_dir = Path(output_dir) if output_dir else OUTPUT_DIR
+    vad = segmentation == "vad"
+    in_memory = in_memory or vad
+    
+    # ===== 1. 切片 =====
+    if in_memory:
+        parts = load_audio_windows(audio_path, vad)
+        segment_files = []
+    else:
+        segment_files = split_audio(audio_path, segment_dir or SEGMENT_DIR)
+        parts = None if segment_files is None else [(part.name, str(part)) for part in segment_files]
+    if parts is None:
+        return None
+    
+    if not parts:
+        print("❌ 没有找到音频切片文件")
+        return None
+    
+    # ===== 2. 加载模型 + 转写 =====
+    print(f"📝 共 {len(parts)} 段音频，开始转写...")
+    started = time.perf_counter()
+    all_text = transcribe_parts(parts, workers, batch_size)
+    if all_text is None:
+        return None
+    elapsed = time.perf_counter() - started
+    if in_memory:
+        audio_seconds = sum(len(audio) for _, audio in parts) / SAMPLE_RATE
+    else:
+        # 切片文件按原音频无损切分，总时长与原音频相同
+        audio_seconds = probe_duration(audio_path)
+    rtf = real_time_factor(elapsed, audio_seconds)
+    if rtf is not None:
+        print(f"⏱️  转写耗时 {elapsed:.1f} 秒，转写音频 {audio_seconds:.1f} 秒，实时率 RTF={rtf:.3f}（每秒转写 {1 / rtf:.1f} 秒音频）")
+    else:
+        print(f"⏱️  转写耗时 {elapsed:.1f} 秒")
+    
+    if not all_text:
+        print("❌ 没有成功转写任何音频")
+        return None
+    
+    # ===== 3. 错别字校验 =====
+    full_text = "\n".join(all_text)
+    corrected_text, corrections = check_text_errors(full_text)
+    
+    # ===== 4. 保存结果 =====
+    output_dir.mkdir(exist_ok=True)
+    output_file = output_dir / f"{timestamp}.txt"
+    
+    try:
+        # 写完整后再原子重命名，下一阶段读到的文字稿总是完整的
+        atomic_write_text(output_file, corrected_text)
+        print(f"✅ 转换完成，已保存到 {output_file}")
+        
+        if corrections:
+            print(f"🔧 已自动纠正 {len(corrections)} 处错别字")
+            print(f"📝 原始文本长度: {len(full_text)} 字符")
+            print(f"📝 纠正后长度: {len(corrected_text)} 字符")
+        
+        # 显示文件大小
+        file_size = output_file.stat().st_size
+        print(f"📊 文件大小: {file_size} 字节")
+        
+        # 显示内容预览
+        print(f"📋 内容预览 (前200字符):")
+        preview = corrected_text[:200]
+        print(f"    {preview}{'...' if len(corrected_text) > 200 else ''}")
+        
+    except Exception as e:
+        print(f"❌ 保存文件失败: {e}")
+        return None
+    
+    # 清理临时文件
+    if segment_files:
+        try:
+            for part in segment_files:
+                part.unlink()
+            print("🧹 临时文件清理完成")
+        except Exception as e:
+            print(f"⚠️  临时文件清理失败: {e}")
+    
+    return output_file
+
 def main():
     """主函数"""
     # 解析命令行参数
@@ -84,8 +323,20 @@ def main():
                        help=f'音频文件路径 (如果不指定，会自动查找downloads目录中的MP3文件)')
     parser.add_argument('--output-dir', '-o',
                        help=f'输出目录 (默认: {OUTPUT_DIR})')
+    parser.add_argument('--segment-dir',
+                       help=f'音频切片目录，并发运行时每次运行使用各自的目录 (默认: {SEGMENT_DIR})')
+    parser.add_argument('--in-memory', action='store_true',
+                       help='整段音频只解码一次，在内存中切片直接转写（默认用 ffmpeg 把切片写成文件再逐个转写）')
+    parser.add_argument('--segmentation', choices=SEGMENTATION_MODES, default=SEGMENTATION,
+                       help=f'切片方式：fixed 按SEGMENT_SECONDS固定切分，vad 在静音处切分并跳过静音（隐含 --in-memory）(默认: {SEGMENTATION})')
+    parser.add_argument('--workers', '-j', type=int, default=1,
+                       help='并行转写的进程数，每个进程加载一次模型并平分CPU线程 (默认: 1)')
+    parser.add_argument('--batch-size', '-b', type=int, default=1,
+                       help='批量解码时每批的30秒窗口数，1表示逐段调用 model.transcribe (默认: 1)')
     
     args = parser.parse_args()
+    if args.workers > 1 and args.batch_size > 1:
+        parser.error('--workers 和 --batch-size 不能同时大于1')
     
     # 获取时间戳
     if args.timestamp:
@@ -132,94 +383,8 @@ def main():
             print("   下载目录不存在")
         sys.exit(1)
     
-    # ===== 1. 切片 =====
-    print("🎬 正在切片音频...")
-    SEGMENT_DIR.mkdir(exist_ok=True)
-    
-    try:
-        subprocess.run([
-            "ffmpeg", "-i", audio_path, "-f", "segment",
-            "-segment_time", str(SEGMENT_SECONDS),
-            "-c", "copy", f"{SEGMENT_DIR}/part_%03d.mp3"
-        ], check=True, capture_output=True, text=True)
-        print("✅ 音频切片完成")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ 音频切片失败: {e}")
-        print(f"错误输出: {e.stderr}")
-        sys.exit(1)
-    
-    # ===== 2. 加载模型 =====
-    print("🤖 正在加载 Whisper 模型...")
-    try:
-        model = whisper.load_model(MODEL_NAME)
-        cc = OpenCC('t2s')  # 繁体转简体
-        print(f"✅ 模型加载完成: {MODEL_NAME}")
-    except Exception as e:
-        print(f"❌ 模型加载失败: {e}")
+    if transcribe_audio(audio_path, timestamp, output_dir, args.segment_dir, in_memory=args.in_memory, workers=max(1, args.workers), batch_size=max(1, args.batch_size), segmentation=args.segmentation) is None:
         sys.exit(1)
-    
-    # ===== 3. 循环转写 + 进度条 =====
-    all_text = []
-    parts = sorted(SEGMENT_DIR.glob("part_*.mp3"))
-    
-    if not parts:
-        print("❌ 没有找到音频切片文件")
-        sys.exit(1)
-    
-    print(f"📝 共 {len(parts)} 段音频，开始转写...")
-    
-    for part in tqdm(parts, desc="Transcribing", unit="segment"):
-        try:
-            result = model.transcribe(str(part), language="zh")
-            text = cc.convert(result["text"])  # 转简体
-            all_text.append(text)
-        except Exception as e:
-            print(f"⚠️  转写失败 {part.name}: {e}")
-            all_text.append(f"[转写失败: {e}]")
-    
-    if not all_text:
-        print("❌ 没有成功转写任何音频")
-        sys.exit(1)
-    
-    # ===== 4. 错别字校验 =====
-    full_text = "\n".join(all_text)
-    corrected_text, corrections = check_text_errors(full_text)
-    
-    # ===== 5. 保存结果 =====
-    output_dir.mkdir(exist_ok=True)
-    output_file = output_dir / f"{timestamp}.txt"
-    
-    try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(corrected_text)
-        print(f"✅ 转换完成，已保存到 {output_file}")
-        
-        if corrections:
-            print(f"🔧 已自动纠正 {len(corrections)} 处错别字")
-            print(f"📝 原始文本长度: {len(full_text)} 字符")
-            print(f"📝 纠正后长度: {len(corrected_text)} 字符")
-        
-        # 显示文件大小
-        file_size = output_file.stat().st_size
-        print(f"📊 文件大小: {file_size} 字节")
-        
-        # 显示内容预览
-        print(f"📋 内容预览 (前200字符):")
-        preview = corrected_text[:200]
-        print(f"    {preview}{'...' if len(corrected_text) > 200 else ''}")
-        
-    except Exception as e:
-        print(f"❌ 保存文件失败: {e}")
-        sys.exit(1)
-    
-    # 清理临时文件
-    try:
-        for part in parts:
-            part.unlink()
-        print("🧹 临时文件清理完成")
-    except Exception as e:
-        print(f"⚠️  临时文件清理失败: {e}")
 
 if __name__ == "__main__":
     main()
-
@@ -10,8 +10,10 @@ import argparse
 import sys
 import os
 from pathlib import Path
+from urllib.parse import urlparse
 from datetime import datetime
 import time
+import threading
 
 # ===== 配置 =====
 # 添加项目根目录到Python路径
@@ -26,10 +28,29 @@ except ImportError:
     print("❌ 无法导入配置文件，请确保config.py存在")
     sys.exit(1)
 
+from scripts.pipeline_artifacts import atomic_write_text
+from scripts.retry_policy import completion_retry_policy
+
 # OpenAI默认配置
 DEFAULT_OPENAI_API_URL = "https://api.openai.com/v1"
 DEFAULT_MODEL = "gpt-3.5-turbo"
 
+# 每个API地址一套重试策略，超时按该地址的历史响应耗时自适应
+_RETRY_POLICIES = {}
+_RETRY_POLICIES_LOCK = threading.Lock()
+
+def get_retry_policy(api_url):
+    """返回api_url对应的重试策略，可以在多个线程中同时调用
+
+    补全请求按调用计费且不幂等：只在连接失败、429 和 5xx 时退避重试，读取超时不重发，连接被拒绝时立即失败；
+    读取超时不低于原来固定的 60 秒。
+    """
+    host = urlparse(api_url).netloc or api_url
+    with _RETRY_POLICIES_LOCK:
+        if host not in _RETRY_POLICIES:
+            _RETRY_POLICIES[host] = completion_retry_policy(f"openai:{host}", initial=(5.0, 60.0))
+        return _RETRY_POLICIES[host]
+
 def call_openai_api(prompt, api_key, api_url=None, model=None):
     """调用OpenAI API或本地兼容服务"""
     if not api_url:
@@ -59,7 +80,9 @@ def call_openai_api(prompt, api_key, api_url=None, model=None):
         print(f"🌐 正在调用API: {api_url}")
         print(f"🤖 使用模型: {model}")
         
-        response = requests.post(f"{api_url}/chat/completions", headers=headers, json=data, timeout=60)
+        response = get_retry_policy(api_url).request(
+            requests, "POST", f"{api_url}/chat/completions", headers=headers, json=data
+        )
         response.raise_for_status()
         result = response.json()
         
@@ -167,6 +190,68 @@ def process_news_file(news_file_path, api_key=None, api_url=None, model=None, us
     else:
         return None
 
+def save_summary(summary_content, timestamp, output_dir):
+    """按AI生成的标题保存总结文件，返回文件路径，失败时返回None"""
+    # 从AI生成的内容中提取标题
+    title = extract_title_from_summary(summary_content)
+    if title:
+        # 清理标题，移除特殊字符，用于文件名
+        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+        safe_title = safe_title.replace(' ', '_')
+        output_file = output_dir / f"{timestamp}_{safe_title}.md"
+        print(f"📝 AI生成的标题: {title}")
+        print(f"📁 安全文件名: {safe_title}")
+    else:
+        # 如果无法提取标题，使用默认名称
+        output_file = output_dir / f"{timestamp}_AI总结.md"
+        print(f"⚠️  无法提取标题，使用默认文件名")
+    
+    # 保存总结文件
+    try:
+        atomic_write_text(output_file, summary_content)
+        
+        print(f"✅ 总结已保存到: {output_file}")
+        
+        # 显示文件大小
+        file_size = output_file.stat().st_size
+        print(f"📊 文件大小: {file_size} 字节")
+        
+        # 显示文件内容预览
+        print("\n📋 总结内容预览:")
+        print("=" * 50)
+        preview = summary_content[:500]
+        print(preview + "..." if len(summary_content) > 500 else summary_content)
+        print("=" * 50)
+        
+    except Exception as e:
+        print(f"❌ 保存总结文件失败: {e}")
+        return None
+    
+    return output_file
+
+def summarize_news(news_file_path, timestamp, output_dir=None, api_key=None, api_url=None, model=None, use_local=False):
+    """流水线阶段：为新闻文件生成总结并保存，返回总结文件路径，失败时返回None
+
+    未传入的api_key、api_url和model与命令行一致，从OPENAI_*环境变量读取或使用默认值。
+    """
+    output_dir = Path(output_dir) if output_dir else OUTPUT_DIR
+    output_dir.mkdir(exist_ok=True)
+    api_key = api_key or os.environ.get('OPENAI_API_KEY')
+    api_url = api_url or os.environ.get('OPENAI_API_URL') or DEFAULT_OPENAI_API_URL
+    model = model or os.environ.get('OPENAI_MODEL') or DEFAULT_MODEL
+    
+    summary_content = process_news_file(
+        Path(news_file_path), 
+        api_key=api_key,
+        api_url=api_url,
+        model=model,
+        use_local=use_local
+    )
+    if not summary_content:
+        print("❌ 生成总结失败")
+        return None
+    return save_summary(summary_content, timestamp, output_dir)
+
 def main():
     """主函数"""
     # 解析命令行参数
@@ -177,6 +262,8 @@ def main():
                        help='指定新闻文件路径，如果不指定则自动查找最新文件')
     parser.add_argument('--output-dir', '-o',
                        help=f'输出目录 (默认: {OUTPUT_DIR})')
+    parser.add_argument('--result-file',
+                       help='成功后把保存的总结文件路径写入该文件，供流水线取得确切的产出路径')
     parser.add_argument('--api-key', '-k',
                        help='OpenAI API密钥 (如果不指定，会尝试环境变量)')
     parser.add_argument('--api-url', '-u',
@@ -249,52 +336,17 @@ def main():
         print(f"📰 找到最新新闻文件: {news_file_path.name}")
     
     # 处理新闻文件
-    summary_content = process_news_file(
-        news_file_path, 
+    output_file = summarize_news(
+        news_file_path,
+        timestamp,
+        output_dir,
         api_key=api_key,
         api_url=api_url,
         model=model,
         use_local=args.local
     )
-    
-    if summary_content:
-        # 从AI生成的内容中提取标题
-        title = extract_title_from_summary(summary_content)
-        if title:
-            # 清理标题，移除特殊字符，用于文件名
-            safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
-            safe_title = safe_title.replace(' ', '_')
-            output_file = output_dir / f"{timestamp}_{safe_title}.md"
-            print(f"📝 AI生成的标题: {title}")
-            print(f"📁 安全文件名: {safe_title}")
-        else:
-            # 如果无法提取标题，使用默认名称
-            output_file = output_dir / f"{timestamp}_AI总结.md"
-            print(f"⚠️  无法提取标题，使用默认文件名")
-        
-        # 保存总结文件
-        try:
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(summary_content)
-            
-            print(f"✅ 总结已保存到: {output_file}")
-            
-            # 显示文件大小
-            file_size = output_file.stat().st_size
-            print(f"📊 文件大小: {file_size} 字节")
-            
-            # 显示文件内容预览
-            print("\n📋 总结内容预览:")
-            print("=" * 50)
-            preview = summary_content[:500]
-            print(preview + "..." if len(summary_content) > 500 else summary_content)
-            print("=" * 50)
-            
-        except Exception as e:
-            print(f"❌ 保存总结文件失败: {e}")
-            return
-    else:
-        print("❌ 生成总结失败")
+    if output_file and args.result_file:
+        atomic_write_text(args.result_file, str(output_file))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
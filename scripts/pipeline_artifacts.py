@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""流水线阶段产出文件的提交：写临时文件、fsync、原子重命名。
+
+最终路径上出现的文件总是完整的，下一阶段拿到路径即可直接读取，不需要等待或轮询。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+
+def temp_artifact_path(path: str | Path) -> Path:
+    """与最终文件同目录的临时路径，保证 os.replace 不跨文件系统。
+
+    文件名带进程号和线程号，分阶段执行时多个线程同时写同一个文件也不会共用临时文件。
+    """
+    path = Path(path)
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def fsync_path(path: str | Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_dir(path: str | Path) -> None:
+    """把目录项的变更（新建、重命名）落盘；不支持打开目录的平台上直接跳过。"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def commit_artifact(temp_path: str | Path, final_path: str | Path) -> Path:
+    """把已经写完的临时文件 fsync 后原子重命名为最终文件，返回最终路径。"""
+    final_path = Path(final_path)
+    fsync_path(temp_path)
+    os.replace(temp_path, final_path)
+    fsync_dir(final_path.parent)
+    return final_path
+
+
+def atomic_write_text(path: str | Path, text: str, encoding: str = "utf-8") -> Path:
+    path = Path(path)
+    temp_path = temp_artifact_path(path)
+    try:
+        with temp_path.open("w", encoding=encoding) as handle:
+            handle.write(text)
+        return commit_artifact(temp_path, path)
+    except BaseException:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
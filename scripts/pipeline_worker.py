@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""常驻的转写/总结工作进程，通过 Unix socket 接收流水线提交的任务。
+
+Whisper 模型和本地总结模型只在工作进程启动（或第一次用到）时加载一次，之后每个视频直接复用；
+任务在单个线程中按提交顺序执行，模型不会被并发调用。空闲超过 idle_timeout 秒后自动退出。
+
+协议：每个连接发送一行 JSON 请求 `{"op": ..., ...参数}`，收到一行 JSON 响应。
+- `transcribe`: audio_path、timestamp、output_dir、segment_dir、segmentation（fixed/vad）→ 文字稿路径
+- `summarize`: news_file、timestamp、output_dir → 总结文件路径
+- `status`: 队列深度、模型加载耗时、已完成任务数、空闲时长
+- `shutdown`: 处理完已排队的任务后退出
+
+用法：
+    python scripts/pipeline_worker.py serve --preload
+    python scripts/pipeline_worker.py status
+    python scripts/run_pipeline.py "https://v.douyin.com/xxxxx/" --worker-socket data/pipeline_worker.sock
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.audio_windows import DEFAULT_SEGMENTATION
+
+
+DEFAULT_SOCKET_PATH = Path("data/pipeline_worker.sock")
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+# 客户端等待一个任务完成的最长时间：长音频转写加上排在前面的任务可能需要很久
+DEFAULT_JOB_TIMEOUT = 2 * 60 * 60
+IDLE_CHECK_INTERVAL = 1.0
+
+JobHandler = Callable[..., Any]
+
+
+class WorkerError(RuntimeError):
+    """工作进程不可达，或任务在工作进程中失败。"""
+
+
+class PipelineWorker:
+    """在单个线程中依次执行任务的工作进程。
+
+    handlers 把任务类型映射到执行函数（参数为请求中的其余字段），默认是转写和总结；
+    loaders 是启动时可预先执行的模型加载函数，每个只执行一次并记录耗时。
+    """
+
+    def __init__(
+        self,
+        socket_path: str | Path = DEFAULT_SOCKET_PATH,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        handlers: dict[str, JobHandler] | None = None,
+        loaders: dict[str, Callable[[], Any]] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.socket_path = Path(socket_path)
+        self.idle_timeout = idle_timeout
+        self.handlers = handlers if handlers is not None else self._default_handlers()
+        self.loaders = loaders if loaders is not None else self._default_loaders()
+        self._clock = clock
+        self._jobs: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._started_at = clock()
+        self._last_activity = clock()
+        self._model_load_seconds: dict[str, float] = {}
+        self._server: socketserver.ThreadingUnixStreamServer | None = None
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "queue_depth": self._jobs.qsize() + self._running,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "model_load_seconds": dict(self._model_load_seconds),
+                "uptime_seconds": round(self._clock() - self._started_at, 1),
+                "idle_seconds": round(self._idle_seconds(), 1),
+                "idle_timeout": self.idle_timeout,
+            }
+
+    def ensure_loaded(self, name: str) -> None:
+        """执行 loaders[name]，每个加载函数只计一次耗时。"""
+        if name in self._model_load_seconds or name not in self.loaders:
+            return
+        started = time.perf_counter()
+        self.loaders[name]()
+        with self._lock:
+            self._model_load_seconds[name] = round(time.perf_counter() - started, 3)
+
+    def submit(self, op: str, params: dict[str, Any]) -> Future:
+        if op != "warm" and op not in self.handlers:
+            raise WorkerError(f"unknown op: {op}")
+        future: Future = Future()
+        with self._lock:
+            self._last_activity = self._clock()
+        self._jobs.put((op, params, future))
+        return future
+
+    def serve_forever(self, preload: bool = False) -> None:
+        if self.socket_path.exists():
+            if _socket_accepts(self.socket_path):
+                raise WorkerError(f"another worker is already listening on {self.socket_path}")
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        worker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                line = self.rfile.readline()
+                try:
+                    response = worker._dispatch(json.loads(line))
+                except Exception as exc:
+                    response = {"ok": False, "error": f"{exc.__class__.__name__}: {exc}"}
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+        self._server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._run_jobs, name="pipeline-worker-jobs", daemon=True).start()
+        threading.Thread(target=self._watch_idle, name="pipeline-worker-idle", daemon=True).start()
+        print(f"🛠️  工作进程 {os.getpid()} 监听 {self.socket_path}，空闲 {self.idle_timeout:.0f}s 后退出")
+        if preload:
+            for name in self.loaders:
+                self.submit("warm", {"name": name})
+        try:
+            self._server.serve_forever(poll_interval=0.2)
+        finally:
+            self._server.server_close()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            print(f"👋 工作进程退出：完成 {self._completed} 个任务，失败 {self._failed} 个")
+
+    def shutdown(self) -> None:
+        """排队中的任务处理完后停止服务。"""
+        self._jobs.put(None)
+
+    def _dispatch(self, request: dict[str, Any]) -> dict[str, Any]:
+        op = request.pop("op", None)
+        if op == "status":
+            return {"ok": True, "result": self.status()}
+        if op == "shutdown":
+            self.shutdown()
+            return {"ok": True, "result": None}
+        queued_at = time.perf_counter()
+        future = self.submit(op, request)
+        result, started_at, finished_at = future.result()
+        return {
+            "ok": result is not None,
+            "result": result,
+            "queue_seconds": round(started_at - queued_at, 3),
+            "run_seconds": round(finished_at - started_at, 3),
+            "queue_depth": self.status()["queue_depth"],
+        }
+
+    def _run_jobs(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                # 停止信号之后才提交的任务不再执行，直接返回失败
+                while not self._jobs.empty():
+                    pending = self._jobs.get_nowait()
+                    if pending is not None:
+                        now = time.perf_counter()
+                        pending[2].set_result((None, now, now))
+                if self._server is not None:
+                    self._server.shutdown()
+                return
+            op, params, future = job
+            with self._lock:
+                self._running += 1
+            started_at = time.perf_counter()
+            try:
+                result = self._handle(op, params)
+            except Exception as exc:
+                print(f"❌ 任务 {op} 失败: {exc}")
+                result = None
+            finished_at = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                if result is None:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+                self._last_activity = self._clock()
+            future.set_result((result, started_at, finished_at))
+
+    def _handle(self, op: str, params: dict[str, Any]) -> Any:
+        if op == "warm":
+            self.ensure_loaded(params["name"])
+            return params["name"]
+        return self.handlers[op](**params)
+
+    def _idle_seconds(self) -> float:
+        if self._running or self._jobs.qsize():
+            return 0.0
+        return self._clock() - self._last_activity
+
+    def _watch_idle(self) -> None:
+        while True:
+            time.sleep(IDLE_CHECK_INTERVAL)
+            with self._lock:
+                idle = self._idle_seconds()
+            if idle >= self.idle_timeout:
+                print(f"💤 空闲 {idle:.0f}s，工作进程退出")
+                self.shutdown()
+                return
+
+    def _default_loaders(self) -> dict[str, Callable[[], Any]]:
+        def load_whisper() -> None:
+            from scripts import mp3_2_txt
+            mp3_2_txt.load_model()
+
+        def load_summary_model() -> None:
+            from scripts import run_pipeline
+            run_pipeline.warm_summary_model()
+
+        return {"whisper": load_whisper, "summary": load_summary_model}
+
+    def _default_handlers(self) -> dict[str, JobHandler]:
+        def transcribe(
+            audio_path: str,
+            timestamp: str,
+            output_dir: str | None = None,
+            segment_dir: str | None = None,
+            segmentation: str = DEFAULT_SEGMENTATION,
+        ):
+            from scripts import mp3_2_txt
+            self.ensure_loaded("whisper")
+            result = mp3_2_txt.transcribe_audio(audio_path, timestamp, output_dir, segment_dir, segmentation=segmentation)
+            return str(result) if result else None
+
+        def summarize(news_file: str, timestamp: str, output_dir: str | None = None):
+            from scripts import run_pipeline
+            self.ensure_loaded("summary")
+            result = run_pipeline.summarize_in_process(Path(news_file), timestamp, output_dir)
+            return str(result) if result else None
+
+        return {"transcribe": transcribe, "summarize": summarize}
+
+
+def _socket_accepts(socket_path: Path) -> bool:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1.0)
+            sock.connect(str(socket_path))
+        return True
+    except OSError:
+        return False
+
+
+class WorkerClient:
+    """向工作进程提交任务；路径在发送前转为绝对路径，工作进程的工作目录可以不同。"""
+
+    def __init__(self, socket_path: str | Path = DEFAULT_SOCKET_PATH, timeout: float = DEFAULT_JOB_TIMEOUT):
+        self.socket_path = Path(socket_path)
+        self.timeout = timeout
+
+    def available(self) -> bool:
+        return self.socket_path.exists() and _socket_accepts(self.socket_path)
+
+    def request(self, op: str, **params: Any) -> dict[str, Any]:
+        payload = json.dumps({"op": op, **params}, ensure_ascii=False).encode("utf-8") + b"\n"
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(str(self.socket_path))
+                sock.sendall(payload)
+                with sock.makefile("rb") as reader:
+                    line = reader.readline()
+        except OSError as exc:
+            raise WorkerError(f"pipeline worker at {self.socket_path} is unreachable: {exc}") from exc
+        if not line:
+            raise WorkerError("pipeline worker closed the connection without a response")
+        return json.loads(line)
+
+    def transcribe(
+        self,
+        audio_path: str | Path,
+        timestamp: str,
+        output_dir: str | Path,
+        segment_dir: str | Path,
+        segmentation: str = DEFAULT_SEGMENTATION,
+    ) -> Path | None:
+        response = self.request(
+            "transcribe",
+            audio_path=_absolute(audio_path),
+            timestamp=timestamp,
+            output_dir=_absolute(output_dir),
+            segment_dir=_absolute(segment_dir),
+            segmentation=segmentation,
+        )
+        return self._result_path(response)
+
+    def summarize(self, news_file: str | Path, timestamp: str, output_dir: str | Path) -> Path | None:
+        response = self.request(
+            "summarize", news_file=_absolute(news_file), timestamp=timestamp, output_dir=_absolute(output_dir)
+        )
+        return self._result_path(response)
+
+    def status(self) -> dict[str, Any]:
+        return self.request("status")["result"]
+
+    def shutdown(self) -> None:
+        self.request("shutdown")
+
+    @staticmethod
+    def _result_path(response: dict[str, Any]) -> Path | None:
+        if "error" in response:
+            raise WorkerError(response["error"])
+        print(
+            f"🛠️  工作进程: 排队 {response['queue_seconds']:.1f}s，执行 {response['run_seconds']:.1f}s，"
+            f"当前队列深度 {response['queue_depth']}"
+        )
+        return Path(response["result"]) if response["ok"] else None
+
+
+def _absolute(path: str | Path) -> str:
+    return str(Path(path).resolve())
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="常驻的转写/总结工作进程")
+    parser.add_argument("command", choices=("serve", "status", "stop"), help="启动服务、查看状态或停止")
+    parser.add_argument("--socket", default=str(DEFAULT_SOCKET_PATH), help=f"Unix socket 路径 (默认: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument(
+        "--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, help=f"空闲多少秒后退出 (默认: {DEFAULT_IDLE_TIMEOUT})"
+    )
+    parser.add_argument("--preload", action="store_true", help="启动时立即加载 Whisper 和本地总结模型")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "serve":
+        try:
+            PipelineWorker(args.socket, idle_timeout=args.idle_timeout).serve_forever(preload=args.preload)
+        except WorkerError as exc:
+            print(f"❌ {exc}")
+            return 1
+        return 0
+
+    client = WorkerClient(args.socket, timeout=10.0)
+    try:
+        if args.command == "status":
+            print(json.dumps(client.status(), ensure_ascii=False, indent=2))
+        else:
+            client.shutdown()
+            print("✅ 已通知工作进程在处理完排队任务后退出")
+    except WorkerError as exc:
+        print(f"❌ {exc}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""单次流水线运行的独立工作目录。
+
+每次运行的下载文件和音频切片都放在自己的目录里，多个视频同时处理时互不干扰；
+运行结束（无论成功与否）后整个目录被删除。最终产出（文字稿、总结）仍写入 news/。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from types import TracebackType
+
+
+DEFAULT_WORKSPACE_ROOT = Path("workspaces")
+# 内存文件系统，音频切片等中间文件不落磁盘
+TMPFS_ROOT = Path("/dev/shm")
+TMPFS_WORKSPACE_DIR = "news_summary"
+
+
+def tmpfs_available() -> bool:
+    return TMPFS_ROOT.is_dir() and os.access(TMPFS_ROOT, os.W_OK)
+
+
+def resolve_workspace_root(root: str | Path | None = None, use_tmpfs: bool = False) -> Path:
+    """确定工作目录的父目录：显式指定优先，其次 tmpfs（可用时），最后是 DEFAULT_WORKSPACE_ROOT。"""
+    if root is not None:
+        return Path(root)
+    if use_tmpfs:
+        if tmpfs_available():
+            return TMPFS_ROOT / TMPFS_WORKSPACE_DIR
+        print(f"⚠️  {TMPFS_ROOT} 不可用，工作目录改用 {DEFAULT_WORKSPACE_ROOT}")
+    return DEFAULT_WORKSPACE_ROOT
+
+
+class RunWorkspace:
+    """以 video_id 或时间戳为前缀的工作目录，包含 downloads/ 和 segments/ 两个子目录。
+
+    同一个 key 并发运行时目录名带随机后缀，不会冲突。作为上下文管理器使用，退出时清理，
+    keep=True 时保留目录便于排查问题。
+    """
+
+    def __init__(self, key: str, root: str | Path | None = None, use_tmpfs: bool = False, keep: bool = False):
+        self.key = re.sub(r"[^0-9A-Za-z_.-]", "_", key) or "run"
+        self.root = resolve_workspace_root(root, use_tmpfs)
+        self.keep = keep
+        self.path: Path | None = None
+
+    @property
+    def downloads_dir(self) -> Path:
+        return self._require_path() / "downloads"
+
+    @property
+    def segments_dir(self) -> Path:
+        return self._require_path() / "segments"
+
+    def create(self) -> "RunWorkspace":
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = Path(tempfile.mkdtemp(prefix=f"{self.key}-", dir=self.root))
+        self.downloads_dir.mkdir()
+        self.segments_dir.mkdir()
+        print(f"📂 本次运行的工作目录: {self.path}")
+        return self
+
+    def cleanup(self) -> None:
+        if self.path is None:
+            return
+        if self.keep:
+            print(f"📂 保留工作目录: {self.path}")
+            return
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.path = None
+
+    def __enter__(self) -> "RunWorkspace":
+        return self.create()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.cleanup()
+
+    def _require_path(self) -> Path:
+        if self.path is None:
+            raise RuntimeError("workspace has not been created")
+        return self.path
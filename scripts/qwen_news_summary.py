@@ -11,6 +11,7 @@ import os
 from pathlib import Path
 from datetime import datetime
 import time
+import threading
 
 # ===== 配置 =====
 # 添加项目根目录到Python路径
@@ -25,6 +26,14 @@ except ImportError:
     print("❌ 无法导入配置文件，请确保config.py存在")
     sys.exit(1)
 
+from scripts.pipeline_artifacts import atomic_write_text
+from scripts.retry_policy import completion_retry_policy
+
+# 接口超时按历史响应耗时自适应（统计保存在 data/ 下，跨运行生效）
+# 生成请求按调用计费且不幂等：只在连接失败、429 和 5xx 时退避重试，读取超时不重发，
+# 超时只随观测放宽，读取超时不低于 60 秒
+QWEN_RETRY_POLICY = completion_retry_policy("qwen", initial=(5.0, 60.0))
+
 def call_qwen_api(prompt, api_key):
     """调用通义千问API"""
     headers = {
@@ -49,7 +58,7 @@ def call_qwen_api(prompt, api_key):
     }
     
     try:
-        response = requests.post(QWEN_API_URL, headers=headers, json=data, timeout=30)
+        response = QWEN_RETRY_POLICY.request(requests, "POST", QWEN_API_URL, headers=headers, json=data)
         response.raise_for_status()
         result = response.json()
         
@@ -112,6 +121,33 @@ def call_qwen_api(prompt, api_key):
             print(f"🔍 错误响应内容: {e.response.text}")
         return None
 
+# 如果没有指定模型路径，使用默认的Qwen模型
+DEFAULT_LOCAL_MODEL_PATH = "Qwen/Qwen-1_8B-Chat"  # 默认使用较小的模型
+
+_LOCAL_MODEL_CACHE = {}
+_LOCAL_MODEL_LOCK = threading.Lock()
+
+def load_local_model(model_path=None):
+    """加载本地模型的tokenizer和权重，同一进程内每个模型路径只加载一次"""
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+    import torch
+    
+    model_path = model_path or DEFAULT_LOCAL_MODEL_PATH
+    with _LOCAL_MODEL_LOCK:
+        if model_path not in _LOCAL_MODEL_CACHE:
+            print(f"🤖 加载本地模型: {model_path}")
+            tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
+            model = AutoModelForCausalLM.from_pretrained(
+                model_path, 
+                trust_remote_code=True,
+                torch_dtype=torch.float16,
+                device_map="auto"
+            )
+            _LOCAL_MODEL_CACHE[model_path] = (tokenizer, model)
+        else:
+            print(f"♻️  复用已加载的本地模型: {model_path}")
+        return _LOCAL_MODEL_CACHE[model_path]
+
 def call_local_model(prompt, model_path=None):
     """调用本地模型（支持多种格式）"""
     print("🏠 正在使用本地模型...")
@@ -119,27 +155,12 @@ def call_local_model(prompt, model_path=None):
     try:
         # 尝试导入transformers
         try:
-            from transformers import AutoTokenizer, AutoModelForCausalLM
             import torch
+            tokenizer, model = load_local_model(model_path)
         except ImportError:
             print("❌ 请安装transformers: pip install transformers torch")
             return None
         
-        # 如果没有指定模型路径，使用默认的Qwen模型
-        if not model_path:
-            model_path = "Qwen/Qwen-1_8B-Chat"  # 默认使用较小的模型
-        
-        print(f"🤖 加载本地模型: {model_path}")
-        
-        # 加载tokenizer和模型
-        tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
-        model = AutoModelForCausalLM.from_pretrained(
-            model_path, 
-            trust_remote_code=True,
-            torch_dtype=torch.float16,
-            device_map="auto"
-        )
-        
         # 构建对话格式
         messages = [{"role": "user", "content": prompt}]
         text = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
@@ -223,6 +244,66 @@ def process_news_file(news_file_path, api_key=None, use_local=False, local_model
     else:
         return None
 
+def save_summary(summary_content, timestamp, output_dir):
+    """按AI生成的标题保存总结文件，返回文件路径，失败时返回None"""
+    # 从AI生成的内容中提取标题
+    title = extract_title_from_summary(summary_content)
+    if title:
+        # 清理标题，移除特殊字符，用于文件名
+        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+        safe_title = safe_title.replace(' ', '_')
+        output_file = output_dir / f"{timestamp}_{safe_title}.md"
+        print(f"📝 AI生成的标题: {title}")
+        print(f"📁 安全文件名: {safe_title}")
+    else:
+        # 如果无法提取标题，使用默认名称
+        output_file = output_dir / f"{timestamp}_AI总结.md"
+        print(f"⚠️  无法提取标题，使用默认文件名")
+    
+    # 保存总结文件
+    try:
+        atomic_write_text(output_file, summary_content)
+        
+        print(f"✅ 总结已保存到: {output_file}")
+        
+        # 显示文件大小
+        file_size = output_file.stat().st_size
+        print(f"📊 文件大小: {file_size} 字节")
+        
+        # 显示文件内容预览
+        print("\n📋 总结内容预览:")
+        print("=" * 50)
+        preview = summary_content[:500]
+        print(preview + "..." if len(summary_content) > 500 else summary_content)
+        print("=" * 50)
+        
+    except Exception as e:
+        print(f"❌ 保存总结文件失败: {e}")
+        return None
+    
+    return output_file
+
+def summarize_news(news_file_path, timestamp, output_dir=None, api_key=None, use_local=False, local_model_path=None):
+    """流水线阶段：为新闻文件生成总结并保存，返回总结文件路径，失败时返回None
+
+    API模式下未传api_key时与命令行一致，依次读取QWEN_API_KEY环境变量和config.py。
+    """
+    output_dir = Path(output_dir) if output_dir else OUTPUT_DIR
+    output_dir.mkdir(exist_ok=True)
+    if not use_local and not api_key:
+        api_key = os.environ.get('QWEN_API_KEY') or QWEN_API_KEY
+    
+    summary_content = process_news_file(
+        Path(news_file_path), 
+        api_key=api_key, 
+        use_local=use_local, 
+        local_model_path=local_model_path
+    )
+    if not summary_content:
+        print("❌ 生成总结失败")
+        return None
+    return save_summary(summary_content, timestamp, output_dir)
+
 def main():
     """主函数"""
     # 解析命令行参数
@@ -233,6 +314,8 @@ def main():
                        help='指定新闻文件路径，如果不指定则自动查找最新文件')
     parser.add_argument('--output-dir', '-o',
                        help=f'输出目录 (默认: {OUTPUT_DIR})')
+    parser.add_argument('--result-file',
+                       help='成功后把保存的总结文件路径写入该文件，供流水线取得确切的产出路径')
     parser.add_argument('--local', '-l', action='store_true',
                        help='使用本地模型而不是API')
     parser.add_argument('--model-path', '-m',
@@ -296,51 +379,16 @@ def main():
         print(f"📰 找到最新新闻文件: {news_file_path.name}")
     
     # 处理新闻文件
-    summary_content = process_news_file(
-        news_file_path, 
+    output_file = summarize_news(
+        news_file_path,
+        timestamp,
+        output_dir,
         api_key=api_key, 
         use_local=args.local, 
         local_model_path=args.model_path
     )
-    
-    if summary_content:
-        # 从AI生成的内容中提取标题
-        title = extract_title_from_summary(summary_content)
-        if title:
-            # 清理标题，移除特殊字符，用于文件名
-            safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
-            safe_title = safe_title.replace(' ', '_')
-            output_file = output_dir / f"{timestamp}_{safe_title}.md"
-            print(f"📝 AI生成的标题: {title}")
-            print(f"📁 安全文件名: {safe_title}")
-        else:
-            # 如果无法提取标题，使用默认名称
-            output_file = output_dir / f"{timestamp}_AI总结.md"
-            print(f"⚠️  无法提取标题，使用默认文件名")
-        
-        # 保存总结文件
-        try:
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(summary_content)
-            
-            print(f"✅ 总结已保存到: {output_file}")
-            
-            # 显示文件大小
-            file_size = output_file.stat().st_size
-            print(f"📊 文件大小: {file_size} 字节")
-            
-            # 显示文件内容预览
-            print("\n📋 总结内容预览:")
-            print("=" * 50)
-            preview = summary_content[:500]
-            print(preview + "..." if len(summary_content) > 500 else summary_content)
-            print("=" * 50)
-            
-        except Exception as e:
-            print(f"❌ 保存总结文件失败: {e}")
-            return
-    else:
-        print("❌ 生成总结失败")
+    if output_file and args.result_file:
+        atomic_write_text(args.result_file, str(output_file))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""HTTP 请求共享的超时与重试策略。
+
+超时按实测的响应延迟和吞吐伸缩，失败时按带抖动的指数退避重试，连接被拒绝时立即失败。
+"""
+
+from __future__ import annotations
+
+import errno
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from scripts.pipeline_artifacts import temp_artifact_path
+
+
+DEFAULT_STATS_FILE = Path("data/http_timing_stats.json")
+# 指数滑动平均中新样本的权重
+EWMA_ALPHA = 0.3
+# 最快响应延迟遇到更慢样本时的上调权重，单次慢响应不会明显放宽连接超时
+FASTEST_RISE_ALPHA = 0.05
+# 超时取观测值的倍数，给网络抖动留余量
+TIMEOUT_MULTIPLIER = 4.0
+# 小于该大小的响应体传输时间主要是延迟，不计入吞吐
+MIN_THROUGHPUT_SAMPLE_BYTES = 64 * 1024
+# 服务端暂时不可用时值得重试的状态码
+RETRY_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+# 大模型补全请求读取超时的上限
+COMPLETION_MAX_READ_SECONDS = 300.0
+
+
+def is_connection_refused(exc: BaseException) -> bool:
+    """沿异常链查找 ECONNREFUSED：端口上没有服务，重试也不会成功。"""
+    seen = set()
+    pending = [exc]
+    while pending:
+        current = pending.pop()
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, ConnectionRefusedError) or getattr(current, "errno", None) == errno.ECONNREFUSED:
+            return True
+        pending.extend([current.__cause__, current.__context__, getattr(current, "reason", None)])
+        pending.extend(arg for arg in current.args if isinstance(arg, BaseException))
+    return False
+
+
+def is_connect_error(exc: BaseException) -> bool:
+    """沿异常链查找建立连接阶段的失败（连接超时、DNS/连接错误）：此时请求还没有发到服务端。"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    seen = set()
+    pending = [exc]
+    while pending:
+        current = pending.pop()
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, (ConnectTimeoutError, NewConnectionError)):
+            return True
+        pending.extend([current.__cause__, current.__context__, getattr(current, "reason", None)])
+        pending.extend(arg for arg in current.args if isinstance(arg, BaseException))
+    return False
+
+
+def _clamp(value: float, bounds: tuple[float, float]) -> float:
+    return min(max(value, bounds[0]), bounds[1])
+
+
+class AdaptiveTimeout:
+    """根据最近的响应延迟和传输吞吐计算 requests 的 (connect, read) 超时。
+
+    连接超时按最快的近期响应延迟（接近网络往返时间）放大，死掉的端点不会白等满额超时；
+    读取超时按平均响应延迟放大，并为预计要读取的字节数按实测吞吐追加时间。
+    没有观测数据时使用 initial。传入 stats_file 时按 name 持久化统计，供下一次运行使用。
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        initial: tuple[float, float] = (5.0, 30.0),
+        connect_bounds: tuple[float, float] = (1.0, 10.0),
+        read_bounds: tuple[float, float] = (5.0, 120.0),
+        multiplier: float = TIMEOUT_MULTIPLIER,
+        stats_file: str | Path | None = None,
+    ):
+        self.name = name
+        self.initial = initial
+        self.connect_bounds = connect_bounds
+        self.read_bounds = read_bounds
+        self.multiplier = multiplier
+        self.stats_file = Path(stats_file) if stats_file is not None else None
+        self._lock = threading.Lock()
+        self._stats = {"latency": None, "fastest": None, "bytes_per_second": None}
+        if self.stats_file is not None:
+            self._stats.update(self._load().get("endpoints", {}).get(name, {}))
+
+    def timeout(self, expected_bytes: int = 0) -> tuple[float, float]:
+        with self._lock:
+            latency = self._stats["latency"]
+            fastest = self._stats["fastest"]
+            bytes_per_second = self._stats["bytes_per_second"]
+        if latency is None:
+            connect, read = self.initial
+        else:
+            connect = _clamp(self.multiplier * fastest, self.connect_bounds)
+            read = self.multiplier * latency
+        if expected_bytes and bytes_per_second:
+            read += self.multiplier * expected_bytes / bytes_per_second
+        return connect, _clamp(read, self.read_bounds)
+
+    def observe_latency(self, seconds: float) -> None:
+        """记录一次从发出请求到收到响应头的耗时。"""
+        with self._lock:
+            self._stats["latency"] = self._ewma(self._stats["latency"], seconds)
+            fastest = self._stats["fastest"]
+            # 更快的样本立即生效，更慢的样本缓慢抬高下限，网络持续变差时连接超时也会跟着放宽
+            if fastest is None or seconds < fastest:
+                self._stats["fastest"] = seconds
+            else:
+                self._stats["fastest"] = fastest + FASTEST_RISE_ALPHA * (seconds - fastest)
+            self._save()
+
+    def observe_transfer(self, size: int, seconds: float) -> None:
+        """记录一次响应体传输的字节数和耗时。"""
+        if size < MIN_THROUGHPUT_SAMPLE_BYTES or seconds <= 0:
+            return
+        with self._lock:
+            self._stats["bytes_per_second"] = self._ewma(self._stats["bytes_per_second"], size / seconds)
+            self._save()
+
+    @staticmethod
+    def _ewma(previous: float | None, sample: float) -> float:
+        if previous is None:
+            return sample
+        return previous + EWMA_ALPHA * (sample - previous)
+
+    def _load(self) -> dict[str, Any]:
+        try:
+            with self.stats_file.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            return {"version": 1, "endpoints": {}}
+        if not isinstance(payload, dict) or payload.get("version") != 1 or not isinstance(payload.get("endpoints"), dict):
+            return {"version": 1, "endpoints": {}}
+        return payload
+
+    def _save(self) -> None:
+        if self.stats_file is None:
+            return
+        # 多个脚本共用一个统计文件，只覆盖自己的条目
+        payload = self._load()
+        payload["endpoints"][self.name] = dict(self._stats)
+        self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = temp_artifact_path(self.stats_file)
+        with temp_path.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.stats_file)
+
+
+class RetryPolicy:
+    """带抖动指数退避的请求重试。
+
+    超时、连接中断和 RETRY_STATUS_CODES 中的状态码会重试，最多 max_attempts 次；
+    第 n 次重试前等待 [0, min(max_delay, base_delay * 2**n)) 之间的随机秒数（full jitter），
+    服务端给出 Retry-After 时至少等待该时长。连接被拒绝和其他错误直接抛出。
+
+    idempotent 为 False 时（如按调用计费的大模型补全 POST）只重试建立连接阶段的失败和可重试状态码：
+    读取超时或响应中途断开时服务端可能已经处理并计费，重发会重复执行。
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+        timeouts: AdaptiveTimeout | None = None,
+        retry_statuses: tuple[int, ...] = RETRY_STATUS_CODES,
+        idempotent: bool = True,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeouts = timeouts if timeouts is not None else AdaptiveTimeout()
+        self.retry_statuses = retry_statuses
+        self.idempotent = idempotent
+        self.sleep = sleep
+        self.rng = rng
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """第 attempt 次失败（从 0 开始）后的等待秒数。"""
+        delay = self.rng() * min(self.max_delay, self.base_delay * 2 ** attempt)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def should_retry(self, exc: BaseException) -> bool:
+        if is_connection_refused(exc):
+            return False
+        if not self.idempotent:
+            return is_connect_error(exc)
+        return isinstance(exc, (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError))
+
+    def request(self, session: Any, method: str, url: str, expected_bytes: int = 0, **kwargs: Any) -> requests.Response:
+        """发送请求并按策略重试；session 可以是 requests.Session、requests 模块或任何提供 get/post 方法的对象。
+
+        未指定 timeout 时使用自适应超时。最后一次仍返回可重试状态码时原样返回响应，由调用方处理。
+        """
+        explicit_timeout = kwargs.pop("timeout", None)
+        attempt = 0
+        while True:
+            last_attempt = attempt == self.max_attempts - 1
+            timeout = explicit_timeout or self.timeouts.timeout(expected_bytes)
+            started = time.monotonic()
+            try:
+                response = getattr(session, method.lower())(url, timeout=timeout, **kwargs)
+            except Exception as exc:
+                if last_attempt or not self.should_retry(exc):
+                    raise
+                delay = self.backoff(attempt)
+                print(f"请求失败 ({exc.__class__.__name__})，{delay:.1f}s 后第 {attempt + 2}/{self.max_attempts} 次尝试")
+                self.sleep(delay)
+                attempt += 1
+                continue
+
+            finished = time.monotonic()
+            if response.status_code in self.retry_statuses and not last_attempt:
+                delay = self.backoff(attempt, self._retry_after(response))
+                response.close()
+                print(f"服务端返回 {response.status_code}，{delay:.1f}s 后第 {attempt + 2}/{self.max_attempts} 次尝试")
+                self.sleep(delay)
+                attempt += 1
+                continue
+
+            latency = response.elapsed.total_seconds()
+            self.timeouts.observe_latency(latency)
+            if not kwargs.get("stream"):
+                self.timeouts.observe_transfer(len(response.content), finished - started - latency)
+            return response
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float | None:
+        value = response.headers.get("Retry-After")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+
+def completion_retry_policy(
+    name: str, initial: tuple[float, float], stats_file: str | Path | None = DEFAULT_STATS_FILE
+) -> RetryPolicy:
+    """按调用计费的大模型补全 POST 的重试策略。
+
+    非流式补全的响应耗时就是整段生成时间，几次短总结之后按它收紧的超时会让下一篇长文字稿读取超时，
+    而读取超时又不能重发。所以 initial 同时是下限：连接和读取超时只会随观测放宽，不会低于 initial。
+    """
+    connect, read = initial
+    return RetryPolicy(
+        timeouts=AdaptiveTimeout(
+            name,
+            initial=initial,
+            connect_bounds=(connect, max(connect, 10.0)),
+            read_bounds=(read, max(read, COMPLETION_MAX_READ_SECONDS)),
+            stats_file=stats_file,
+        ),
+        idempotent=False,
+    )
@@ -5,11 +5,13 @@ from __future__ import annotations
 
 import argparse
 import inspect
+import json
 import subprocess
 import sys
 from datetime import date, datetime
+from functools import partial
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Iterator
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 if str(PROJECT_ROOT) not in sys.path:
@@ -18,6 +20,15 @@ if str(PROJECT_ROOT) not in sys.path:
 from scripts import douyin_author_feed
 from scripts.douyin_author_feed import SHANGHAI_TZ, filter_today_videos
 from scripts.douyin_state import ProcessedVideoStore
+from scripts.pipeline_artifacts import atomic_write_text
+from scripts.stage_metrics import (
+    RunMetrics,
+    aggregate_run_metrics,
+    format_stage_summary,
+    load_run_metrics,
+    metrics_path,
+)
+from scripts.staged_pipeline import DEFAULT_QUEUE_SIZE, PipelineStage, StagedExecutor, format_throughput_report
 
 
 DEFAULT_AUTHOR_URL = (
@@ -26,9 +37,17 @@ DEFAULT_AUTHOR_URL = (
 )
 DEFAULT_AUTHOR_ID = "MS4wLjABAAAAWGs2N4r_PbCH8uXi07DlK8G5T-dz2EA_bnoWb00V5BaR_-LdVLMDxIfqFbU8qbwX"
 DEFAULT_STATE_FILE = Path("data/processed_douyin_videos.json")
+# 单视频流水线把阶段记录写在新闻产出旁边（news/<时间戳>.metrics.json），批次汇总写到这里
+DEFAULT_METRICS_DIR = Path("news")
+DEFAULT_BATCH_REPORT_DIR = Path("data/pipeline_reports")
+# 分阶段执行时各阶段的默认线程数：下载和大模型调用主要在等网络，转写独占 CPU/GPU；
+# 总结用本地 Qwen 模型时也是独占计算，见 default_stage_workers()
+DEFAULT_STAGE_WORKERS = {"download": 2, "extract_audio": 1, "transcribe": 1, "summarize": 2}
 
 VideoFetcher = Callable[[str], list[dict[str, Any]]]
 SingleVideoRunner = Callable[..., int]
+# 接收 (video_url, published_at) 列表，按完成顺序产出 (列表下标, 是否成功)
+StagedVideoRunner = Callable[[list[tuple[str, str]]], Iterator[tuple[int, bool]]]
 
 
 def _is_non_empty_string(value: Any) -> bool:
@@ -139,14 +158,20 @@ def run_daily_pipeline(
     process_all_history: bool = False,
     fetch_author_videos: VideoFetcher | None = None,
     run_single_video: SingleVideoRunner | None = None,
+    run_videos_staged: StagedVideoRunner | None = None,
+    metrics_dir: str | Path = DEFAULT_METRICS_DIR,
+    batch_report_dir: str | Path = DEFAULT_BATCH_REPORT_DIR,
 ) -> int:
     """运行作者当天未处理视频的批处理流程。
 
     `fetch_author_videos` 返回的视频记录在进入单视频流水线前必须满足
     `validate_video_record()` 的字段契约；不合法记录记为失败，但不会中断整批。
+    传入 `run_videos_staged` 时所有待处理视频交给它分阶段重叠执行，否则逐个调用单视频流水线。
+    结束后把本批次各视频的阶段记录汇总写入 `batch_report_dir`。
     """
+    batch_started_at = datetime.now().isoformat(timespec="seconds")
     fetcher = fetch_author_videos or _default_fetch_author_videos
-    single_video_runner = run_single_video or _run_single_video_pipeline
+    single_video_runner = run_single_video or _run_single_video_subprocess
     store = ProcessedVideoStore(state_file)
 
     videos = fetcher(author_url)
@@ -156,6 +181,7 @@ def run_daily_pipeline(
         candidate_videos, invalid_count = normalize_today_videos(videos, target_day=target_day)
     exit_code = 1 if invalid_count > 0 else 0
 
+    pending: list[tuple[str, str, str]] = []
     for video in candidate_videos:
         validated = validate_video_record(video)
         if validated is None:
@@ -165,12 +191,9 @@ def run_daily_pipeline(
         video_id, video_url, published_at = validated
         if store.is_processed(author_id, video_id):
             continue
+        pending.append(validated)
 
-        result = _run_single_video_with_timestamp(single_video_runner, video_url, published_at)
-        if result != 0:
-            exit_code = 1
-            continue
-
+    def record(video_id: str, video_url: str, published_at: str) -> None:
         store.record_processed(
             author_id=author_id,
             video_id=video_id,
@@ -179,28 +202,150 @@ def run_daily_pipeline(
             processed_at=datetime.now(SHANGHAI_TZ).isoformat(),
         )
 
+    if run_videos_staged is not None:
+        if pending:
+            for index, ok in run_videos_staged([(video_url, published_at) for _, video_url, published_at in pending]):
+                if ok:
+                    record(*pending[index])
+                else:
+                    exit_code = 1
+    else:
+        for video_id, video_url, published_at in pending:
+            result = _run_single_video_with_timestamp(single_video_runner, video_url, published_at)
+            if result != 0:
+                exit_code = 1
+                continue
+            record(video_id, video_url, published_at)
+
+    write_batch_metrics(
+        [_published_at_to_timestamp(published_at) for _, _, published_at in pending],
+        metrics_dir,
+        batch_report_dir,
+        batch_started_at,
+    )
     return exit_code
 
 
+def write_batch_metrics(
+    timestamps: list[str],
+    metrics_dir: str | Path,
+    batch_report_dir: str | Path,
+    batch_started_at: str,
+) -> Path | None:
+    """汇总本批次各视频的阶段记录；只统计本批次开始后写入的记录，没有记录时不写文件。"""
+    runs = []
+    for timestamp in timestamps:
+        run = load_run_metrics(metrics_path(metrics_dir, timestamp))
+        if run is not None and run.get("started_at", "") >= batch_started_at:
+            runs.append(run)
+    if not runs:
+        return None
+
+    report = aggregate_run_metrics(runs)
+    report["batch_started_at"] = batch_started_at
+    report_dir = Path(batch_report_dir)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    path = report_dir / f"batch-{datetime.fromisoformat(batch_started_at).strftime('%Y%m%d-%H%M%S')}.json"
+    atomic_write_text(path, json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"📊 本批次 {report['succeeded']}/{report['runs']} 个视频成功，阶段汇总: {path}")
+    print(format_stage_summary(report))
+    return path
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="处理抖音作者当天未处理视频")
     parser.add_argument("--author-url", default=DEFAULT_AUTHOR_URL, help="抖音作者主页 URL")
     parser.add_argument("--author-id", default=DEFAULT_AUTHOR_ID, help="抖音作者唯一 ID")
     parser.add_argument("--state-file", default=str(DEFAULT_STATE_FILE), help="已处理状态文件路径")
     parser.add_argument("--all-history", action="store_true", help="处理全部历史未处理视频")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--in-process",
+        action="store_true",
+        help="在当前进程内依次处理各视频，模型整批只加载一次（默认每个视频启动独立的 run_pipeline.py 进程）",
+    )
+    mode.add_argument(
+        "--staged",
+        action="store_true",
+        help="下载、提取音频、转写、总结各用独立的线程和有界队列，不同视频同时处在不同阶段",
+    )
+    parser.add_argument(
+        "--stage-workers",
+        action="append",
+        default=[],
+        metavar="STAGE=N",
+        help=(
+            f"分阶段执行时某个阶段的线程数，可重复指定 (默认: {_format_stage_workers(DEFAULT_STAGE_WORKERS)}，"
+            "使用本地 Qwen 模型总结时 summarize=1)"
+        ),
+    )
+    parser.add_argument(
+        "--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help=f"阶段之间的队列长度 (默认: {DEFAULT_QUEUE_SIZE})"
+    )
+    parser.add_argument("--throughput-report", help="分阶段执行结束后把吞吐报告写入该 JSON 文件")
+    parser.add_argument(
+        "--worker-socket",
+        help="把转写和总结提交给 scripts/pipeline_worker.py 常驻工作进程，模型在多次批处理之间保持加载",
+    )
     return parser
 
 
 def main(argv: list[str] | None = None) -> int:
-    args = build_parser().parse_args(argv)
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    run_videos_staged = None
+    if args.staged:
+        try:
+            stage_workers = _parse_stage_workers(args.stage_workers)
+        except ValueError as exc:
+            parser.error(str(exc))
+        run_videos_staged = partial(
+            _run_videos_staged,
+            stage_workers=stage_workers,
+            queue_size=args.queue_size,
+            report_file=args.throughput_report,
+            worker_socket=args.worker_socket,
+        )
+
+    if args.in_process:
+        run_single_video = partial(_run_single_video_pipeline, worker_socket=args.worker_socket)
+    else:
+        run_single_video = partial(_run_single_video_subprocess, worker_socket=args.worker_socket)
     return run_daily_pipeline(
         author_url=args.author_url,
         author_id=args.author_id,
         state_file=args.state_file,
         process_all_history=args.all_history,
+        run_single_video=run_single_video,
+        run_videos_staged=run_videos_staged,
     )
 
 
+def _format_stage_workers(workers: dict[str, int]) -> str:
+    return ",".join(f"{name}={count}" for name, count in workers.items())
+
+
+def default_stage_workers() -> dict[str, int]:
+    """各阶段的默认线程数；本地 Qwen 模型一次只能跑一个生成，多开总结线程只会争抢同一个模型。"""
+    from scripts import run_pipeline
+
+    workers = dict(DEFAULT_STAGE_WORKERS)
+    if run_pipeline.uses_local_qwen_model():
+        workers["summarize"] = 1
+    return workers
+
+
+def _parse_stage_workers(values: list[str]) -> dict[str, int]:
+    """只返回命令行显式指定的阶段，其余阶段在运行时取 default_stage_workers()。"""
+    workers: dict[str, int] = {}
+    for value in values:
+        name, _, count = value.partition("=")
+        if name not in DEFAULT_STAGE_WORKERS or not count.isdigit() or int(count) < 1:
+            raise ValueError(f"invalid --stage-workers value: {value}")
+        workers[name] = int(count)
+    return workers
+
+
 def _default_fetch_author_videos(author_url: str) -> list[dict[str, Any]]:
     fetcher = getattr(douyin_author_feed, "get_author_videos", None)
     if fetcher is None:
@@ -215,13 +360,79 @@ def _published_at_to_timestamp(published_at: str) -> str:
     return parsed.strftime("%Y%m%d-%H%M")
 
 
-def _run_single_video_pipeline(video_url: str, published_at: str) -> int:
+def _run_single_video_pipeline(video_url: str, published_at: str, worker_socket: str | None = None) -> int:
+    """在当前进程内执行单视频流水线，同一批次的视频复用已导入的模块和已加载的模型。
+
+    模型和显存在整批期间保持占用，某个视频让进程崩溃时整批中止，所以只在 --in-process 时使用。
+    """
+    from scripts import run_pipeline
+
+    timestamp = _published_at_to_timestamp(published_at)
+    ok = run_pipeline.run_video_pipeline(video_url, timestamp, in_process=True, worker_socket=worker_socket)
+    return 0 if ok else 1
+
+
+def _run_videos_staged(
+    videos: list[tuple[str, str]],
+    stage_workers: dict[str, int] | None = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    report_file: str | Path | None = None,
+    worker_socket: str | None = None,
+) -> Iterator[tuple[int, bool]]:
+    """在当前进程内分阶段重叠执行多个视频，结束后打印吞吐报告。
+
+    worker_socket 指向可用的常驻工作进程时，转写和总结阶段把任务提交给它。
+    """
+    from scripts import run_pipeline
+    from scripts.pipeline_worker import WorkerClient
+    from scripts.stage_cache import DEFAULT_CACHE_DIR, StageCache
+
+    if not run_pipeline.check_prerequisites() or not run_pipeline.check_ai_model_config():
+        for index in range(len(videos)):
+            yield index, False
+        return
+
+    workers = {**default_stage_workers(), **(stage_workers or {})}
+    stages = [PipelineStage(name, func, workers[name]) for name, func in run_pipeline.VIDEO_STAGES]
+    executor = StagedExecutor(stages, queue_size=queue_size)
+    cache = StageCache(DEFAULT_CACHE_DIR)
+    worker = WorkerClient(worker_socket) if worker_socket else None
+    if worker is not None and not worker.available():
+        print(f"⚠️  常驻工作进程不可达: {worker_socket}，在当前进程内执行")
+        worker = None
+    jobs = []
+    for video_url, published_at in videos:
+        timestamp = _published_at_to_timestamp(published_at)
+        jobs.append(
+            run_pipeline.VideoJob(
+                video_url,
+                timestamp,
+                cache=cache,
+                metrics=RunMetrics(video_url, timestamp, mode="staged"),
+                worker=worker,
+            )
+        )
+    for result in executor.run(jobs):
+        job = jobs[result.index]
+        job.close()
+        run_pipeline.write_run_metrics(job.metrics, DEFAULT_METRICS_DIR)
+        yield result.index, result.ok
+
+    report = executor.report()
+    print(format_throughput_report(report))
+    if report_file is not None:
+        Path(report_file).parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(report_file, json.dumps(report, ensure_ascii=False, indent=2))
+
+
+def _run_single_video_subprocess(video_url: str, published_at: str, worker_socket: str | None = None) -> int:
+    """每个视频一个独立的 run_pipeline.py 进程，视频之间互不影响；默认的执行方式。"""
     script_path = Path(__file__).with_name("run_pipeline.py")
     timestamp = _published_at_to_timestamp(published_at)
-    result = subprocess.run(
-        [sys.executable, str(script_path), video_url, "--timestamp", timestamp],
-        check=False,
-    )
+    command = [sys.executable, str(script_path), video_url, "--timestamp", timestamp]
+    if worker_socket:
+        command += ["--worker-socket", str(worker_socket)]
+    result = subprocess.run(command, check=False)
     return int(result.returncode)
 
 
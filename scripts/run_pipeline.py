@@ -5,10 +5,11 @@
 支持多种AI模型：通义千问、OpenAI、本地模型
 """
 
+import os
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
-import time
 from datetime import datetime
 import argparse
 
@@ -17,11 +18,24 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 try:
-    from config import AI_MODEL_TYPE, QWEN_API_KEY, OPENAI_API_KEY, LOCAL_API_URL, LOCAL_MODEL_NAME
+    from config import AI_MODEL_TYPE, QWEN_API_KEY, OPENAI_API_KEY, LOCAL_API_URL, LOCAL_MODEL_NAME, LOCAL_MODEL_PATH
+    from config import QWEN_API_URL, MODEL_NAME, SEGMENT_SECONDS, SUMMARY_PROMPT
 except ImportError:
     print("❌ 无法导入配置文件，请确保config.py存在")
     sys.exit(1)
 
+from scripts.audio_windows import DEFAULT_SEGMENTATION, SEGMENTATION_MODES
+
+try:
+    from config import SEGMENTATION
+except ImportError:  # 旧的 config.py 没有这一项
+    SEGMENTATION = DEFAULT_SEGMENTATION
+
+from scripts.pipeline_artifacts import commit_artifact, temp_artifact_path
+from scripts.pipeline_workspace import RunWorkspace
+from scripts.stage_cache import DEFAULT_CACHE_DIR, STAGES, StageCache, stage_key, summarize_inputs, transcribe_inputs
+from scripts.stage_metrics import RunMetrics, aggregate_run_metrics, format_stage_summary
+
 def run_script(script_name, description, args=None):
     """运行指定的Python脚本"""
     print(f"\n{'='*60}")
@@ -48,12 +62,56 @@ def run_script(script_name, description, args=None):
         print(f"❌ {description} 失败: {e}")
         return False
 
+def run_stage(description, func, *args, propagate=(), **kwargs):
+    """在当前进程内执行一个流水线阶段，返回阶段函数的产出，失败时返回None
+
+    propagate 中的异常类型不算阶段失败，原样抛给调用方处理。
+    """
+    print(f"\n{'='*60}")
+    print(f"🚀 {description}")
+    print(f"{'='*60}")
+    
+    try:
+        result = func(*args, **kwargs)
+    except propagate:
+        raise
+    except Exception as e:
+        print(f"❌ {description} 失败: {e}")
+        return None
+    
+    if not result:
+        print(f"❌ {description} 失败")
+        return None
+    print(f"✅ {description} 完成")
+    return result
+
+def run_cached_stage(description, stage, inputs, timestamp, compute, cache=None, force_stages=(), output_dir="news"):
+    """带阶段缓存地执行一个产出 <output_dir>/<时间戳>* 文件的阶段
+
+    inputs 描述阶段的输入（内容哈希与相关配置）；命中缓存时把缓存的产出放到本次时间戳的文件并跳过 compute，
+    stage 在 force_stages 中时忽略缓存重新计算并覆盖缓存。compute 返回产出路径，失败时返回None。
+    """
+    if cache is None:
+        return compute()
+    key = stage_key(stage, inputs)
+    if stage in force_stages:
+        print(f"♻️  强制重新执行阶段: {stage}")
+    else:
+        cached = cache.restore(stage, key, timestamp, output_dir)
+        if cached:
+            print(f"⚡ {description} 命中阶段缓存，跳过执行: {cached}")
+            return cached
+    output_path = compute()
+    if output_path:
+        cache.store(stage, key, output_path, timestamp)
+    return output_path
+
 def check_prerequisites():
     """检查前置条件"""
     print("🔍 检查前置条件...")
     
-    # 检查必要的目录
-    required_dirs = ["downloads", "segments", "news"]
+    # 检查必要的目录（下载文件和音频切片放在每次运行自己的工作目录中）
+    required_dirs = ["news"]
     for dir_name in required_dirs:
         Path(dir_name).mkdir(exist_ok=True)
         print(f"✅ 目录 {dir_name} 已准备")
@@ -99,62 +157,48 @@ def check_ai_model_config():
     
     return True
 
-def convert_mp4_to_mp3():
-    """将MP4文件转换为MP3"""
-    print("🎵 开始转换MP4为MP3...")
-    
-    downloads_dir = Path("downloads")
-    if not downloads_dir.exists():
-        print("❌ downloads目录不存在")
-        return False
-    
-    # 查找MP4文件
-    mp4_files = list(downloads_dir.glob("*.mp4"))
-    if not mp4_files:
-        print("❌ 未找到MP4文件")
-        return False
-    
-    print(f"找到 {len(mp4_files)} 个MP4文件")
-    
-    success_count = 0
-    for mp4_file in mp4_files:
-        try:
-            mp3_file = mp4_file.with_suffix('.mp3')
-            print(f"转换: {mp4_file.name} -> {mp3_file.name}")
-            
-            # 使用ffmpeg转换
-            cmd = [
-                "ffmpeg", "-i", str(mp4_file),
-                "-vn",  # 不包含视频
-                "-acodec", "libmp3lame",  # 使用MP3编码器
-                "-ar", "16000",  # 采样率16kHz
-                "-ac", "1",  # 单声道
-                "-q:a", "2",  # 音频质量
-                "-y",  # 覆盖输出文件
-                str(mp3_file)
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+def convert_to_mp3(mp4_file):
+    """把单个MP4转换为16kHz单声道MP3并删除MP4，返回MP3路径，失败时返回None
+
+    ffmpeg 先写临时文件，成功后 fsync 并原子重命名，返回的路径上总是完整的MP3。
+    """
+    mp4_file = Path(mp4_file)
+    mp3_file = mp4_file.with_suffix('.mp3')
+    temp_file = temp_artifact_path(mp3_file)
+    try:
+        print(f"转换: {mp4_file.name} -> {mp3_file.name}")
+        
+        # 使用ffmpeg转换
+        cmd = [
+            "ffmpeg", "-i", str(mp4_file),
+            "-vn",  # 不包含视频
+            "-acodec", "libmp3lame",  # 使用MP3编码器
+            "-ar", "16000",  # 采样率16kHz
+            "-ac", "1",  # 单声道
+            "-q:a", "2",  # 音频质量
+            "-f", "mp3",  # 临时文件没有.mp3后缀，显式指定格式
+            "-y",  # 覆盖输出文件
+            str(temp_file)
+        ]
+        
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        
+        if result.returncode == 0:
+            commit_artifact(temp_file, mp3_file)
+            print(f"✅ 转换成功: {mp3_file.name}")
+            # 删除原始MP4文件
+            mp4_file.unlink()
+            print(f"🧹 已删除: {mp4_file.name}")
+            return mp3_file
+        else:
+            print(f"❌ 转换失败: {mp3_file.name}")
+            print(f"错误: {result.stderr}")
             
-            if result.returncode == 0:
-                print(f"✅ 转换成功: {mp3_file.name}")
-                # 删除原始MP4文件
-                mp4_file.unlink()
-                print(f"🧹 已删除: {mp4_file.name}")
-                success_count += 1
-            else:
-                print(f"❌ 转换失败: {mp3_file.name}")
-                print(f"错误: {result.stderr}")
-                
-        except Exception as e:
-            print(f"❌ 转换异常 {mp4_file.name}: {e}")
-    
-    if success_count > 0:
-        print(f"✅ 成功转换 {success_count} 个文件")
-        return True
-    else:
-        print("❌ 没有成功转换任何文件")
-        return False
+    except Exception as e:
+        print(f"❌ 转换异常 {mp4_file.name}: {e}")
+    if temp_file.exists():
+        temp_file.unlink()
+    return None
 
 def get_ai_summary_script_and_args(timestamp):
     """根据配置获取AI总结脚本和参数"""
@@ -186,75 +230,405 @@ def get_ai_summary_script_and_args(timestamp):
     
     return script_name, args
 
-def main():
-    """主函数"""
-    print("🎯 新闻处理流水线启动")
-    print("📋 流程：下载抖音视频 -> MP4转MP3 -> 转文字 -> AI总结 -> Git提交")
+def summary_model_config():
+    """参与总结缓存键的模型配置，与 summarize_in_process 和 get_ai_summary_script_and_args 选择的模型一致"""
+    if AI_MODEL_TYPE == "qwen":
+        return {"type": "qwen", "api_url": QWEN_API_URL}
+    if AI_MODEL_TYPE == "openai":
+        from scripts.openai_news_summary import DEFAULT_MODEL, DEFAULT_OPENAI_API_URL
+        return {
+            "type": "openai",
+            "api_url": os.environ.get("OPENAI_API_URL") or DEFAULT_OPENAI_API_URL,
+            "model": os.environ.get("OPENAI_MODEL") or DEFAULT_MODEL,
+        }
+    return {"type": AI_MODEL_TYPE, "api_url": LOCAL_API_URL, "model": LOCAL_MODEL_NAME, "model_path": LOCAL_MODEL_PATH}
 
-    parser = argparse.ArgumentParser(description="执行单个抖音视频文档流水线")
-    parser.add_argument("douyin_url", help="抖音视频链接")
-    parser.add_argument("--timestamp", help="输出命名使用的时间戳，格式 YYYYMMDD-HHMM")
-    args = parser.parse_args()
+def run_summary_script(script_name, description, args):
+    """子进程模式下运行总结脚本，总结文件名包含AI生成的标题，由脚本通过 --result-file 回报确切路径"""
+    fd, result_file = tempfile.mkstemp(prefix="summary-", suffix=".path")
+    os.close(fd)
+    try:
+        if not run_script(script_name, description, args + ["--result-file", result_file]):
+            return None
+        reported = Path(result_file).read_text(encoding="utf-8").strip()
+    finally:
+        os.unlink(result_file)
+    if not reported or not Path(reported).exists():
+        print("❌ 总结脚本没有回报产出文件")
+        return None
+    return Path(reported)
 
-    douyin_url = args.douyin_url
-    print(f"🎬 目标视频: {douyin_url}")
+def uses_local_qwen_model():
+    """本地模式且模型名包含qwen时，总结由 transformers 直接加载本地Qwen模型完成"""
+    return AI_MODEL_TYPE == "local" and bool(LOCAL_MODEL_NAME) and "qwen" in LOCAL_MODEL_NAME.lower()
 
-    timestamp = args.timestamp or datetime.now().strftime("%Y%m%d-%H%M")
-    print(f"📅 本次流水线时间戳: {timestamp}")
-    
-    # 检查前置条件
-    if not check_prerequisites():
-        print("❌ 前置条件检查失败，请检查脚本文件")
-        return
+def configured_local_model_path():
+    return LOCAL_MODEL_PATH if LOCAL_MODEL_PATH and LOCAL_MODEL_PATH != "/path/to/your/local/model" else None
+
+def warm_summary_model():
+    """预先加载总结用的本地Qwen模型，返回模型路径；其他模型走HTTP接口，无需加载，返回None"""
+    if not uses_local_qwen_model():
+        return None
+    from scripts import qwen_news_summary
+    model_path = configured_local_model_path() or qwen_news_summary.DEFAULT_LOCAL_MODEL_PATH
+    qwen_news_summary.load_local_model(model_path)
+    return model_path
+
+def summarize_in_process(news_file, timestamp, output_dir=None):
+    """根据配置在当前进程内调用AI总结，参数与 get_ai_summary_script_and_args 的命令行一致"""
+    description = "步骤3: AI总结和投资建议"
+    if AI_MODEL_TYPE == "qwen":
+        from scripts import qwen_news_summary
+        print(f"🤖 使用通义千问模型进行AI总结")
+        return run_stage(description, qwen_news_summary.summarize_news, news_file, timestamp, output_dir=output_dir)
+    if AI_MODEL_TYPE == "openai":
+        from scripts import openai_news_summary
+        print(f"🤖 使用OpenAI模型进行AI总结")
+        return run_stage(description, openai_news_summary.summarize_news, news_file, timestamp, output_dir=output_dir)
+    if AI_MODEL_TYPE == "local":
+        print(f"🤖 使用本地模型进行AI总结: {LOCAL_MODEL_NAME}")
+        if uses_local_qwen_model():
+            from scripts import qwen_news_summary
+            return run_stage(
+                description, qwen_news_summary.summarize_news, news_file, timestamp, output_dir=output_dir,
+                use_local=True, local_model_path=configured_local_model_path()
+            )
+        # 使用OpenAI兼容的本地服务
+        from scripts import openai_news_summary
+        model = LOCAL_MODEL_NAME if LOCAL_MODEL_NAME and LOCAL_MODEL_NAME != "qwen2.5:7b" else None
+        return run_stage(
+            description, openai_news_summary.summarize_news, news_file, timestamp, output_dir=output_dir,
+            api_url=LOCAL_API_URL, model=model, use_local=True
+        )
+    print(f"❌ 不支持的模型类型: {AI_MODEL_TYPE}")
+    return None
+
+class VideoJob:
+    """单个视频在进程内流水线中的状态，各阶段函数依次填充产出路径
+
+    未传入 workspace 时由下载阶段按 workspace_options 创建独立工作目录，close() 时清理。
+    各阶段的耗时与资源记录保存在 metrics（RunMetrics）中。
+    传入 worker（pipeline_worker.WorkerClient）时转写和总结提交给常驻工作进程执行。
+    segmentation 是转写的切片方式（fixed/vad），同时计入转写阶段的缓存键。
+    """
+
+    def __init__(self, douyin_url, timestamp, workspace=None, stream_audio=False, cache=None, force_stages=(),
+                 workspace_options=None, metrics=None, worker=None, segmentation=SEGMENTATION):
+        self.douyin_url = douyin_url
+        self.worker = worker
+        self.segmentation = segmentation
+        self.timestamp = timestamp
+        self.metrics = metrics or RunMetrics(douyin_url, timestamp)
+        self.workspace = workspace
+        self.stream_audio = stream_audio
+        self.cache = cache
+        self.force_stages = force_stages
+        self.workspace_options = workspace_options or {}
+        self.media_path = None
+        self.audio_path = None
+        self.news_file = None
+        self.summary_file = None
+        self._owns_workspace = False
+
+    def open_workspace(self):
+        if self.workspace is None:
+            self.workspace = RunWorkspace(self.timestamp, **self.workspace_options).create()
+            self._owns_workspace = True
+        return self.workspace
+
+    def close(self):
+        if self._owns_workspace:
+            self.workspace.cleanup()
+
+def download_stage(job):
+    """步骤1: 下载抖音视频（流水线只需要音频，下载码率最低的版本即可）"""
+    from scripts import douyin_download
     
-    # 检查AI模型配置
-    if not check_ai_model_config():
-        print("❌ AI模型配置检查失败，请检查config.py")
-        return
+    workspace = job.open_workspace()
+    media_path = run_stage(
+        "步骤1: 下载抖音视频", douyin_download.download_url,
+        job.douyin_url, str(workspace.downloads_dir), audio_only=job.stream_audio, lowest_bitrate=True,
+        use_store="download" not in job.force_stages
+    )
+    if not media_path:
+        print("❌ 第一步失败，停止执行")
+        return None
+    job.media_path = Path(media_path)
+    return job
+
+def extract_audio_stage(job):
+    """步骤1.5: MP4转MP3（流式模式下载时已提取音频，除非回退为下载MP4）"""
+    if job.media_path.suffix == ".mp3":
+        print("🎵 下载时已直接提取音频，跳过MP4转MP3")
+        job.audio_path = job.media_path
+        return job
+    job.audio_path = run_stage("步骤1.5: MP4转MP3", convert_to_mp3, job.media_path)
+    if not job.audio_path:
+        print("❌ MP4转MP3失败，停止执行")
+        return None
+    return job
+
+def drop_worker(job, error):
+    """常驻工作进程中途不可达（空闲退出、崩溃）时改为在当前进程内执行，该视频的后续阶段也不再提交给它"""
+    print(f"⚠️  常驻工作进程不可达: {error}，改为在当前进程内执行")
+    job.worker = None
+
+def transcribe_stage(job):
+    """步骤2: MP3转文字（首次调用时才导入 whisper，命中缓存时不加载模型）"""
+    def transcribe():
+        if job.worker is not None:
+            from scripts.pipeline_worker import WorkerError
+            try:
+                return run_stage(
+                    "步骤2: MP3转文字（常驻工作进程）", job.worker.transcribe,
+                    job.audio_path, job.timestamp, "news", job.workspace.segments_dir, segmentation=job.segmentation,
+                    propagate=(WorkerError,)
+                )
+            except WorkerError as e:
+                drop_worker(job, e)
+        from scripts import mp3_2_txt
+        return run_stage(
+            "步骤2: MP3转文字", mp3_2_txt.transcribe_audio, str(job.audio_path), job.timestamp,
+            segment_dir=job.workspace.segments_dir, segmentation=job.segmentation
+        )
+    job.news_file = run_cached_stage(
+        "步骤2: MP3转文字", "transcribe",
+        transcribe_inputs(job.audio_path, MODEL_NAME, SEGMENT_SECONDS, job.segmentation) if job.cache else None,
+        job.timestamp, transcribe, job.cache, job.force_stages
+    )
+    if not job.news_file:
+        print("❌ 第二步失败，停止执行")
+        return None
+    return job
+
+def summarize_stage(job):
+    """步骤3: AI总结（根据配置选择模型）"""
+    def summarize():
+        if job.worker is not None:
+            from scripts.pipeline_worker import WorkerError
+            try:
+                return run_stage(
+                    "步骤3: AI总结和投资建议（常驻工作进程）", job.worker.summarize, job.news_file, job.timestamp, "news",
+                    propagate=(WorkerError,)
+                )
+            except WorkerError as e:
+                drop_worker(job, e)
+        return summarize_in_process(job.news_file, job.timestamp)
+    job.summary_file = run_cached_stage(
+        "步骤3: AI总结和投资建议", "summarize",
+        summarize_inputs(job.news_file, SUMMARY_PROMPT, summary_model_config()) if job.cache else None,
+        job.timestamp, summarize, job.cache, job.force_stages
+    )
+    if not job.summary_file:
+        print("❌ 第三步失败，停止执行")
+        return None
+    return job
+
+def measured_stage(name, stage, input_attr=None, output_attr=None):
+    """包装阶段函数，把耗时与资源记录写入 job.metrics，输入和产出文件取自 job 上对应的属性"""
+    def run(job):
+        inputs = [getattr(job, input_attr)] if input_attr else []
+        with job.metrics.stage(name, inputs) as record:
+            result = stage(job)
+            record.ok = bool(result)
+            if output_attr:
+                record.add_output(getattr(job, output_attr))
+        return result
+    return run
+
+# 进程内流水线的阶段，staged_pipeline 按这个顺序让多个视频重叠执行
+VIDEO_STAGES = (
+    ("download", measured_stage("download", download_stage, output_attr="media_path")),
+    ("extract_audio", measured_stage("extract_audio", extract_audio_stage, "media_path", "audio_path")),
+    ("transcribe", measured_stage("transcribe", transcribe_stage, "audio_path", "news_file")),
+    ("summarize", measured_stage("summarize", summarize_stage, "news_file", "summary_file")),
+)
+
+def run_stages_in_process(douyin_url, timestamp, workspace, stream_audio=False, cache=None, force_stages=(),
+                          metrics=None, worker=None, segmentation=SEGMENTATION):
+    """在当前进程内依次执行各阶段，阶段之间直接传递产出文件的路径
+
+    下载文件和音频切片都写在 workspace（RunWorkspace）中。传入 cache（StageCache）时，
+    转写和总结阶段按输入内容命中缓存即跳过，force_stages 中的阶段总是重新执行。
+
+    Whisper 模型在进程内只加载一次，批处理多个视频时不再重复启动解释器和导入 torch。
+    各阶段的耗时与资源记录写入 metrics（RunMetrics）；传入 worker 时转写和总结交给常驻工作进程。
+    segmentation 是转写的切片方式（fixed/vad）。成功时返回总结文件路径，任一阶段失败时返回None。
+    """
+    job = VideoJob(
+        douyin_url, timestamp, workspace, stream_audio, cache, force_stages, metrics=metrics, worker=worker,
+        segmentation=segmentation
+    )
+    for _name, stage in VIDEO_STAGES:
+        if not stage(job):
+            return None
+    return job.summary_file
+
+def run_stages_subprocess(douyin_url, timestamp, workspace, stream_audio=False, cache=None, force_stages=(),
+                          metrics=None, segmentation=SEGMENTATION):
+    """每个阶段启动一个子进程执行对应脚本
+
+    下载文件以时间戳命名并写入 workspace，后续阶段通过命令行参数拿到上一阶段产出的确切路径；
+    各阶段的产出都是 fsync 后原子重命名的，子进程退出时文件已经完整，不需要等待。
+    阶段缓存的用法与 run_stages_in_process 相同，命中时不启动对应的子进程。
+    各阶段的耗时与资源记录写入 metrics（RunMetrics）。
+    """
+    metrics = metrics or RunMetrics(douyin_url, timestamp, mode="subprocess")
+    downloads_dir = workspace.downloads_dir
+    video_path = downloads_dir / f"{timestamp}.mp4"
+    audio_path = downloads_dir / f"{timestamp}.mp3"
+    news_file = Path("news") / f"{timestamp}.txt"
     
     # 步骤1: 下载抖音视频
-    download_args = ["--url", douyin_url]
-    if not run_script("douyin_download.py", "步骤1: 下载抖音视频", download_args):
+    # 流水线只需要音频，下载码率最低的版本即可
+    download_args = ["--url", douyin_url, "--lowest-bitrate", "-o", str(downloads_dir), "-n", timestamp]
+    if stream_audio:
+        download_args.append("--audio-only")
+    if "download" in force_stages:
+        download_args.append("--no-store")
+    with metrics.stage("download") as record:
+        record.ok = run_script("douyin_download.py", "步骤1: 下载抖音视频", download_args)
+        record.add_output(video_path if video_path.exists() else audio_path)
+    if not record.ok:
         print("❌ 第一步失败，停止执行")
-        return
-    
-    # 等待一下确保文件写入完成
-    time.sleep(2)
-    
-    # 步骤1.5: MP4转MP3
-    if not convert_mp4_to_mp3():
-        print("❌ MP4转MP3失败，停止执行")
-        return
+        return False
     
-    # 等待一下确保文件写入完成
-    time.sleep(2)
+    # 步骤1.5: MP4转MP3（流式模式下载时已提取音频，除非回退为下载MP4）
+    if video_path.exists():
+        with metrics.stage("extract_audio", [video_path]) as record:
+            record.ok = bool(convert_to_mp3(video_path))
+            record.add_output(audio_path)
+        if not record.ok:
+            print("❌ MP4转MP3失败，停止执行")
+            return False
+    elif audio_path.exists():
+        print("🎵 下载时已直接提取音频，跳过MP4转MP3")
+    else:
+        print(f"❌ 未找到下载产出: {video_path} 或 {audio_path}")
+        return False
     
-    # 步骤2: MP3转文字（使用统一时间戳）
-    mp3_args = ["--timestamp", timestamp]
-    if not run_script("mp3_2_txt.py", "步骤2: MP3转文字", mp3_args):
+    # 步骤2: MP3转文字（使用统一时间戳，产出 news/<时间戳>.txt）
+    mp3_args = [
+        "--timestamp", timestamp, "--audio-path", str(audio_path), "--segment-dir", str(workspace.segments_dir),
+        "--segmentation", segmentation,
+    ]
+    def transcribe():
+        if not run_script("mp3_2_txt.py", "步骤2: MP3转文字", mp3_args):
+            return None
+        return news_file if news_file.exists() else None
+    with metrics.stage("transcribe", [audio_path]) as record:
+        news_file = run_cached_stage(
+            "步骤2: MP3转文字", "transcribe",
+            transcribe_inputs(audio_path, MODEL_NAME, SEGMENT_SECONDS, segmentation) if cache else None,
+            timestamp, transcribe, cache, force_stages
+        )
+        record.ok = bool(news_file)
+        record.add_output(news_file)
+    if not record.ok:
         print("❌ 第二步失败，停止执行")
-        return
-    
-    # 等待一下确保文件写入完成
-    time.sleep(2)
+        return False
     
     # 步骤3: AI总结（根据配置选择模型）
     script_name, summary_args = get_ai_summary_script_and_args(timestamp)
     if not script_name or not summary_args:
         print("❌ AI模型配置错误，停止执行")
-        return
+        return False
+    summary_args = summary_args + ["--news-file", str(news_file)]
     
-    if not run_script(script_name, "步骤3: AI总结和投资建议", summary_args):
+    def summarize():
+        return run_summary_script(script_name, "步骤3: AI总结和投资建议", summary_args)
+    with metrics.stage("summarize", [news_file]) as record:
+        summary_file = run_cached_stage(
+            "步骤3: AI总结和投资建议", "summarize",
+            summarize_inputs(news_file, SUMMARY_PROMPT, summary_model_config()) if cache else None,
+            timestamp, summarize, cache, force_stages
+        )
+        record.ok = bool(summary_file)
+        record.add_output(summary_file)
+    if not record.ok:
         print("❌ 第三步失败，停止执行")
-        return
-    
-    # 等待一下确保文件写入完成
-    time.sleep(2)
+        return False
     
     # 步骤4: Git提交
     # if not run_script("git_commit.py", "步骤4: Git提交和推送"):
     #     print("❌ 第四步失败")
-    #     return
+    #     return False
+    return True
+
+def write_run_metrics(metrics, output_dir="news"):
+    """把本次运行的阶段记录写到新闻产出旁边，并打印各阶段耗时"""
+    report = metrics.to_dict()
+    if not report["stages"]:
+        return None
+    try:
+        path = metrics.write(output_dir)
+    except OSError as e:
+        print(f"⚠️  写入阶段耗时记录失败: {e}")
+        return None
+    print(f"📊 各阶段耗时与资源记录: {path}")
+    print(format_stage_summary(aggregate_run_metrics([report])))
+    return path
+
+def run_video_pipeline(douyin_url, timestamp=None, stream_audio=False, in_process=False,
+                       workspace_root=None, use_tmpfs=False, keep_workspace=False,
+                       use_stage_cache=True, force_stages=(), worker_socket=None, segmentation=SEGMENTATION):
+    """执行单个抖音视频的完整流水线，成功返回True
+
+    in_process 为 True 时各阶段作为函数在当前进程内执行，否则每个阶段启动一个子进程。
+    每次运行的中间文件放在以时间戳为前缀的独立工作目录中（use_tmpfs 时放在 /dev/shm），
+    结束后删除，多个视频可以在同一台机器上同时处理。
+    无论成功与否，各阶段的耗时与资源记录都写入 news/<时间戳>.metrics.json。
+    use_stage_cache 为 True 时转写和总结按输入内容复用 data/stage_cache/ 中的产出，
+    force_stages 中的阶段（download、transcribe、summarize）忽略缓存重新执行。
+    worker_socket 指向可用的常驻工作进程时，转写和总结提交给它执行（隐含 in_process），
+    工作进程不可达时在当前进程内执行。
+    segmentation 是转写的切片方式：fixed 按 SEGMENT_SECONDS 固定切分，vad 在静音处切分并跳过静音。
+    """
+    print(f"🎬 目标视频: {douyin_url}")
+    
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d-%H%M")
+    print(f"📅 本次流水线时间戳: {timestamp}")
+    
+    # 检查前置条件
+    if not check_prerequisites():
+        print("❌ 前置条件检查失败，请检查脚本文件")
+        return False
+    
+    # 检查AI模型配置
+    if not check_ai_model_config():
+        print("❌ AI模型配置检查失败，请检查config.py")
+        return False
+    
+    worker = None
+    if worker_socket:
+        from scripts.pipeline_worker import WorkerClient
+        worker = WorkerClient(worker_socket)
+        if worker.available():
+            print(f"🛠️  转写和总结提交给常驻工作进程: {worker_socket}")
+            in_process = True
+        else:
+            print(f"⚠️  常驻工作进程不可达: {worker_socket}，在当前进程内执行")
+            worker = None
+    
+    cache = StageCache(DEFAULT_CACHE_DIR) if use_stage_cache else None
+    mode = "worker" if worker else "in-process" if in_process else "subprocess"
+    metrics = RunMetrics(douyin_url, timestamp, mode=mode)
+    try:
+        with RunWorkspace(timestamp, root=workspace_root, use_tmpfs=use_tmpfs, keep=keep_workspace) as workspace:
+            if in_process:
+                print("⚡ 进程内执行各阶段")
+                if not run_stages_in_process(
+                    douyin_url, timestamp, workspace, stream_audio, cache, force_stages, metrics=metrics, worker=worker,
+                    segmentation=segmentation
+                ):
+                    return False
+            elif not run_stages_subprocess(
+                douyin_url, timestamp, workspace, stream_audio, cache, force_stages, metrics=metrics,
+                segmentation=segmentation
+            ):
+                return False
+    finally:
+        write_run_metrics(metrics)
     
     print("\n🎉 所有步骤完成！")
     print(f"📅 本次流水线时间戳: {timestamp}")
@@ -269,6 +643,45 @@ def main():
             print(f"   📄 {file.name}")
     
     # print("🔗 文件已自动提交到Git仓库")
+    return True
+
+def main():
+    """主函数"""
+    print("🎯 新闻处理流水线启动")
+    print("📋 流程：下载抖音视频 -> MP4转MP3 -> 转文字 -> AI总结 -> Git提交")
+
+    parser = argparse.ArgumentParser(description="执行单个抖音视频文档流水线")
+    parser.add_argument("douyin_url", help="抖音视频链接")
+    parser.add_argument("--timestamp", help="输出命名使用的时间戳，格式 YYYYMMDD-HHMM")
+    parser.add_argument("--stream-audio", action="store_true", help="下载时直接用ffmpeg提取音频，不落盘MP4")
+    parser.add_argument("--in-process", action="store_true",
+                        help="在当前进程内调用各阶段函数，不再为每个阶段启动新的Python解释器")
+    parser.add_argument("--workspace-root", help="每次运行的工作目录所在的父目录 (默认: workspaces)")
+    parser.add_argument("--tmpfs", action="store_true", help="工作目录放在 /dev/shm 内存文件系统中")
+    parser.add_argument("--keep-workspace", action="store_true", help="运行结束后保留工作目录，便于排查问题")
+    parser.add_argument("--force-stage", action="append", choices=STAGES, default=[],
+                        help="忽略该阶段的缓存重新执行，可重复指定 (download 表示不复用制品库中的下载文件)")
+    parser.add_argument("--no-stage-cache", action="store_true", help=f"不读写阶段缓存 ({DEFAULT_CACHE_DIR})")
+    parser.add_argument("--worker-socket",
+                        help="把转写和总结提交给 scripts/pipeline_worker.py 常驻工作进程（Unix socket 路径），隐含 --in-process")
+    parser.add_argument("--segmentation", choices=SEGMENTATION_MODES, default=SEGMENTATION,
+                        help=f"转写的切片方式：fixed 按 SEGMENT_SECONDS 固定切分，vad 在静音处切分并跳过静音 (默认: {SEGMENTATION})")
+    args = parser.parse_args()
+
+    if not run_video_pipeline(
+        args.douyin_url,
+        args.timestamp,
+        args.stream_audio,
+        args.in_process,
+        workspace_root=args.workspace_root,
+        use_tmpfs=args.tmpfs,
+        keep_workspace=args.keep_workspace,
+        use_stage_cache=not args.no_stage_cache,
+        force_stages=tuple(args.force_stage),
+        worker_socket=args.worker_socket,
+        segmentation=args.segmentation,
+    ):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main() 
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""多进程并行转写音频切片。
+
+每个工作进程在 initializer 中加载一次模型，并把 CPU 核心平分给各进程的 torch 线程，
+避免 N 个进程各自开满线程互相争抢；切片按提交顺序拼回，结果与逐段转写一致。
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence
+
+
+@dataclass
+class SegmentOutcome:
+    index: int
+    name: str
+    text: str | None
+    error: str | None
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def threads_per_worker(workers: int, cpus: int | None = None) -> int:
+    """每个工作进程可用的 torch 线程数，至少为 1。"""
+    cpus = available_cpus() if cpus is None else cpus
+    return max(1, cpus // max(1, workers))
+
+
+def real_time_factor(wall_seconds: float, audio_seconds: float | None) -> float | None:
+    """转写耗时与音频时长之比，小于 1 表示比实时快。"""
+    if not audio_seconds:
+        return None
+    return wall_seconds / audio_seconds
+
+
+def _run_segment(transcribe: Callable[[Any], str], index: int, audio: Any) -> tuple[int, str | None, str | None, float]:
+    started = time.perf_counter()
+    try:
+        text, error = transcribe(audio), None
+    except Exception as exc:
+        text, error = None, str(exc)
+    return index, text, error, time.perf_counter() - started
+
+
+def transcribe_segments_parallel(
+    segments: Sequence[tuple[str, Any]],
+    transcribe: Callable[[Any], str],
+    workers: int,
+    initializer: Callable[..., None] | None = None,
+    initargs: tuple = (),
+    mp_context: str = "spawn",
+    on_done: Callable[[SegmentOutcome], None] | None = None,
+) -> list[SegmentOutcome]:
+    """用 workers 个进程转写 (名称, 音频) 切片，按切片顺序返回结果。
+
+    transcribe 和 initializer 必须是模块级函数（会被 pickle 到工作进程）；
+    单个切片抛出的异常记录在对应的 SegmentOutcome.error 中，不影响其他切片。
+    默认用 spawn 启动工作进程，不继承父进程里 torch 的线程池状态。
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    outcomes: list[SegmentOutcome | None] = [None] * len(segments)
+    if not segments:
+        return []
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(segments)),
+        mp_context=multiprocessing.get_context(mp_context),
+        initializer=initializer,
+        initargs=initargs,
+    ) as pool:
+        futures = {
+            pool.submit(_run_segment, transcribe, index, audio): index
+            for index, (_, audio) in enumerate(segments)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                _, text, error, seconds = future.result()
+            except Exception as exc:  # 工作进程异常退出（如内存不足被杀）时整个进程池不可用
+                text, error, seconds = None, f"{type(exc).__name__}: {exc}", 0.0
+            outcome = SegmentOutcome(index, segments[index][0], text, error, seconds)
+            outcomes[index] = outcome
+            if on_done is not None:
+                on_done(outcome)
+    return [outcome for outcome in outcomes if outcome is not None]
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""流水线阶段产出的缓存：按输入内容哈希和相关配置索引。
+
+转写阶段的键是音频哈希 + Whisper 模型 + 切片长度和切片方式，总结阶段的键是文字稿哈希 + 提示词 + 模型配置。
+同样的输入重跑时直接取出缓存的产出，跳过转写和大模型调用。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from scripts.audio_windows import DEFAULT_SEGMENTATION
+from scripts.douyin_store import file_sha256, link_or_copy
+from scripts.pipeline_artifacts import atomic_write_text, temp_artifact_path
+
+
+DEFAULT_CACHE_DIR = Path("data/stage_cache")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# 可以通过 --force-stage 单独失效的阶段；下载阶段由制品库（douyin_store）负责去重
+STAGES = ("download", "transcribe", "summarize")
+# 阶段实现的输出格式变化时递增，使旧的缓存条目全部失效
+STAGE_CACHE_VERSION = 1
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def stage_key(stage: str, inputs: dict[str, Any]) -> str:
+    """阶段名、缓存版本和输入描述（内容哈希与配置）的 sha256。"""
+    payload = json.dumps(
+        {"stage": stage, "version": STAGE_CACHE_VERSION, "inputs": inputs},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return text_sha256(payload)
+
+
+def transcribe_inputs(
+    audio_path: str | Path, model_name: str, segment_seconds: int, segmentation: str = DEFAULT_SEGMENTATION
+) -> dict[str, Any]:
+    """segmentation 是切片方式：vad 在静音处切分（segment_seconds 为最大长度），fixed 按固定时长切分。"""
+    return {
+        "audio_sha256": file_sha256(audio_path),
+        "model": model_name,
+        "segment_seconds": segment_seconds,
+        "segmentation": segmentation,
+    }
+
+
+def summarize_inputs(news_file: str | Path, prompt: str, model: dict[str, Any]) -> dict[str, Any]:
+    return {"transcript_sha256": file_sha256(news_file), "prompt_sha256": text_sha256(prompt), "model": model}
+
+
+class StageCache:
+    """`<root>/<阶段>/<键>` 保存产出文件，`index.json` 记录产出文件名中时间戳之后的部分。
+
+    产出文件以时间戳开头（`<时间戳>.txt`、`<时间戳>_<标题>.md`）。命中时把缓存的产出硬链接为本次时间戳的文件
+    （跨文件系统时复制），后续阶段和运行结束时的产出列表都按本次时间戳找到它，且不额外占用磁盘。
+    总大小超过 `max_bytes` 时按最久未使用淘汰条目。
+    """
+
+    def __init__(
+        self,
+        root: str | Path = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def restore(self, stage: str, key: str, timestamp: str, output_dir: str | Path) -> Path | None:
+        """命中时把缓存的产出放到 `<output_dir>/<timestamp><后缀>` 并返回该路径，未命中返回 None。"""
+        with self._lock:
+            entry_id = self._entry_id(stage, key)
+            entry = self._data["entries"].get(entry_id)
+            if entry is None:
+                return None
+            cached_path = self._object_path(stage, key)
+            if not cached_path.exists() or cached_path.stat().st_size != entry["size"]:
+                self._forget(entry_id)
+                self._save()
+                return None
+            entry["last_used_at"] = int(self._clock())
+
+            artifact = Path(output_dir) / f"{timestamp}{entry['suffix']}"
+            if not self._matches(artifact, entry):
+                link_or_copy(cached_path, artifact)
+            self._save()
+            return artifact
+
+    def store(self, stage: str, key: str, output_path: str | Path, timestamp: str) -> None:
+        output_path = Path(output_path)
+        name = output_path.name
+        suffix = name[len(timestamp):] if name.startswith(timestamp) else output_path.suffix
+        cached_path = self._object_path(stage, key)
+        cached_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(cached_path, output_path.read_text(encoding="utf-8"))
+
+        with self._lock:
+            now = int(self._clock())
+            entry_id = self._entry_id(stage, key)
+            self._data["entries"][entry_id] = {
+                "stage": stage,
+                "suffix": suffix,
+                "sha256": file_sha256(cached_path),
+                "size": cached_path.stat().st_size,
+                "stored_at": now,
+                "last_used_at": now,
+            }
+            self._evict(keep=entry_id)
+            self._save()
+
+    def invalidate(self, stage: str, key: str) -> None:
+        with self._lock:
+            self._forget(self._entry_id(stage, key))
+            self._save()
+
+    @staticmethod
+    def _entry_id(stage: str, key: str) -> str:
+        return f"{stage}/{key}"
+
+    @staticmethod
+    def _matches(path: Path, entry: dict[str, Any]) -> bool:
+        try:
+            if path.stat().st_size != entry["size"]:
+                return False
+        except OSError:
+            return False
+        return file_sha256(path) == entry["sha256"]
+
+    def _object_path(self, stage: str, key: str) -> Path:
+        return self.root / stage / key
+
+    def _forget(self, entry_id: str) -> None:
+        self._data["entries"].pop(entry_id, None)
+        path = self.root / entry_id
+        if path.exists():
+            path.unlink()
+
+    def _evict(self, keep: str) -> None:
+        entries = self._data["entries"]
+        total = sum(entry["size"] for entry in entries.values())
+        least_recent = sorted(entries, key=lambda entry_id: entries[entry_id].get("last_used_at", 0))
+        for entry_id in least_recent:
+            if total <= self.max_bytes:
+                break
+            if entry_id == keep:
+                continue
+            total -= entries[entry_id]["size"]
+            self._forget(entry_id)
+
+    def _load(self) -> dict[str, Any]:
+        try:
+            with self.index_path.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            return {"version": 2, "entries": {}}
+        if not isinstance(payload, dict) or payload.get("version") != 2 or not isinstance(payload.get("entries"), dict):
+            return {"version": 2, "entries": {}}
+        return payload
+
+    def _save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        temp_path = temp_artifact_path(self.index_path)
+        with temp_path.open("w", encoding="utf-8") as handle:
+            json.dump(self._data, handle, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.index_path)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""流水线每个阶段的耗时与资源记录。
+
+每个阶段记录墙钟时间、CPU 时间、读写字节数和产出文件大小，整次运行另记进程的峰值内存，
+单次运行的记录写成 `news/<时间戳>.metrics.json`，批处理再把多次运行的记录按阶段汇总。
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，内存和子进程 CPU 记为 None
+    resource = None
+
+from scripts.pipeline_artifacts import atomic_write_text
+
+
+METRICS_SUFFIX = ".metrics.json"
+PROC_IO_PATH = Path("/proc/self/io")
+
+
+def _peak_rss_bytes() -> int | None:
+    """本进程和已结束子进程（ffmpeg、各阶段脚本）中最大的常驻内存峰值。"""
+    if resource is None:
+        return None
+    # Linux 上 ru_maxrss 的单位是 KB，macOS 上是字节
+    unit = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * unit
+
+
+def _children_cpu_seconds() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _process_io() -> dict[str, int] | None:
+    """Linux 上本进程累计的实际磁盘读写字节数，其他平台返回 None。"""
+    try:
+        text = PROC_IO_PATH.read_text(encoding="ascii")
+    except OSError:
+        return None
+    counters = dict(line.split(": ", 1) for line in text.splitlines() if ": " in line)
+    return {"read": int(counters.get("read_bytes", 0)), "write": int(counters.get("write_bytes", 0))}
+
+
+def _file_size(path: str | Path | None) -> int | None:
+    if not path:
+        return None
+    try:
+        return Path(path).stat().st_size
+    except OSError:
+        return None
+
+
+class StageRecord:
+    """一个阶段的记录；阶段结束前通过 add_output() 登记产出文件。"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ok = False
+        self.inputs: dict[str, int] = {}
+        self.outputs: list[Path] = []
+
+    def add_input(self, path: str | Path | None) -> None:
+        size = _file_size(path)
+        if size is not None:
+            self.inputs[str(path)] = size
+
+    def add_output(self, path: str | Path | None) -> None:
+        if path:
+            self.outputs.append(Path(path))
+
+
+class RunMetrics:
+    """单次流水线运行（一个视频）的阶段记录。
+
+    CPU 时间是整个进程（含 torch 等库的工作线程）的 CPU 时间加上阶段内结束的子进程的 CPU 时间，
+    读写字节数同样是进程级计数在阶段前后的差值：多个视频分阶段并发时，同时进行的阶段各自都会计入对方的消耗。
+    峰值内存只能取进程的历史最大值，分不到阶段，所以只在整次运行上记录一次。
+    """
+
+    def __init__(self, video_url: str, timestamp: str, mode: str = "in-process"):
+        self.video_url = video_url
+        self.timestamp = timestamp
+        self.mode = mode
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.stages: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, inputs: Iterable[str | Path | None] = ()) -> Iterator[StageRecord]:
+        record = StageRecord(name)
+        for path in inputs:
+            record.add_input(path)
+        io_before = _process_io()
+        children_before = _children_cpu_seconds()
+        cpu_before = time.process_time()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - started
+            cpu = time.process_time() - cpu_before
+            children = _children_cpu_seconds() - children_before
+            io_after = _process_io()
+            artifacts = {str(path): _file_size(path) for path in record.outputs}
+            entry = {
+                "stage": name,
+                "ok": record.ok,
+                "wall_seconds": round(wall, 3),
+                "cpu_seconds": round(cpu + children, 3),
+                "child_cpu_seconds": round(children, 3),
+                "bytes_in": sum(record.inputs.values()),
+                "bytes_out": sum(size for size in artifacts.values() if size),
+                "io_read_bytes": io_after["read"] - io_before["read"] if io_before and io_after else None,
+                "io_write_bytes": io_after["write"] - io_before["write"] if io_before and io_after else None,
+                "inputs": record.inputs,
+                "artifacts": artifacts,
+            }
+            with self._lock:
+                self.stages.append(entry)
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            stages = list(self.stages)
+        return {
+            "version": 1,
+            "video_url": self.video_url,
+            "timestamp": self.timestamp,
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "ok": bool(stages) and all(stage["ok"] for stage in stages),
+            "wall_seconds": round(sum(stage["wall_seconds"] for stage in stages), 3),
+            "peak_rss_bytes": _peak_rss_bytes(),
+            "stages": stages,
+        }
+
+    def write(self, output_dir: str | Path) -> Path:
+        path = metrics_path(output_dir, self.timestamp)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return atomic_write_text(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+
+
+def metrics_path(output_dir: str | Path, timestamp: str) -> Path:
+    return Path(output_dir) / f"{timestamp}{METRICS_SUFFIX}"
+
+
+def load_run_metrics(path: str | Path) -> dict[str, Any] | None:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != 1 or not isinstance(payload.get("stages"), list):
+        return None
+    return payload
+
+
+def aggregate_run_metrics(runs: list[dict[str, Any]]) -> dict[str, Any]:
+    """把一批运行的记录按阶段汇总：次数、失败数、耗时合计/平均/最大、CPU 和字节数；峰值内存取各次运行的最大值。"""
+    stages: dict[str, dict[str, Any]] = {}
+    for run in runs:
+        for entry in run["stages"]:
+            totals = stages.setdefault(
+                entry["stage"],
+                {
+                    "runs": 0,
+                    "failed": 0,
+                    "wall_seconds": 0.0,
+                    "max_wall_seconds": 0.0,
+                    "cpu_seconds": 0.0,
+                    "bytes_in": 0,
+                    "bytes_out": 0,
+                },
+            )
+            totals["runs"] += 1
+            totals["failed"] += 0 if entry["ok"] else 1
+            totals["wall_seconds"] += entry["wall_seconds"]
+            totals["max_wall_seconds"] = max(totals["max_wall_seconds"], entry["wall_seconds"])
+            totals["cpu_seconds"] += entry["cpu_seconds"]
+            totals["bytes_in"] += entry["bytes_in"]
+            totals["bytes_out"] += entry["bytes_out"]
+
+    for totals in stages.values():
+        totals["mean_wall_seconds"] = round(totals["wall_seconds"] / totals["runs"], 3)
+        totals["wall_seconds"] = round(totals["wall_seconds"], 3)
+        totals["cpu_seconds"] = round(totals["cpu_seconds"], 3)
+
+    peak_rss = [run["peak_rss_bytes"] for run in runs if run.get("peak_rss_bytes") is not None]
+    return {
+        "version": 1,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "runs": len(runs),
+        "succeeded": sum(1 for run in runs if run["ok"]),
+        "wall_seconds": round(sum(run["wall_seconds"] for run in runs), 3),
+        "peak_rss_bytes": max(peak_rss) if peak_rss else None,
+        "stages": stages,
+        "timestamps": [run["timestamp"] for run in runs],
+    }
+
+
+def format_stage_summary(report: dict[str, Any]) -> str:
+    """aggregate_run_metrics() 汇总结果的文字版，每个阶段一行，最后一行说明进程级的计数。"""
+    lines = []
+    for name, totals in report["stages"].items():
+        lines.append(
+            f"   {name:<14} {totals['runs']} 次 失败 {totals['failed']} "
+            f"耗时 {totals['wall_seconds']:.1f}s（平均 {totals['mean_wall_seconds']:.1f}s）"
+            f" CPU {totals['cpu_seconds']:.1f}s"
+        )
+    rss = report.get("peak_rss_bytes")
+    rss_text = f"{rss / 1024 / 1024:.0f}MB" if rss is not None else "-"
+    lines.append(f"   进程峰值内存 {rss_text}；CPU 为进程级计数，分阶段并发时同时进行的阶段互相计入")
+    return "\n".join(lines)
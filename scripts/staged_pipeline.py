@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""多个视频在流水线各阶段之间重叠执行的生产者/消费者调度。
+
+每个阶段有自己的工作线程和有界输入队列：下载下一个视频（网络）时上一个视频在转写（CPU/GPU），
+再上一个在等大模型返回。队列有界，下载不会远远跑在转写前面把工作目录堆满。
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator
+
+
+# 阶段之间的队列长度：下游处理不过来时上游最多再积压这么多个视频
+DEFAULT_QUEUE_SIZE = 2
+
+_STOP = object()
+
+
+@dataclass(frozen=True)
+class PipelineStage:
+    """func 接收上一阶段的产出并返回本阶段的产出；返回假值或抛出异常表示该视频在本阶段失败。"""
+
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    completed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+
+    def to_dict(self, wall_seconds: float) -> dict[str, Any]:
+        processed = self.completed + self.failed
+        capacity = wall_seconds * self.workers
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "mean_seconds": round(self.busy_seconds / processed, 3) if processed else 0.0,
+            "utilization": round(self.busy_seconds / capacity, 3) if capacity else 0.0,
+        }
+
+
+@dataclass
+class StagedResult:
+    index: int
+    ok: bool
+    payload: Any
+    failed_stage: str | None = None
+    error: BaseException | None = None
+
+
+@dataclass
+class _StageRuntime:
+    stage: PipelineStage
+    inbox: queue.Queue
+    stats: StageStats
+    remaining_workers: int
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class StagedExecutor:
+    """按 stages 的顺序处理 items，同一时刻不同的 item 可以处在不同的阶段。
+
+    run() 按完成顺序逐个产出 StagedResult（index 对应 items 中的位置），调用方可以边产出边记录结果；
+    report() 返回各阶段的耗时、利用率和整体吞吐。
+    """
+
+    def __init__(
+        self,
+        stages: list[PipelineStage],
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        if not stages:
+            raise ValueError("at least one stage is required")
+        if any(stage.workers < 1 for stage in stages):
+            raise ValueError("each stage needs at least one worker")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self._clock = clock
+        self._stats = [StageStats(stage.name, stage.workers) for stage in stages]
+        self._wall_seconds = 0.0
+        self._total = 0
+        self._succeeded = 0
+
+    def run(self, items: Iterable[Any]) -> Iterator[StagedResult]:
+        items = list(items)
+        self._total = len(items)
+        self._succeeded = 0
+        self._stats = [StageStats(stage.name, stage.workers) for stage in self.stages]
+        started = self._clock()
+
+        done: queue.Queue = queue.Queue()
+        runtimes = [
+            _StageRuntime(stage, queue.Queue(maxsize=self.queue_size), stats, stage.workers)
+            for stage, stats in zip(self.stages, self._stats)
+        ]
+        for position, runtime in enumerate(runtimes):
+            following = runtimes[position + 1] if position + 1 < len(runtimes) else None
+            for worker in range(runtime.stage.workers):
+                threading.Thread(
+                    target=self._work,
+                    args=(runtime, following, done),
+                    name=f"stage-{runtime.stage.name}-{worker}",
+                    daemon=True,
+                ).start()
+
+        def feed() -> None:
+            for index, item in enumerate(items):
+                runtimes[0].inbox.put((index, item))
+            for _ in range(runtimes[0].stage.workers):
+                runtimes[0].inbox.put(_STOP)
+
+        threading.Thread(target=feed, name="stage-feeder", daemon=True).start()
+
+        for _ in range(len(items)):
+            result = done.get()
+            if result.ok:
+                self._succeeded += 1
+            yield result
+        self._wall_seconds = self._clock() - started
+
+    def report(self) -> dict[str, Any]:
+        wall = self._wall_seconds
+        serial = sum(stats.busy_seconds for stats in self._stats)
+        return {
+            "items": self._total,
+            "succeeded": self._succeeded,
+            "failed": self._total - self._succeeded,
+            "wall_seconds": round(wall, 3),
+            "items_per_hour": round(self._succeeded * 3600 / wall, 2) if wall else 0.0,
+            # 各阶段耗时之和，即逐个串行处理所需的时间；与 wall_seconds 之比是重叠执行带来的加速
+            "serial_seconds": round(serial, 3),
+            "overlap_speedup": round(serial / wall, 2) if wall else 0.0,
+            "stages": [stats.to_dict(wall) for stats in self._stats],
+        }
+
+    def _work(self, runtime: _StageRuntime, following: _StageRuntime | None, done: queue.Queue) -> None:
+        while True:
+            message = runtime.inbox.get()
+            if message is _STOP:
+                break
+            index, payload = message
+            started = self._clock()
+            error = None
+            try:
+                output = runtime.stage.func(payload)
+            except Exception as exc:
+                output, error = None, exc
+            elapsed = self._clock() - started
+
+            with runtime.lock:
+                runtime.stats.busy_seconds += elapsed
+                if output:
+                    runtime.stats.completed += 1
+                else:
+                    runtime.stats.failed += 1
+
+            if not output:
+                done.put(StagedResult(index, False, payload, runtime.stage.name, error))
+            elif following is None:
+                done.put(StagedResult(index, True, output))
+            else:
+                following.inbox.put((index, output))
+
+        # 本阶段最后一个退出的线程通知下一阶段的所有线程退出
+        with runtime.lock:
+            runtime.remaining_workers -= 1
+            last = runtime.remaining_workers == 0
+        if last and following is not None:
+            for _ in range(following.stage.workers):
+                following.inbox.put(_STOP)
+
+
+def format_throughput_report(report: dict[str, Any]) -> str:
+    lines = [
+        f"📊 流水线吞吐: {report['succeeded']}/{report['items']} 成功，"
+        f"总耗时 {report['wall_seconds']:.1f}s，{report['items_per_hour']:.1f} 个/小时，"
+        f"串行耗时 {report['serial_seconds']:.1f}s（重叠加速 {report['overlap_speedup']:.2f}x）"
+    ]
+    for stage in report["stages"]:
+        lines.append(
+            f"   {stage['name']:<14} workers={stage['workers']} 完成 {stage['completed']} 失败 {stage['failed']} "
+            f"平均 {stage['mean_seconds']:.1f}s 利用率 {stage['utilization']:.0%}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,66 @@
+import subprocess
+import unittest
+
+import numpy as np
+
+from scripts.audio_windows import SAMPLE_RATE, AudioDecodeError, decode_audio, probe_duration, split_windows
+
+
+class DecodeAudioTests(unittest.TestCase):
+    def test_decodes_s16le_output_into_float32_samples(self) -> None:
+        pcm = np.array([0, 16384, -32768, 32767], dtype=np.int16).tobytes()
+        calls = []
+
+        def run(cmd, **kwargs):
+            calls.append(cmd)
+            return subprocess.CompletedProcess(cmd, 0, stdout=pcm, stderr=b"")
+
+        audio = decode_audio("input.mp3", run=run)
+
+        self.assertEqual(audio.dtype, np.float32)
+        np.testing.assert_allclose(audio, [0.0, 0.5, -1.0, 32767 / 32768])
+        self.assertEqual(len(calls), 1)
+        self.assertIn("input.mp3", calls[0])
+        self.assertEqual(calls[0][calls[0].index("-ar") + 1], str(SAMPLE_RATE))
+
+    def test_ffmpeg_failure_raises_decode_error(self) -> None:
+        def run(cmd, **kwargs):
+            raise subprocess.CalledProcessError(1, cmd, stderr=b"Invalid data found")
+
+        with self.assertRaisesRegex(AudioDecodeError, "Invalid data found"):
+            decode_audio("broken.mp3", run=run)
+
+
+class ProbeDurationTests(unittest.TestCase):
+    def test_reads_duration_and_returns_none_on_failure(self) -> None:
+        def run(cmd, **kwargs):
+            self.assertEqual("ffprobe", cmd[0])
+            if cmd[-1] == "broken.mp3":
+                raise subprocess.CalledProcessError(1, cmd)
+            return subprocess.CompletedProcess(cmd, 0, stdout="183.4\n", stderr="")
+
+        self.assertAlmostEqual(183.4, probe_duration("input.mp3", run=run))
+        self.assertIsNone(probe_duration("broken.mp3", run=run))
+
+
+class SplitWindowsTests(unittest.TestCase):
+    def test_windows_are_views_with_start_offsets(self) -> None:
+        audio = np.arange(25, dtype=np.float32)
+
+        windows = split_windows(audio, window_seconds=1, sample_rate=10)
+
+        self.assertEqual([start for start, _ in windows], [0.0, 1.0, 2.0])
+        self.assertEqual([len(window) for _, window in windows], [10, 10, 5])
+        for _, window in windows:
+            self.assertTrue(np.shares_memory(window, audio))
+
+    def test_empty_audio_has_no_windows(self) -> None:
+        self.assertEqual(split_windows(np.zeros(0, dtype=np.float32), 60), [])
+
+    def test_rejects_non_positive_window(self) -> None:
+        with self.assertRaises(ValueError):
+            split_windows(np.zeros(10, dtype=np.float32), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
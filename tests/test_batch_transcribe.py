@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from scripts.batch_transcribe import chunk_parts, transcribe_batched
+
+
+def _parts(*seconds: float) -> list[tuple[str, np.ndarray]]:
+    # 采样率为 10，每个样本的值是所在切片的序号
+    return [(f"part{index}", np.full(int(length * 10), index, dtype=np.float32)) for index, length in enumerate(seconds)]
+
+
+class ChunkPartsTests(unittest.TestCase):
+    def test_parts_are_cut_into_window_views(self) -> None:
+        parts = _parts(6, 2.5)
+
+        chunks = chunk_parts(parts, chunk_seconds=3, sample_rate=10)
+
+        self.assertEqual([0, 0, 1], [index for index, _ in chunks])
+        self.assertEqual([30, 30, 25], [len(chunk) for _, chunk in chunks])
+        self.assertTrue(np.shares_memory(chunks[1][1], parts[0][1]))
+
+
+class TranscribeBatchedTests(unittest.TestCase):
+    def test_windows_are_decoded_in_batches_and_reassembled_in_order(self) -> None:
+        batches: list[int] = []
+        progress: list[int] = []
+
+        def decode(chunks):
+            batches.append(len(chunks))
+            return [f"<{int(chunk[0])}:{len(chunk)}>" for chunk in chunks]
+
+        outcomes = transcribe_batched(
+            _parts(6, 2.5, 9), decode, batch_size=2, chunk_seconds=3, sample_rate=10, on_batch=progress.append
+        )
+
+        self.assertEqual([2, 2, 2], batches)
+        self.assertEqual(progress, batches)
+        self.assertEqual(["part0", "part1", "part2"], [outcome.name for outcome in outcomes])
+        self.assertEqual(["<0:30><0:30>", "<1:25>", "<2:30><2:30><2:30>"], [outcome.text for outcome in outcomes])
+
+    def test_failed_batch_marks_only_its_parts(self) -> None:
+        def decode(chunks):
+            if any(chunk[0] == 1 for chunk in chunks):
+                raise RuntimeError("out of memory")
+            return ["ok"] * len(chunks)
+
+        outcomes = transcribe_batched(_parts(3, 3, 3), decode, batch_size=1, chunk_seconds=3, sample_rate=10)
+
+        self.assertEqual([True, False, True], [outcome.ok for outcome in outcomes])
+        self.assertEqual("out of memory", outcomes[1].error)
+        self.assertIsNone(outcomes[1].text)
+
+    def test_decoder_must_return_one_result_per_window(self) -> None:
+        outcomes = transcribe_batched(_parts(3), lambda chunks: [], batch_size=4, chunk_seconds=3, sample_rate=10)
+
+        self.assertFalse(outcomes[0].ok)
+
+    def test_rejects_invalid_batch_size(self) -> None:
+        with self.assertRaises(ValueError):
+            transcribe_batched(_parts(3), lambda chunks: [], batch_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
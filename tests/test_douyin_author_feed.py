@@ -18,6 +18,7 @@ from scripts.douyin_author_feed import (
     parse_publish_time,
     parse_publish_time_text,
 )
+from scripts.douyin_proxy_pool import ProxyPool
 
 
 class FakePage:
@@ -125,6 +126,38 @@ class FakeBrowserContextManager:
         return False
 
 
+class FakeChallengePage(FakePage):
+    """风控验证页：没有作品卡片，点击恢复也没有效果。"""
+
+    def evaluate(self, _script: str):
+        if "clickByText" in _script:
+            return ""
+        return super().evaluate(_script)
+
+
+class FakeChallengeContext(FakeContext):
+    def new_page(self):
+        return FakeChallengePage(html_by_url=self.html_by_url)
+
+
+class FakeRoutedBrowser(FakeBrowser):
+    """按 new_context 的代理参数返回不同页面：被风控的代理只看到验证页。"""
+
+    def __init__(self, author_cards, banned_servers):
+        super().__init__(author_cards=author_cards)
+        self.banned_servers = banned_servers
+        self.context_options = []
+
+    def new_context(self, **kwargs):
+        self.context_options.append(kwargs)
+        server = kwargs.get("proxy", {}).get("server")
+        if server in self.banned_servers:
+            return FakeChallengeContext(
+                html_by_url={"https://www.douyin.com/user/test-author": "<script>var __ac_signature='x';</script>"}
+            )
+        return super().new_context(**kwargs)
+
+
 class DouyinAuthorFeedTests(unittest.TestCase):
     def test_parse_douyin_cookie_header_builds_playwright_cookies(self):
         cookies = _parse_douyin_cookie_header("sessionid_ss=abc123; passport_csrf_token=xyz")
@@ -422,6 +455,31 @@ class DouyinAuthorFeedTests(unittest.TestCase):
             ],
         )
 
+    @patch("scripts.douyin_author_feed._douyin_proxy_pool")
+    @patch("scripts.douyin_author_feed._playwright_browser")
+    def test_get_author_video_urls_moves_to_next_proxy_after_challenge_page(self, mock_browser, mock_pool):
+        pool = ProxyPool(["http://10.0.0.1:8080", "http://10.0.0.2:8080"])
+        mock_pool.return_value = pool
+        author_cards = [
+            {
+                "video_id": "100",
+                "video_url": "https://www.douyin.com/video/100",
+                "title": "行业更新 20260618",
+            }
+        ]
+        browser = FakeRoutedBrowser(author_cards, banned_servers={"http://10.0.0.1:8080"})
+        mock_browser.return_value = FakeBrowserContextManager(browser)
+
+        video_urls = get_author_video_urls("https://www.douyin.com/user/test-author")
+
+        self.assertEqual(video_urls, ["https://www.douyin.com/video/100"])
+        self.assertEqual(
+            [options["proxy"]["server"] for options in browser.context_options],
+            ["http://10.0.0.1:8080", "http://10.0.0.2:8080"],
+        )
+        self.assertTrue(pool.is_banned("http://10.0.0.1:8080"))
+        self.assertEqual("http://10.0.0.2:8080", pool.choose())
+
     @patch("scripts.douyin_author_feed._playwright_browser")
     def test_get_author_videos_stops_after_multiple_older_videos(self, mock_browser):
         author_cards = [
@@ -0,0 +1,101 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.douyin_cache import EXPIRY_MARGIN_SECONDS, VideoMetadataCache, parse_url_expiry
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_750_000_000):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class VideoMetadataCacheTests(unittest.TestCase):
+    def test_video_info_survives_reload(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = Path(tmp_dir) / "cache.json"
+            clock = FakeClock()
+            cache = VideoMetadataCache(cache_path, clock=clock)
+
+            cache.put_video_id("https://v.douyin.com/abc/", "123")
+            cache.put_video_info("123", {"title": "标题", "author": "作者", "video_url": "https://cdn/v.mp4"})
+
+            reloaded = VideoMetadataCache(cache_path, clock=clock)
+            self.assertEqual("123", reloaded.get_video_id("https://v.douyin.com/abc/"))
+            self.assertEqual("标题", reloaded.get_video_info("123")["title"])
+
+    def test_video_entry_expires_before_signed_cdn_url(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clock = FakeClock()
+            cache = VideoMetadataCache(Path(tmp_dir) / "cache.json", video_ttl=6 * 3600, clock=clock)
+            url_expiry = int(clock.now) + 3600
+            cache.put_video_info("123", {"video_url": f"https://v3.douyinvod.com/v.mp4?x-expires={url_expiry}&sign=x"})
+
+            clock.now = url_expiry - EXPIRY_MARGIN_SECONDS - 1
+            self.assertIsNotNone(cache.get_video_info("123"))
+            clock.now = url_expiry - EXPIRY_MARGIN_SECONDS
+            self.assertIsNone(cache.get_video_info("123"))
+
+    def test_already_expired_url_is_not_cached(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clock = FakeClock()
+            cache = VideoMetadataCache(Path(tmp_dir) / "cache.json", clock=clock)
+
+            cache.put_video_info("123", {"video_url": f"https://cdn/v.mp4?expire={int(clock.now) + 60}"})
+
+            self.assertIsNone(cache.get_video_info("123"))
+
+    def test_evicts_least_recently_used_entries_over_limit(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clock = FakeClock()
+            cache = VideoMetadataCache(Path(tmp_dir) / "cache.json", max_entries=2, clock=clock)
+
+            cache.put_video_info("1", {"video_url": "https://cdn/1.mp4"})
+            clock.now += 1
+            cache.put_video_info("2", {"video_url": "https://cdn/2.mp4"})
+            clock.now += 1
+            cache.get_video_info("1")
+            clock.now += 1
+            cache.put_video_info("3", {"video_url": "https://cdn/3.mp4"})
+
+            self.assertIsNotNone(cache.get_video_info("1"))
+            self.assertIsNone(cache.get_video_info("2"))
+            self.assertIsNotNone(cache.get_video_info("3"))
+
+    def test_hits_update_usage_in_memory_until_flush(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = Path(tmp_dir) / "cache.json"
+            clock = FakeClock()
+            cache = VideoMetadataCache(cache_path, clock=clock)
+            cache.put_video_info("1", {"video_url": "https://cdn/1.mp4"})
+            stored = cache_path.stat().st_mtime_ns, cache_path.read_text(encoding="utf-8")
+
+            clock.now += 5
+            self.assertIsNotNone(cache.get_video_info("1"))
+            self.assertEqual(stored, (cache_path.stat().st_mtime_ns, cache_path.read_text(encoding="utf-8")))
+
+            cache.flush()
+            payload = json.loads(cache_path.read_text(encoding="utf-8"))
+            self.assertEqual(int(clock.now), payload["videos"]["1"]["last_used_at"])
+
+    def test_corrupted_cache_file_is_ignored(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = Path(tmp_dir) / "cache.json"
+            cache_path.write_text("{broken", encoding="utf-8")
+
+            cache = VideoMetadataCache(cache_path)
+            cache.put_video_id("https://v.douyin.com/abc/", "123")
+
+            self.assertEqual(1, json.loads(cache_path.read_text(encoding="utf-8"))["version"])
+
+    def test_parse_url_expiry(self):
+        self.assertEqual(1750003600, parse_url_expiry("https://cdn/v.mp4?a=1&x-expires=1750003600"))
+        self.assertIsNone(parse_url_expiry("https://cdn/v.mp4?a=1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
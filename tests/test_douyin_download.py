@@ -0,0 +1,889 @@
+import io
+import json
+from datetime import timedelta
+from urllib.parse import quote, urlparse
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from scripts.douyin_cache import VideoMetadataCache
+from scripts.douyin_download import (
+    SimpleDouyinDownloader,
+    extract_page_title,
+    extract_page_video_url,
+    iter_page_json,
+    read_url_list,
+)
+from scripts.douyin_mirrors import MirrorStatsStore
+from scripts.douyin_store import DownloadArtifactStore
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, status_code: int = 200, headers=None, fail_after: int | None = None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.fail_after = fail_after
+        self.closed = False
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise RuntimeError(f"http {self.status_code}")
+
+    def iter_content(self, chunk_size: int):
+        sent = 0
+        for start in range(0, len(self.body), chunk_size):
+            if self.fail_after is not None and sent >= self.fail_after:
+                raise ConnectionError("connection reset")
+            chunk = self.body[start:start + chunk_size]
+            sent += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeVideoSession:
+    """按 Range 请求头返回对应分段的假 CDN。"""
+
+    def __init__(
+        self,
+        payload: bytes,
+        support_range: bool = True,
+        fail_first_after: int | None = None,
+        fail_range_start: int | None = None,
+    ):
+        self.payload = payload
+        self.support_range = support_range
+        self.fail_first_after = fail_first_after
+        self.fail_range_start = fail_range_start
+        self.requests: list[dict[str, str]] = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        headers = headers or {}
+        self.requests.append(dict(headers))
+        fail_after = self.fail_first_after if len(self.requests) == 1 else None
+
+        range_header = headers.get("Range")
+        if range_header and self.support_range:
+            first, _, last = range_header.split("=", 1)[1].partition("-")
+            start = int(first)
+            end = int(last) if last else len(self.payload) - 1
+            body = self.payload[start:end + 1]
+            if self.fail_range_start == start:
+                fail_after = 0
+            return FakeResponse(
+                body,
+                status_code=206,
+                headers={
+                    "content-length": str(len(body)),
+                    "content-range": f"bytes {start}-{end}/{len(self.payload)}",
+                },
+                fail_after=fail_after,
+            )
+        return FakeResponse(
+            self.payload,
+            headers={"content-length": str(len(self.payload))},
+            fail_after=fail_after,
+        )
+
+
+class DownloadVideoResumeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.payload = bytes(range(256)) * 64
+        self.downloader = SimpleDouyinDownloader()
+
+    def _download(self, session, filename, **kwargs) -> bool:
+        self.downloader.session = session
+        with redirect_stdout(io.StringIO()):
+            return self.downloader.download_video("https://cdn.example.com/v.mp4", str(filename), **kwargs)
+
+    def test_retry_resumes_with_range_request_after_connection_drop(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / "video.mp4"
+            session = FakeVideoSession(self.payload, fail_first_after=4096)
+
+            self.assertTrue(self._download(session, filename, chunk_size=1024))
+
+            self.assertEqual(self.payload, filename.read_bytes())
+            self.assertEqual("bytes=4096-", session.requests[1]["Range"])
+            self.assertFalse(Path(f"{filename}.part").exists())
+            self.assertFalse(Path(f"{filename}.part.json").exists())
+
+    def test_rerun_continues_from_saved_part_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / "video.mp4"
+            first_session = FakeVideoSession(self.payload, fail_first_after=8192)
+
+            self.assertFalse(self._download(first_session, filename, chunk_size=1024, max_retries=1, state_interval=1024))
+            self.assertFalse(filename.exists())
+            self.assertEqual(8192, os.path.getsize(f"{filename}.part"))
+            state = json.loads(Path(f"{filename}.part.json").read_text(encoding="utf-8"))
+            self.assertEqual(8192, state["downloaded"])
+            self.assertEqual(len(self.payload), state["total_size"])
+
+            second_session = FakeVideoSession(self.payload)
+            self.assertTrue(self._download(second_session, filename, chunk_size=1024))
+
+            self.assertEqual(self.payload, filename.read_bytes())
+            self.assertEqual("bytes=8192-", second_session.requests[0]["Range"])
+
+    def test_restarts_from_zero_when_server_ignores_range(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / "video.mp4"
+            session = FakeVideoSession(self.payload, support_range=False, fail_first_after=4096)
+
+            self.assertTrue(self._download(session, filename, chunk_size=1024))
+
+            self.assertEqual(self.payload, filename.read_bytes())
+            self.assertNotIn("Range", session.requests[-1])
+
+    def test_incomplete_body_is_not_renamed_to_final_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / "video.mp4"
+
+            class ShortSession(FakeVideoSession):
+                def get(self, url, headers=None, stream=False, timeout=None):
+                    response = super().get(url, headers=headers, stream=stream, timeout=timeout)
+                    response.headers["content-length"] = str(len(self.payload) + 10)
+                    return response
+
+            self.assertFalse(self._download(ShortSession(self.payload), filename, max_retries=1))
+            self.assertFalse(filename.exists())
+            self.assertTrue(Path(f"{filename}.part").exists())
+
+
+class SegmentedDownloadTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.payload = bytes(range(256)) * 64 + b"tail"
+        self.downloader = SimpleDouyinDownloader()
+
+    def _download(self, session, filename, **kwargs) -> bool:
+        self.downloader.session = session
+        with redirect_stdout(io.StringIO()):
+            return self.downloader.download_video("https://cdn.example.com/v.mp4", str(filename), **kwargs)
+
+    def test_fetches_byte_ranges_concurrently_into_preallocated_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / "video.mp4"
+            session = FakeVideoSession(self.payload)
+
+            self.assertTrue(self._download(session, filename, chunk_size=1000, connections=4))
+
+            self.assertEqual(self.payload, filename.read_bytes())
+            segment_ranges = sorted(request["Range"] for request in session.requests[1:])
+            self.assertEqual(
+                ["bytes=0-4096", "bytes=12291-16387", "bytes=4097-8193", "bytes=8194-12290"],
+                segment_ranges,
+            )
+
+    def test_falls_back_to_single_stream_without_range_support(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / "video.mp4"
+            session = FakeVideoSession(self.payload, support_range=False)
+
+            self.assertTrue(self._download(session, filename, connections=4))
+
+            self.assertEqual(self.payload, filename.read_bytes())
+            self.assertEqual(2, len(session.requests))
+            self.assertNotIn("Range", session.requests[-1])
+
+    def test_failed_segment_is_resumed_on_rerun(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / "video.mp4"
+            failing_session = FakeVideoSession(self.payload, fail_range_start=8194)
+
+            self.assertFalse(self._download(failing_session, filename, connections=4, max_retries=1))
+            state = json.loads(Path(f"{filename}.part.json").read_text(encoding="utf-8"))
+            self.assertEqual([4097, 4097, 0, 4097], [segment["done"] for segment in state["segments"]])
+
+            session = FakeVideoSession(self.payload)
+            self.assertTrue(self._download(session, filename, connections=4))
+
+            self.assertEqual(self.payload, filename.read_bytes())
+            self.assertEqual(["bytes=0-0", "bytes=8194-12290"], [request["Range"] for request in session.requests])
+
+    def test_single_stream_rerun_continues_after_contiguous_segments(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / "video.mp4"
+            failing_session = FakeVideoSession(self.payload, fail_range_start=8194)
+            self.assertFalse(self._download(failing_session, filename, connections=4, max_retries=1))
+
+            session = FakeVideoSession(self.payload)
+            self.assertTrue(self._download(session, filename))
+
+            self.assertEqual(self.payload, filename.read_bytes())
+            self.assertEqual("bytes=8194-", session.requests[0]["Range"])
+
+
+class FakeMirrorSession(FakeVideoSession):
+    """按主机模拟慢速或出错的 CDN 镜像。"""
+
+    def __init__(self, payload: bytes, slow_hosts=(), failing_hosts=()):
+        super().__init__(payload)
+        self.slow_hosts = set(slow_hosts)
+        self.failing_hosts = set(failing_hosts)
+        self.release = threading.Event()
+        self.hosts: list[str] = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        host = urlparse(url).netloc
+        self.hosts.append(host)
+        if host in self.failing_hosts:
+            raise ConnectionError("connection refused")
+        if host in self.slow_hosts:
+            self.release.wait(5)
+        return super().get(url, headers=headers, stream=stream, timeout=timeout)
+
+
+class MirrorHedgingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.payload = bytes(range(256)) * 16
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.stats = MirrorStatsStore(Path(self.tmp_dir.name) / "mirrors.json")
+        self.downloader = SimpleDouyinDownloader(mirror_stats=self.stats, hedge_delay=0.05)
+        self.urls = ["https://slow.example.com/v.mp4", "https://fast.example.com/v.mp4"]
+
+    def _download(self, session) -> Path:
+        self.downloader.session = session
+        filename = Path(self.tmp_dir.name) / "video.mp4"
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.downloader.download_video(self.urls[0], str(filename), mirror_urls=self.urls))
+        return filename
+
+    def test_slow_primary_is_hedged_by_next_mirror(self) -> None:
+        session = FakeMirrorSession(self.payload, slow_hosts={"slow.example.com"})
+        self.addCleanup(session.release.set)
+
+        filename = self._download(session)
+
+        self.assertEqual(self.payload, filename.read_bytes())
+        self.assertEqual(["slow.example.com", "fast.example.com"], session.hosts)
+        self.assertIsNotNone(self.stats.score("https://fast.example.com/v.mp4"))
+        self.assertIsNone(self.stats.score("https://slow.example.com/v.mp4"))
+
+    def test_failing_mirror_fails_over_and_is_ranked_last(self) -> None:
+        session = FakeMirrorSession(self.payload, failing_hosts={"slow.example.com"})
+
+        self._download(session)
+
+        self.assertEqual(["slow.example.com", "fast.example.com"], session.hosts)
+        self.assertEqual("https://fast.example.com/v.mp4", self.stats.rank(self.urls)[0])
+
+        second_session = FakeMirrorSession(self.payload)
+        Path(self.tmp_dir.name, "video.mp4").unlink()
+        self._download(second_session)
+        self.assertEqual(["fast.example.com"], second_session.hosts)
+
+    def test_fails_over_without_hedging_when_delay_is_zero(self) -> None:
+        self.downloader.hedge_delay = 0
+        session = FakeMirrorSession(self.payload, failing_hosts={"slow.example.com"})
+
+        filename = self._download(session)
+
+        self.assertEqual(self.payload, filename.read_bytes())
+        self.assertEqual(["slow.example.com", "fast.example.com"], session.hosts)
+
+
+class PayloadHandler(BaseHTTPRequestHandler):
+    payload = b""
+
+    def do_GET(self) -> None:
+        body = self.payload
+        range_header = self.headers.get("Range")
+        if range_header:
+            first, _, last = range_header.split("=", 1)[1].partition("-")
+            start, end = int(first), int(last) if last else len(self.payload) - 1
+            body = self.payload[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(self.payload)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+class LocalServerDownloadTests(unittest.TestCase):
+    """用真实的本地 HTTP 服务验证 response.raw.readinto 读取路径。"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.payload = os.urandom(3 * 1024 * 1024 + 123)
+        handler = type("Handler", (PayloadHandler,), {"payload": cls.payload})
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=cls.server.serve_forever, args=(0.05,), daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/v.mp4"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.downloader = SimpleDouyinDownloader()
+        self.reports: list[tuple[int, int]] = []
+        self.downloader.progress_callback = lambda done, total: self.reports.append((done, total))
+
+    def test_single_stream_download_reuses_buffer_and_throttles_progress(self) -> None:
+        filename = Path(self.tmp_dir.name) / "video.mp4"
+        self.downloader.progress_interval = 60
+
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.downloader.download_video(self.url, str(filename)))
+
+        self.assertEqual(self.payload, filename.read_bytes())
+        total = len(self.payload)
+        # 间隔足够长时只在第一块和结束时各上报一次
+        self.assertEqual(2, len(self.reports))
+        self.assertLess(self.reports[0][0], total)
+        self.assertEqual((total, total), self.reports[-1])
+
+    def test_connection_is_returned_to_pool_after_body_is_read(self) -> None:
+        ports: set[int] = set()
+
+        class KeepAliveHandler(PayloadHandler):
+            protocol_version = "HTTP/1.1"
+            payload = self.payload
+
+            def do_GET(self) -> None:
+                ports.add(self.client_address[1])
+                super().do_GET()
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/v.mp4"
+
+        with redirect_stdout(io.StringIO()):
+            for index in range(3):
+                self.assertTrue(self.downloader.download_video(url, str(Path(self.tmp_dir.name) / f"v{index}.mp4")))
+
+        self.assertEqual(1, len(ports))
+
+    def test_segmented_download_over_local_server(self) -> None:
+        filename = Path(self.tmp_dir.name) / "video.mp4"
+
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.downloader.download_video(self.url, str(filename), connections=3))
+
+        self.assertEqual(self.payload, filename.read_bytes())
+        self.assertEqual((len(self.payload), len(self.payload)), self.reports[-1])
+
+
+class DownloadManyTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.downloader = SimpleDouyinDownloader()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_downloads_concurrently_and_isolates_failures(self) -> None:
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def fake_download(url, output_dir, custom_name=None, connections=1, audio_only=False):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.02)
+            with lock:
+                state["active"] -= 1
+            if url.endswith("bad/"):
+                raise RuntimeError("boom")
+            path = Path(output_dir) / f"{url.rstrip('/').rsplit('/', 1)[-1]}.mp4"
+            path.write_bytes(b"x" * 1024)
+            return str(path)
+
+        urls = [f"https://v.douyin.com/{name}/" for name in ("a", "b", "bad", "c", "d")]
+        with patch.object(self.downloader, "download_by_url", side_effect=fake_download):
+            with redirect_stdout(io.StringIO()) as output:
+                results = self.downloader.download_many(urls + urls[:1], self.tmp_dir.name, max_workers=2)
+
+        self.assertEqual(urls, [result["url"] for result in results])
+        self.assertEqual([True, True, False, True, True], [bool(result["path"]) for result in results])
+        self.assertEqual(1024, results[0]["size"])
+        self.assertEqual("boom", results[2]["error"])
+        self.assertEqual(2, state["peak"])
+        self.assertIn("成功 4 个，失败 1 个", output.getvalue())
+        self.assertTrue(self.downloader.show_progress)
+
+    def test_links_to_the_same_video_are_not_downloaded_concurrently(self) -> None:
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def fake_download(video_id, output_dir, custom_name, connections, audio_only):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            return str(Path(output_dir) / f"{video_id}.mp4")
+
+        urls = ["https://v.douyin.com/short/", "https://www.douyin.com/video/7500000000000000001"]
+        with patch.object(self.downloader, "extract_video_id", return_value="7500000000000000001"), \
+                patch.object(self.downloader, "_download_video_id", side_effect=fake_download), \
+                patch("os.path.getsize", return_value=0):
+            with redirect_stdout(io.StringIO()):
+                results = self.downloader.download_many(urls, self.tmp_dir.name, max_workers=2)
+
+        self.assertEqual(1, state["peak"])
+        self.assertEqual(2, len(results))
+
+    def test_limits_connections_per_host_on_shared_session(self) -> None:
+        self.downloader.limit_host_connections(3)
+        adapter = self.downloader.session.get_adapter("https://v.douyin.com/x/")
+
+        self.assertEqual(3, adapter._pool_maxsize)
+        self.assertTrue(adapter._pool_block)
+
+        # 分段下载不再替换按主机限流的连接池
+        self.downloader._ensure_connection_pool(32)
+        self.assertIs(adapter, self.downloader.session.get_adapter("https://v.douyin.com/x/"))
+
+    def test_read_url_list_extracts_links_from_share_text(self) -> None:
+        stream = io.StringIO(
+            "# 今日视频\n"
+            "\n"
+            "https://v.douyin.com/abc/\n"
+            "7.43 复制打开抖音，看看【作者的作品】 https://v.douyin.com/def/ V@L.jp 01/12\n"
+            "没有链接的行\n"
+        )
+
+        self.assertEqual(["https://v.douyin.com/abc/", "https://v.douyin.com/def/"], read_url_list(stream))
+
+
+class FakeFfmpegStdin:
+    def __init__(self, process: "FakeFfmpegProcess"):
+        self.process = process
+
+    def write(self, data: bytes) -> int:
+        if self.process.exit_early:
+            raise BrokenPipeError()
+        self.process.received.extend(data)
+        return len(data)
+
+    def close(self) -> None:
+        return None
+
+
+class FakeFfmpegProcess:
+    def __init__(self, cmd, returncode: int = 0, exit_early: bool = False):
+        self.cmd = cmd
+        self.returncode = returncode
+        self.exit_early = exit_early
+        self.received = bytearray()
+        self.stdin = FakeFfmpegStdin(self)
+
+    def wait(self) -> int:
+        if self.returncode == 0:
+            Path(self.cmd[-1]).write_bytes(b"mp3:" + bytes(self.received[:4]))
+        return self.returncode
+
+
+class DownloadAudioTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.payload = b"mp4-bytes" * 1000
+        self.downloader = SimpleDouyinDownloader()
+        self.downloader.session = FakeVideoSession(self.payload)
+        self.processes: list[FakeFfmpegProcess] = []
+
+    def _fake_popen(self, returncode: int = 0, exit_early: bool = False):
+        def popen(cmd, **_kwargs):
+            process = FakeFfmpegProcess(cmd, returncode=returncode, exit_early=exit_early)
+            self.processes.append(process)
+            return process
+
+        return popen
+
+    def test_pipes_response_body_into_ffmpeg_and_keeps_only_audio(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / "video.mp3"
+
+            with patch("scripts.douyin_download.subprocess.Popen", side_effect=self._fake_popen()):
+                with redirect_stdout(io.StringIO()):
+                    self.assertTrue(self.downloader.download_audio("https://cdn.example.com/v.mp4", str(filename)))
+
+            process = self.processes[0]
+            self.assertEqual(self.payload, bytes(process.received))
+            self.assertIn("pipe:0", process.cmd)
+            self.assertIn("-vn", process.cmd)
+            self.assertEqual("16000", process.cmd[process.cmd.index("-ar") + 1])
+            self.assertEqual("1", process.cmd[process.cmd.index("-ac") + 1])
+            self.assertEqual(b"mp3:mp4-", filename.read_bytes())
+            self.assertEqual([filename.name], [path.name for path in Path(tmp_dir).iterdir()])
+
+    def test_returns_false_and_cleans_up_when_ffmpeg_fails(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / "video.mp3"
+
+            with patch(
+                "scripts.douyin_download.subprocess.Popen",
+                side_effect=self._fake_popen(returncode=1, exit_early=True),
+            ):
+                with redirect_stdout(io.StringIO()):
+                    self.assertFalse(self.downloader.download_audio("https://cdn.example.com/v.mp4", str(filename)))
+
+            self.assertEqual([], list(Path(tmp_dir).iterdir()))
+
+    def test_download_by_url_falls_back_to_mp4_when_streaming_fails(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            video_info = {"title": "demo", "author": "someone", "video_url": "https://cdn.example.com/v.mp4"}
+
+            with patch.object(self.downloader, "extract_video_id", return_value="123"), \
+                    patch.object(self.downloader, "get_video_info", return_value=video_info), \
+                    patch("scripts.douyin_download.subprocess.Popen", side_effect=self._fake_popen(returncode=1)):
+                with redirect_stdout(io.StringIO()):
+                    self.assertTrue(self.downloader.download_by_url("https://v.douyin.com/x/", tmp_dir, audio_only=True))
+
+            self.assertEqual(self.payload, (Path(tmp_dir) / "demo_123.mp4").read_bytes())
+            self.assertFalse((Path(tmp_dir) / "demo_123.mp3").exists())
+
+
+class FakeJsonResponse:
+    def __init__(self, payload):
+        self.status_code = 200
+        self.payload = payload
+        self.text = json.dumps(payload)
+        self.content = self.text.encode("utf-8")
+        self.elapsed = timedelta(milliseconds=20)
+
+    def json(self):
+        return self.payload
+
+
+class FakeApiSession:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def get(self, url, headers=None, timeout=None, **_kwargs):
+        return FakeJsonResponse(self.payload)
+
+
+def build_iteminfo_payload(include_audio: bool = False) -> dict:
+    video = {
+        "play_addr": {
+            "url_list": ["https://aweme.snssdk.com/aweme/v1/playwm/?video_id=v0&ratio=720p"],
+            "data_size": 90_000_000,
+        },
+        "bit_rate": [
+            {
+                "gear_name": "normal_1080_0",
+                "bit_rate": 2_400_000,
+                "play_addr": {"url_list": ["https://v1.douyinvod.com/1080.mp4"], "data_size": 90_000_000},
+            },
+            {
+                "gear_name": "lower_540_0",
+                "bit_rate": 400_000,
+                "play_addr": {
+                    "url_list": ["https://v1.douyinvod.com/540.mp4", "https://v3.douyinvod.com/540.mp4"],
+                    "data_size": 15_000_000,
+                },
+            },
+        ],
+    }
+    if include_audio:
+        video["bit_rate_audio"] = [
+            {"audio_meta": {"bitrate": 16_000, "size": 600_000, "url_list": {"main_url": "https://a.douyinvod.com/16k.m4a"}}},
+            {"audio_meta": {"bitrate": 64_000, "size": 2_400_000, "url_list": {"main_url": "https://a.douyinvod.com/64k.m4a"}}},
+        ]
+    return {
+        "status_code": 0,
+        "item_list": [{"desc": "早间财经", "author": {"nickname": "作者"}, "video": video}],
+    }
+
+
+class RenditionSelectionTests(unittest.TestCase):
+    def _get_video_info(self, payload, prefer_low_bitrate: bool):
+        downloader = SimpleDouyinDownloader(prefer_low_bitrate=prefer_low_bitrate)
+        downloader.session = FakeApiSession(payload)
+        with redirect_stdout(io.StringIO()):
+            return downloader.get_video_info("123")
+
+    def test_default_mode_keeps_default_unwatermarked_rendition(self) -> None:
+        video_info = self._get_video_info(build_iteminfo_payload(), prefer_low_bitrate=False)
+
+        self.assertEqual("https://aweme.snssdk.com/aweme/v1/play/?video_id=v0&ratio=720p", video_info["video_url"])
+        self.assertEqual(0, video_info["bytes_saved"])
+
+    def test_low_bitrate_mode_picks_smallest_video_rendition_and_reports_savings(self) -> None:
+        video_info = self._get_video_info(build_iteminfo_payload(), prefer_low_bitrate=True)
+
+        self.assertEqual("https://v1.douyinvod.com/540.mp4", video_info["video_url"])
+        self.assertEqual(
+            ["https://v1.douyinvod.com/540.mp4", "https://v3.douyinvod.com/540.mp4"],
+            video_info["video_urls"],
+        )
+        self.assertEqual(75_000_000, video_info["bytes_saved"])
+
+    def test_low_bitrate_mode_prefers_acceptable_audio_only_stream(self) -> None:
+        video_info = self._get_video_info(build_iteminfo_payload(include_audio=True), prefer_low_bitrate=True)
+
+        self.assertEqual("https://a.douyinvod.com/64k.m4a", video_info["video_url"])
+        self.assertEqual(87_600_000, video_info["bytes_saved"])
+
+    def test_collects_camel_case_render_data_renditions(self) -> None:
+        downloader = SimpleDouyinDownloader(prefer_low_bitrate=True)
+        video = {
+            "playAddr": [{"src": "//v26-web.douyinvod.com/default.mp4"}],
+            "bitRateList": [
+                {"gearName": "adapt_720", "bitRate": 900_000, "playAddr": [{"src": "//v26-web.douyinvod.com/720.mp4"}]},
+                {"gearName": "adapt_lowest", "bitRate": 300_000, "playAddr": [{"src": "//v26-web.douyinvod.com/low.mp4"}]},
+            ],
+        }
+
+        selected = downloader._select_rendition(downloader._collect_renditions(video))
+
+        self.assertEqual("adapt_lowest", selected["name"])
+        self.assertEqual(["https://v26-web.douyinvod.com/low.mp4"], selected["urls"])
+
+
+class FailingSession:
+    def get(self, *_args, **_kwargs):
+        raise AssertionError("network should not be used on cache hit")
+
+
+class MetadataCacheIntegrationTests(unittest.TestCase):
+    def test_second_lookup_is_served_from_cache_without_network(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = VideoMetadataCache(Path(tmp_dir) / "cache.json")
+            downloader = SimpleDouyinDownloader(cache=cache)
+            downloader.session = FakeApiSession(build_iteminfo_payload())
+            with redirect_stdout(io.StringIO()):
+                first = downloader.get_video_info("123")
+
+            low_bitrate_downloader = SimpleDouyinDownloader(prefer_low_bitrate=True, cache=cache)
+            low_bitrate_downloader.session = FailingSession()
+            with redirect_stdout(io.StringIO()):
+                cached = low_bitrate_downloader.get_video_info("123")
+
+            self.assertEqual("早间财经", cached["title"])
+            self.assertTrue(cached["from_cache"])
+            self.assertNotEqual(first["video_url"], cached["video_url"])
+            self.assertEqual("https://v1.douyinvod.com/540.mp4", cached["video_url"])
+
+    def test_short_link_resolution_is_cached(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = VideoMetadataCache(Path(tmp_dir) / "cache.json")
+            cache.put_video_id("https://v.douyin.com/abc/", "7511111111111111111")
+            downloader = SimpleDouyinDownloader(cache=cache)
+            downloader.session = FailingSession()
+
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual("7511111111111111111", downloader.extract_video_id("https://v.douyin.com/abc/"))
+
+
+class ArtifactStoreIntegrationTests(unittest.TestCase):
+    def test_second_download_of_same_video_is_served_from_store(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = DownloadArtifactStore(Path(tmp_dir) / "store")
+            downloader = SimpleDouyinDownloader(store=store)
+            downloader.session = FakeApiSession(build_iteminfo_payload())
+            output_dir = Path(tmp_dir) / "downloads"
+
+            def fake_download_video(video_url, filename, **_kwargs):
+                Path(filename).write_bytes(b"mp4-bytes")
+                return True
+
+            with patch.object(downloader, "extract_video_id", return_value="123"):
+                with patch.object(downloader, "download_video", side_effect=fake_download_video):
+                    with redirect_stdout(io.StringIO()):
+                        first_path = downloader.download_by_url("https://v.douyin.com/a/", str(output_dir))
+            Path(first_path).unlink()
+
+            downloader.session = FailingSession()
+            with patch.object(downloader, "extract_video_id", return_value="123"):
+                with redirect_stdout(io.StringIO()):
+                    second_path = downloader.download_by_url("https://v.douyin.com/b/", str(output_dir), audio_only=True)
+
+            self.assertEqual(first_path, second_path)
+            self.assertEqual(b"mp4-bytes", Path(second_path).read_bytes())
+
+    def test_low_bitrate_download_is_not_reused_for_full_rendition(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = DownloadArtifactStore(Path(tmp_dir) / "store")
+            output_dir = Path(tmp_dir) / "downloads"
+
+            def download(downloader, body, **kwargs):
+                downloader.session = FakeApiSession(build_iteminfo_payload())
+                writes = []
+
+                def fake_download_video(video_url, filename, **_kwargs):
+                    writes.append(filename)
+                    Path(filename).write_bytes(body)
+                    return True
+
+                with patch.object(downloader, "extract_video_id", return_value="123"), \
+                        patch.object(downloader, "download_video", side_effect=fake_download_video), \
+                        redirect_stdout(io.StringIO()):
+                    path = downloader.download_by_url("https://v.douyin.com/a/", str(output_dir), **kwargs)
+                return path, writes
+
+            _, low_writes = download(SimpleDouyinDownloader(prefer_low_bitrate=True, store=store), b"low")
+            full_path, full_writes = download(SimpleDouyinDownloader(store=store), b"full")
+            _, reused_writes = download(SimpleDouyinDownloader(prefer_low_bitrate=True, store=store), b"again")
+
+            self.assertEqual(1, len(low_writes))
+            self.assertEqual(1, len(full_writes))
+            self.assertEqual(b"full", Path(full_path).read_bytes())
+            self.assertEqual([], reused_writes)
+
+
+class PageExtractorTests(unittest.TestCase):
+    def test_prefers_play_addr_over_earlier_lower_priority_candidates(self) -> None:
+        content = (
+            '<a href="https://v1.douyinvod.com/early.mp4">x</a>'
+            '"playAddr":"https://v2.douyinvod.com/play-addr.mp4"'
+            '"play_addr":{"uri":"v0","url_list":["https:\\u002F\\u002Faweme.snssdk.com\\u002Fplaywm\\u002F?video_id=v0"]}'
+        )
+
+        self.assertEqual("https://aweme.snssdk.com/play/?video_id=v0", extract_page_video_url(content))
+
+    def test_skips_unacceptable_keyed_candidates(self) -> None:
+        content = '"playAddr":"/relative/path""playAddr":"https://v3.douyinvod.com/ok.mp4"'
+
+        self.assertEqual("https://v3.douyinvod.com/ok.mp4", extract_page_video_url(content))
+
+    def test_finds_host_urls_inside_quoted_spans(self) -> None:
+        content = '"cover":"https://p3.douyinpic.com/a.jpeg","src":"https://cdn.example.com/x?u=https://v5.douyinvod.com/v.mp4&a=1"'
+
+        self.assertEqual(
+            "https://cdn.example.com/x?u=https://v5.douyinvod.com/v.mp4&a=1",
+            extract_page_video_url(content),
+        )
+
+    def test_host_priority_prefers_douyinvod_over_plain_mp4(self) -> None:
+        content = '"a":"https://example.com/intro.mp4","b":"https://v9.douyinvod.com/main"'
+
+        self.assertEqual("https://v9.douyinvod.com/main", extract_page_video_url(content))
+
+    def test_returns_none_without_candidates(self) -> None:
+        self.assertIsNone(extract_page_video_url('<html><a href="https://www.douyin.com/">抖音</a></html>'))
+
+    def test_extract_page_title_ignores_default_title(self) -> None:
+        self.assertIsNone(extract_page_title("<title>抖音</title>"))
+        self.assertEqual("早间财经", extract_page_title("<title>早间财经</title>"))
+
+    def test_iter_page_json_decodes_url_encoded_render_data(self) -> None:
+        content = (
+            '<script id="RENDER_DATA" type="application/json">%7B%22a%22%3A1%7D</script>'
+            "<script>window._SSR_HYDRATED_DATA = {&quot;b&quot;:2}</script>"
+        )
+
+        self.assertEqual(['{"a":1}', '{"b":2}'], list(iter_page_json(content)))
+
+
+def build_render_data() -> dict:
+    return {
+        "23": {
+            "aweme": {
+                "detail": {
+                    "desc": "午间快讯",
+                    "authorInfo": {"nickname": "财经作者"},
+                    "video": {
+                        "playAddr": [{"src": "//v26-web.douyinvod.com/default.mp4"}],
+                        "bitRateList": [
+                            {"gearName": "adapt_720", "bitRate": 900_000, "playAddr": [{"src": "//v26-web.douyinvod.com/720.mp4"}]},
+                            {"gearName": "adapt_lowest", "bitRate": 300_000, "playAddr": [{"src": "//v26-web.douyinvod.com/low.mp4"}]},
+                        ],
+                    },
+                }
+            }
+        }
+    }
+
+
+class FakePageResponse:
+    def __init__(self, text: str):
+        self.status_code = 200
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.elapsed = timedelta(milliseconds=20)
+
+
+class FakePageSession:
+    def __init__(self, pages: dict[str, str]):
+        self.pages = pages
+
+    def get(self, url, headers=None, timeout=None, **_kwargs):
+        for prefix, text in self.pages.items():
+            if url.startswith(prefix):
+                return FakePageResponse(text)
+        return FakePageResponse("")
+
+
+class JsonRenditionResolverTests(unittest.TestCase):
+    def test_known_path_returns_all_renditions_and_detail(self) -> None:
+        downloader = SimpleDouyinDownloader()
+
+        renditions, detail = downloader._collect_json_renditions(build_render_data())
+
+        self.assertEqual("午间快讯", detail["desc"])
+        self.assertEqual(
+            [(None, "https://v26-web.douyinvod.com/default.mp4"),
+             (900_000, "https://v26-web.douyinvod.com/720.mp4"),
+             (300_000, "https://v26-web.douyinvod.com/low.mp4")],
+            [(item["bit_rate"], item["urls"][0]) for item in renditions],
+        )
+
+    def test_generic_walk_collects_every_candidate_in_one_pass(self) -> None:
+        downloader = SimpleDouyinDownloader()
+        data = {
+            "unknown": [
+                {"player": {"bitRate": 500_000, "url": "https://v1.douyinvod.com/500.mp4"}},
+                {"player": {"bitRate": 200_000, "url": "https://v1.douyinvod.com/200.mp4"}},
+                {"cover": {"url": "https://p3.douyinpic.com/cover.jpeg"}},
+                {"download_addr": {"url_list": ["https://v1.douyinvod.com/download.mp4"]}},
+            ]
+        }
+
+        renditions, detail = downloader._collect_json_renditions(data)
+
+        self.assertIsNone(detail)
+        self.assertEqual(
+            [(500_000, "https://v1.douyinvod.com/500.mp4"),
+             (200_000, "https://v1.douyinvod.com/200.mp4"),
+             (None, "https://v1.douyinvod.com/download.mp4")],
+            [(item["bit_rate"], item["urls"][0]) for item in renditions],
+        )
+
+    def test_generic_walk_is_depth_bounded(self) -> None:
+        downloader = SimpleDouyinDownloader()
+        data: dict = {"url": "https://v1.douyinvod.com/deep.mp4"}
+        for _ in range(40):
+            data = {"child": data}
+
+        self.assertEqual(([], None), downloader._collect_json_renditions(data))
+
+    def test_pc_page_render_data_is_used_when_mobile_page_has_no_url(self) -> None:
+        downloader = SimpleDouyinDownloader(prefer_low_bitrate=True)
+        render_data = quote(json.dumps(build_render_data()))
+        downloader.session = FakePageSession({
+            "https://m.douyin.com/": "<html><title>抖音</title></html>",
+            "https://www.douyin.com/video/": f'<script id="RENDER_DATA" type="application/json">{render_data}</script>',
+        })
+
+        with redirect_stdout(io.StringIO()):
+            video_info = downloader._get_from_page("123")
+
+        self.assertEqual("午间快讯", video_info["title"])
+        self.assertEqual("财经作者", video_info["author"])
+        self.assertEqual("https://v26-web.douyinvod.com/low.mp4", video_info["video_url"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import io
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from benchmarks.douyin_fixture_server import (
+    CDN_HOSTS,
+    RESOLVE_PATHS,
+    FixtureConfig,
+    FixtureServer,
+    mount_fixture,
+    payload_bytes,
+)
+from scripts.douyin_download import SimpleDouyinDownloader
+
+
+class FixtureServerEndToEndTests(unittest.TestCase):
+    """下载器在本地替身服务上走完短链解析、视频信息获取和下载的全流程。"""
+
+    def _download(self, config: FixtureConfig, connections: int = 1, hedge_delay: float = 0) -> Path:
+        with FixtureServer(config) as server, tempfile.TemporaryDirectory() as tmp_dir:
+            downloader = SimpleDouyinDownloader(prefer_low_bitrate=True, hedge_delay=hedge_delay)
+            mount_fixture(downloader.session, server.base_url)
+            with redirect_stdout(io.StringIO()):
+                path = downloader.download_by_url(server.short_url, tmp_dir, connections=connections)
+            self.assertIsNotNone(path)
+            self.assertEqual(payload_bytes(0, config.video_size - 1), Path(path).read_bytes())
+            return Path(path)
+
+    def test_each_resolve_path_downloads_the_video(self) -> None:
+        for resolve_via in RESOLVE_PATHS:
+            with self.subTest(resolve_via=resolve_via):
+                config = FixtureConfig(video_size=256 * 1024 + 7, resolve_via=resolve_via, page_padding=64 * 1024)
+                path = self._download(config)
+                self.assertEqual(f"本地替身视频_{config.video_id}.mp4", path.name)
+
+    def test_segmented_download_against_range_endpoint(self) -> None:
+        self._download(FixtureConfig(video_size=1024 * 1024 + 3), connections=4)
+
+    def test_slow_mirror_is_hedged(self) -> None:
+        config = FixtureConfig(video_size=128 * 1024, host_latency={CDN_HOSTS[0]: 2.0})
+        started = time.monotonic()
+
+        self._download(config, hedge_delay=0.05)
+
+        # 首选镜像要 2 秒才响应，对冲到第二个镜像后应远早于此完成
+        self.assertLess(time.monotonic() - started, 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from scripts.douyin_mirrors import MirrorStatsStore, mirror_host
+
+
+class MirrorStatsStoreTests(unittest.TestCase):
+    def test_rank_prefers_faster_mirror_and_persists_stats(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store_path = Path(tmp_dir) / "mirrors.json"
+            store = MirrorStatsStore(store_path)
+            store.record_first_byte("https://slow.example.com/v.mp4?sig=1", 1.5)
+            store.record_transfer("https://slow.example.com/v.mp4?sig=1", 1024 * 1024, 2.0)
+            store.record_first_byte("https://fast.example.com/v.mp4?sig=1", 0.1)
+            store.record_transfer("https://fast.example.com/v.mp4?sig=1", 1024 * 1024, 0.2)
+
+            reloaded = MirrorStatsStore(store_path)
+            ranked = reloaded.rank([
+                "https://slow.example.com/v.mp4?sig=2",
+                "https://fast.example.com/v.mp4?sig=2",
+            ])
+
+            self.assertEqual("fast.example.com", mirror_host(ranked[0]))
+
+    def test_failures_push_mirror_down_and_unknown_mirror_uses_average(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = MirrorStatsStore(Path(tmp_dir) / "mirrors.json")
+            store.record_first_byte("https://a.example.com/v.mp4", 0.2)
+            store.record_failure("https://b.example.com/v.mp4")
+            store.record_failure("https://b.example.com/v.mp4")
+
+            ranked = store.rank([
+                "https://b.example.com/v.mp4",
+                "https://new.example.com/v.mp4",
+                "https://a.example.com/v.mp4",
+            ])
+
+            self.assertEqual(
+                ["a.example.com", "new.example.com", "b.example.com"],
+                [mirror_host(url) for url in ranked],
+            )
+            self.assertIsNone(store.score("https://new.example.com/v.mp4"))
+
+    def test_corrupted_stats_file_is_ignored(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store_path = Path(tmp_dir) / "mirrors.json"
+            store_path.write_text("{not json", encoding="utf-8")
+
+            store = MirrorStatsStore(store_path)
+
+            self.assertIsNone(store.score("https://a.example.com/v.mp4"))
+
+    def test_stores_sharing_a_file_save_from_several_threads(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store_path = Path(tmp_dir) / "mirrors.json"
+            stores = [MirrorStatsStore(store_path) for _ in range(4)]
+            errors = []
+
+            def record(store: MirrorStatsStore) -> None:
+                try:
+                    for _ in range(50):
+                        store.record_first_byte("https://a.example.com/v.mp4", 0.1)
+                except OSError as error:
+                    errors.append(error)
+
+            threads = [threading.Thread(target=record, args=(store,)) for store in stores]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual([], errors)
+            self.assertEqual(["mirrors.json"], [path.name for path in Path(tmp_dir).iterdir()])
+            self.assertIsNotNone(MirrorStatsStore(store_path).score("https://a.example.com/v.mp4"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+import io
+import socket
+import threading
+import unittest
+import urllib.request
+from contextlib import redirect_stdout
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scripts.douyin_download import SimpleDouyinDownloader
+from scripts.douyin_proxy_pool import (
+    DIRECT_ROUTE,
+    ProxyPool,
+    looks_like_ban,
+    parse_proxy_list,
+    playwright_proxy,
+)
+
+
+CHALLENGE_HTML = "<html><script>var __ac_signature = '_02B4Z6wo00f01';window.byted_acrawler.init();</script></html>"
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = b'{"status_code": 0}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+class ForwardingProxyHandler(BaseHTTPRequestHandler):
+    """只支持明文 HTTP 的转发代理，请求行是绝对地址。"""
+
+    def do_GET(self) -> None:
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+        with opener.open(self.path, timeout=5) as upstream:
+            body = upstream.read()
+            content_type = upstream.headers.get("Content-Type", "")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Proxy", self.server.name)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+class BanningProxyHandler(BaseHTTPRequestHandler):
+    """模拟出口被风控：所有请求都返回验证页。"""
+
+    def do_GET(self) -> None:
+        body = CHALLENGE_HTML.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+class RateLimitedProxyHandler(BaseHTTPRequestHandler):
+    """模拟出口被限流：所有请求都返回 429。"""
+
+    def do_GET(self) -> None:
+        self.send_response(429)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+def start_server(handler, name: str = "") -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.name = name
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server
+
+
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ProxyPoolScoringTests(unittest.TestCase):
+    def test_prefers_fast_healthy_route_and_spreads_in_flight_load(self) -> None:
+        pool = ProxyPool(["http://a:1", "http://b:1"])
+        pool.start("http://a:1")
+        pool.record_success("http://a:1", 0.1)
+        pool.start("http://b:1")
+        pool.record_success("http://b:1", 0.3)
+
+        self.assertEqual("http://a:1", pool.choose())
+
+        for _ in range(3):
+            pool.start("http://a:1")
+        self.assertEqual("http://b:1", pool.choose())
+
+    def test_errors_push_route_down(self) -> None:
+        pool = ProxyPool(["http://a:1", "http://b:1"])
+        pool.start("http://a:1")
+        pool.record_failure("http://a:1")
+        pool.start("http://b:1")
+        pool.record_success("http://b:1", 1.0)
+
+        self.assertEqual("http://b:1", pool.choose())
+
+    def test_ban_cooldown_doubles_and_all_banned_picks_soonest_release(self) -> None:
+        now = [0.0]
+        pool = ProxyPool(["http://a:1", "http://b:1"], ban_seconds=60, clock=lambda: now[0])
+        with redirect_stdout(io.StringIO()):
+            pool.record_ban("http://a:1")
+            self.assertEqual("http://b:1", pool.choose())
+            now[0] = 61
+            pool.record_ban("http://a:1")
+            pool.record_ban("http://b:1")
+
+        # a 第二次被风控冷却 120s（到 181s），b 冷却 60s（到 121s）
+        self.assertEqual("http://b:1", pool.choose())
+        now[0] = 122
+        self.assertFalse(pool.is_banned("http://b:1"))
+        self.assertTrue(pool.is_banned("http://a:1"))
+
+    def test_parse_and_convert_routes(self) -> None:
+        self.assertEqual(
+            ["http://u:p@10.0.0.1:8080", DIRECT_ROUTE, "socks5://10.0.0.2:1080"],
+            parse_proxy_list(" http://u:p@10.0.0.1:8080, direct\nsocks5://10.0.0.2:1080 direct "),
+        )
+        self.assertEqual(
+            {"server": "http://10.0.0.1:8080", "username": "u", "password": "p"},
+            playwright_proxy("http://u:p@10.0.0.1:8080"),
+        )
+        self.assertIsNone(playwright_proxy(DIRECT_ROUTE))
+        self.assertTrue(looks_like_ban(CHALLENGE_HTML))
+        self.assertFalse(looks_like_ban(CHALLENGE_HTML + "x" * 200_000))
+
+
+class DownloaderProxyRoutingTests(unittest.TestCase):
+    """用本地的转发代理、风控代理和不可达端口验证请求路由。"""
+
+    def setUp(self) -> None:
+        self.origin = start_server(OriginHandler)
+        self.good_proxy = start_server(ForwardingProxyHandler, "good")
+        self.banning_proxy = start_server(BanningProxyHandler)
+        for server in (self.origin, self.good_proxy, self.banning_proxy):
+            self.addCleanup(server.server_close)
+            self.addCleanup(server.shutdown)
+        self.origin_url = f"http://127.0.0.1:{self.origin.server_address[1]}/web/api/v2/aweme/iteminfo/"
+        self.dead_route = f"http://127.0.0.1:{unused_port()}"
+        self.banning_route = f"http://127.0.0.1:{self.banning_proxy.server_address[1]}"
+        self.good_route = f"http://127.0.0.1:{self.good_proxy.server_address[1]}"
+        self.limited_proxy = start_server(RateLimitedProxyHandler)
+        self.addCleanup(self.limited_proxy.server_close)
+        self.addCleanup(self.limited_proxy.shutdown)
+        self.limited_route = f"http://127.0.0.1:{self.limited_proxy.server_address[1]}"
+
+    def test_requests_fail_over_and_settle_on_healthy_proxy(self) -> None:
+        pool = ProxyPool([self.dead_route, self.banning_route, self.good_route])
+        downloader = SimpleDouyinDownloader(proxy_pool=pool)
+
+        with redirect_stdout(io.StringIO()):
+            responses = [downloader.session.get(self.origin_url, timeout=5) for _ in range(3)]
+
+        for response in responses:
+            self.assertEqual({"status_code": 0}, response.json())
+            self.assertEqual("good", response.headers["X-Proxy"])
+        self.assertTrue(pool.is_banned(self.banning_route))
+        self.assertEqual(self.good_route, pool.choose())
+
+    def test_challenge_page_is_returned_when_every_route_is_banned(self) -> None:
+        pool = ProxyPool([self.banning_route])
+        downloader = SimpleDouyinDownloader(proxy_pool=pool)
+
+        with redirect_stdout(io.StringIO()):
+            response = downloader.session.get(self.origin_url, timeout=5)
+
+        self.assertIn("__ac_signature", response.text)
+        self.assertTrue(pool.is_banned(self.banning_route))
+
+    def test_rate_limited_last_attempt_counts_against_the_route(self) -> None:
+        pool = ProxyPool([self.limited_route])
+        downloader = SimpleDouyinDownloader(proxy_pool=pool)
+
+        with redirect_stdout(io.StringIO()):
+            response = downloader.session.get(self.origin_url, timeout=5)
+
+        self.assertEqual(429, response.status_code)
+        self.assertTrue(pool.is_banned(self.limited_route))
+        self.assertGreater(pool.score(self.limited_route), 0)
+
+    def test_resent_request_reports_its_own_elapsed_time(self) -> None:
+        pool = ProxyPool([self.banning_route, self.good_route])
+        downloader = SimpleDouyinDownloader(proxy_pool=pool)
+
+        with redirect_stdout(io.StringIO()):
+            response = downloader.session.get(self.origin_url, timeout=5)
+
+        self.assertEqual("good", response.headers["X-Proxy"])
+        self.assertGreater(response.elapsed, timedelta(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.douyin_store import DownloadArtifactStore, file_sha256
+
+
+class DownloadArtifactStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+
+    def _write(self, name: str, body: bytes) -> Path:
+        path = self.root / "downloads" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+        return path
+
+    def test_lookup_survives_deleting_the_downloaded_file(self) -> None:
+        store = DownloadArtifactStore(self.root / "store")
+        source = self._write("早间财经_111.mp4", b"video-bytes")
+        store.add("111", "video", source)
+        source.unlink()
+
+        artifact = DownloadArtifactStore(self.root / "store").lookup("111", "video")
+
+        self.assertEqual("早间财经_111.mp4", artifact["filename"])
+        self.assertEqual(b"video-bytes", Path(artifact["path"]).read_bytes())
+        self.assertIsNone(store.lookup("111", "audio"))
+
+    def test_identical_content_is_stored_once(self) -> None:
+        store = DownloadArtifactStore(self.root / "store")
+        first = store.add("111", "audio", self._write("a.mp3", b"same transcript audio"))
+        second = store.add("222", "audio", self._write("b.mp3", b"same transcript audio"))
+
+        self.assertEqual(first["path"], second["path"])
+        self.assertEqual(["111", "222"], store.find_by_hash(file_sha256(first["path"])))
+        self.assertEqual(1, len(list((self.root / "store" / "objects").rglob("*.mp3"))))
+
+    def test_missing_object_is_dropped_from_index(self) -> None:
+        store = DownloadArtifactStore(self.root / "store")
+        artifact = store.add("111", "video", self._write("a.mp4", b"video"))
+        Path(artifact["path"]).unlink()
+
+        self.assertIsNone(store.lookup("111", "video"))
+        self.assertEqual([], store.find_by_hash(artifact["sha256"]))
+
+    def test_evicts_least_recently_used_objects_over_size_limit(self) -> None:
+        now = [1000.0]
+        store = DownloadArtifactStore(self.root / "store", max_bytes=10, clock=lambda: now[0])
+        store.add("111", "video", self._write("a.mp4", b"a" * 6))
+        now[0] += 1
+        store.add("222", "video", self._write("b.mp4", b"b" * 6))
+
+        self.assertIsNone(store.lookup("111", "video"))
+        self.assertIsNotNone(store.lookup("222", "video"))
+
+    def test_hits_update_usage_in_memory_until_flush(self) -> None:
+        now = [1000.0]
+        store = DownloadArtifactStore(self.root / "store", clock=lambda: now[0])
+        artifact = store.add("111", "audio", self._write("a.mp3", b"audio"))
+        stored = store.index_path.stat().st_mtime_ns, store.index_path.read_text(encoding="utf-8")
+
+        now[0] += 5
+        self.assertIsNotNone(store.lookup("111", "audio"))
+        self.assertEqual(stored, (store.index_path.stat().st_mtime_ns, store.index_path.read_text(encoding="utf-8")))
+
+        store.flush()
+        payload = json.loads(store.index_path.read_text(encoding="utf-8"))
+        self.assertEqual(1005, payload["objects"][artifact["sha256"]]["last_used_at"])
+
+    def test_version_1_videos_are_treated_as_low_bitrate(self) -> None:
+        store = DownloadArtifactStore(self.root / "store")
+        store.add("111", "video", self._write("a.mp4", b"maybe-low"))
+        payload = json.loads(store.index_path.read_text(encoding="utf-8"))
+        payload["version"] = 1
+        store.index_path.write_text(json.dumps(payload), encoding="utf-8")
+
+        reloaded = DownloadArtifactStore(self.root / "store")
+
+        self.assertIsNone(reloaded.lookup("111", "video"))
+        self.assertIsNotNone(reloaded.lookup("111", "low_bitrate_video"))
+
+
+if __name__ == "__main__":
+    unittest.main()
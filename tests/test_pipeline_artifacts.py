@@ -0,0 +1,55 @@
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from scripts.pipeline_artifacts import atomic_write_text, commit_artifact, temp_artifact_path
+
+
+class PipelineArtifactTests(unittest.TestCase):
+    def test_atomic_write_replaces_file_without_leaving_temp_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "20250101-0800.txt"
+            path.write_text("旧内容", encoding="utf-8")
+
+            self.assertEqual(path, atomic_write_text(path, "新闻文字稿"))
+
+            self.assertEqual("新闻文字稿", path.read_text(encoding="utf-8"))
+            self.assertEqual(["20250101-0800.txt"], os.listdir(tmp_dir))
+
+    def test_failed_write_keeps_previous_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "summary.md"
+            path.write_text("完整的旧总结", encoding="utf-8")
+
+            with self.assertRaises(UnicodeEncodeError):
+                atomic_write_text(path, "\ud800", encoding="utf-8")
+
+            self.assertEqual("完整的旧总结", path.read_text(encoding="utf-8"))
+            self.assertEqual(["summary.md"], os.listdir(tmp_dir))
+
+    def test_commit_moves_temp_file_into_place(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            final_path = Path(tmp_dir) / "audio.mp3"
+            temp_path = temp_artifact_path(final_path)
+            temp_path.write_bytes(b"ID3")
+
+            commit_artifact(temp_path, final_path)
+
+            self.assertFalse(temp_path.exists())
+            self.assertEqual(b"ID3", final_path.read_bytes())
+
+    def test_temp_paths_differ_between_threads(self) -> None:
+        final_path = Path("news") / "20250101-0800.txt"
+        paths = []
+        thread = threading.Thread(target=lambda: paths.append(temp_artifact_path(final_path)))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(final_path.parent, paths[0].parent)
+        self.assertNotEqual(temp_artifact_path(final_path), paths[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
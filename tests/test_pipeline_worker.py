@@ -0,0 +1,94 @@
+import io
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from scripts import pipeline_worker
+from scripts.pipeline_worker import PipelineWorker, WorkerClient
+
+
+class PipelineWorkerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.socket_path = self.root / "worker.sock"
+        self.loads: list[str] = []
+        self.calls: list[tuple[str, str]] = []
+
+    def _start(self, idle_timeout: float = 30.0) -> threading.Thread:
+        def load_whisper() -> None:
+            self.loads.append("whisper")
+            time.sleep(0.05)
+
+        def transcribe(audio_path, timestamp, output_dir=None, segment_dir=None, segmentation=None):
+            self.calls.append(("transcribe", segmentation))
+            worker.ensure_loaded("whisper")
+            path = Path(output_dir, f"{timestamp}.txt")
+            path.write_text("文字稿", encoding="utf-8")
+            return str(path)
+
+        def summarize(news_file, timestamp, output_dir=None):
+            self.calls.append(("summarize", news_file))
+            return None
+
+        worker = PipelineWorker(
+            self.socket_path,
+            idle_timeout=idle_timeout,
+            handlers={"transcribe": transcribe, "summarize": summarize},
+            loaders={"whisper": load_whisper},
+        )
+        stdout = redirect_stdout(io.StringIO())
+        stdout.__enter__()
+        self.addCleanup(stdout.__exit__, None, None, None)
+        thread = threading.Thread(target=worker.serve_forever, daemon=True)
+        thread.start()
+        client = WorkerClient(self.socket_path)
+        deadline = time.monotonic() + 5
+        while not client.available() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return thread
+
+    def test_model_is_loaded_once_and_status_reports_load_time(self) -> None:
+        thread = self._start()
+        client = WorkerClient(self.socket_path)
+        audio = self.root / "a.mp3"
+
+        first = client.transcribe(audio, "20250101-0800", self.root, self.root / "segments")
+        second = client.transcribe(audio, "20250101-0900", self.root, self.root / "segments", segmentation="vad")
+        self.assertIsNone(client.summarize(first, "20250101-0800", self.root))
+        status = client.status()
+        client.shutdown()
+        thread.join(5)
+
+        self.assertEqual(self.root / "20250101-0800.txt", first)
+        self.assertEqual(self.root / "20250101-0900.txt", second)
+        self.assertEqual(["whisper"], self.loads)
+        self.assertEqual([("transcribe", "fixed"), ("transcribe", "vad")], self.calls[:2])
+        self.assertGreater(status["model_load_seconds"]["whisper"], 0)
+        self.assertEqual((0, 2, 1), (status["queue_depth"], status["completed"], status["failed"]))
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(self.socket_path.exists())
+
+    def test_worker_exits_after_idle_timeout(self) -> None:
+        with patch.object(pipeline_worker, "IDLE_CHECK_INTERVAL", 0.05):
+            thread = self._start(idle_timeout=0.2)
+            thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(WorkerClient(self.socket_path).available())
+
+    def test_unreachable_worker_raises(self) -> None:
+        client = WorkerClient(self.root / "missing.sock")
+
+        self.assertFalse(client.available())
+        with self.assertRaises(pipeline_worker.WorkerError):
+            client.status()
+
+
+if __name__ == "__main__":
+    unittest.main()
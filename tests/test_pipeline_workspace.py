@@ -0,0 +1,57 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from scripts import pipeline_workspace
+from scripts.pipeline_workspace import RunWorkspace, resolve_workspace_root
+
+
+class RunWorkspaceTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+
+    def test_concurrent_runs_get_separate_directories_and_are_cleaned_up(self) -> None:
+        with redirect_stdout(io.StringIO()):
+            with RunWorkspace("7301234567890", root=self.root) as first, \
+                    RunWorkspace("7301234567890", root=self.root) as second:
+                self.assertNotEqual(first.path, second.path)
+                self.assertTrue(first.path.name.startswith("7301234567890-"))
+                (first.segments_dir / "part_000.mp3").write_bytes(b"audio")
+                self.assertEqual([], list(second.segments_dir.iterdir()))
+                paths = [first.path, second.path]
+
+        self.assertFalse(any(path.exists() for path in paths))
+
+    def test_workspace_is_removed_after_failure_unless_kept(self) -> None:
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(RuntimeError):
+                with RunWorkspace("20250101-0800", root=self.root) as workspace:
+                    failed_path = workspace.path
+                    raise RuntimeError("boom")
+            with RunWorkspace("20250101-0800", root=self.root, keep=True) as kept:
+                pass
+
+        self.assertFalse(failed_path.exists())
+        self.assertTrue(kept.downloads_dir.is_dir())
+
+    def test_key_is_sanitized_and_tmpfs_falls_back_when_unavailable(self) -> None:
+        self.assertEqual("a_b_c", RunWorkspace("a/b c", root=self.root).key)
+        self.assertEqual(self.root, resolve_workspace_root(self.root, use_tmpfs=True))
+
+        with patch.object(pipeline_workspace, "tmpfs_available", return_value=False), \
+                redirect_stdout(io.StringIO()):
+            self.assertEqual(pipeline_workspace.DEFAULT_WORKSPACE_ROOT, resolve_workspace_root(use_tmpfs=True))
+        with patch.object(pipeline_workspace, "tmpfs_available", return_value=True):
+            self.assertEqual(
+                pipeline_workspace.TMPFS_ROOT / pipeline_workspace.TMPFS_WORKSPACE_DIR,
+                resolve_workspace_root(use_tmpfs=True),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
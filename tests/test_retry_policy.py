@@ -0,0 +1,208 @@
+import io
+import json
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import requests
+
+from scripts.retry_policy import AdaptiveTimeout, RetryPolicy, completion_retry_policy, is_connection_refused
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """前 failures 次请求返回 503，之后返回 200。"""
+
+    def do_GET(self) -> None:
+        self.server.requests += 1
+        if self.server.requests <= self.server.failures:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """每个请求都要 0.3 秒才返回。"""
+
+    def do_POST(self) -> None:
+        self.server.requests += 1
+        time.sleep(0.3)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RetryPolicyTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        self.server.requests = 0
+        self.server.failures = 2
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self.sleeps: list[float] = []
+
+    def _policy(self, **kwargs) -> RetryPolicy:
+        return RetryPolicy(sleep=self.sleeps.append, rng=lambda: 1.0, **kwargs)
+
+    def test_retries_server_errors_with_exponential_backoff(self) -> None:
+        policy = self._policy(base_delay=0.5)
+
+        with redirect_stdout(io.StringIO()):
+            response = policy.request(requests, "GET", self.url)
+
+        self.assertEqual({"ok": True}, response.json())
+        self.assertEqual(3, self.server.requests)
+        self.assertEqual([0.5, 1.0], self.sleeps)
+
+    def test_last_retryable_response_is_returned_to_caller(self) -> None:
+        self.server.failures = 10
+        policy = self._policy(max_attempts=2)
+
+        with redirect_stdout(io.StringIO()):
+            response = policy.request(requests, "GET", self.url)
+
+        self.assertEqual(503, response.status_code)
+        self.assertEqual(2, self.server.requests)
+
+    def test_connection_refused_fails_without_retry(self) -> None:
+        policy = self._policy()
+        started = time.monotonic()
+
+        with self.assertRaises(requests.ConnectionError) as raised:
+            policy.request(requests, "GET", f"http://127.0.0.1:{unused_port()}/")
+
+        self.assertTrue(is_connection_refused(raised.exception))
+        self.assertEqual([], self.sleeps)
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_non_idempotent_requests_do_not_retry_read_timeouts(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+        server.requests = 0
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        policy = self._policy(idempotent=False)
+
+        with self.assertRaises(requests.ReadTimeout):
+            policy.request(requests, "POST", f"http://127.0.0.1:{server.server_address[1]}/", timeout=(1.0, 0.05))
+
+        self.assertEqual(1, server.requests)
+        self.assertEqual([], self.sleeps)
+        self.assertTrue(policy.should_retry(requests.exceptions.ConnectTimeout("connect timed out")))
+
+    def test_non_idempotent_requests_still_retry_server_errors(self) -> None:
+        policy = self._policy(idempotent=False)
+
+        with redirect_stdout(io.StringIO()):
+            response = policy.request(requests, "GET", self.url)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(3, self.server.requests)
+
+    def test_slow_completion_after_fast_ones_keeps_the_read_floor(self) -> None:
+        class CompletionSession:
+            """按给定的生成耗时返回补全，耗时超过读取超时时抛出 ReadTimeout。"""
+
+            def __init__(self, durations):
+                self.durations = list(durations)
+                self.timeouts = []
+
+            def post(self, _url, timeout, **_kwargs):
+                self.timeouts.append(timeout)
+                seconds = self.durations.pop(0)
+                if seconds > timeout[1]:
+                    raise requests.ReadTimeout("read timed out")
+                return SimpleNamespace(status_code=200, elapsed=timedelta(seconds=seconds), content=b"{}")
+
+        policy = completion_retry_policy("openai:test", initial=(5.0, 60.0), stats_file=None)
+        session = CompletionSession([2.0] * 5 + [50.0])
+
+        for _ in range(6):
+            self.assertEqual(200, policy.request(session, "POST", self.url).status_code)
+
+        self.assertTrue(all(read >= 60.0 for _, read in session.timeouts))
+        self.assertTrue(all(connect >= 5.0 for connect, _ in session.timeouts))
+
+    def test_backoff_is_jittered_and_capped(self) -> None:
+        policy = RetryPolicy(base_delay=1.0, max_delay=4.0, rng=lambda: 0.5)
+
+        self.assertEqual([0.5, 1.0, 2.0, 2.0], [policy.backoff(attempt) for attempt in range(4)])
+        self.assertEqual(3.0, policy.backoff(0, retry_after=3.0))
+        self.assertEqual(4.0, policy.backoff(0, retry_after=60.0))
+
+
+class AdaptiveTimeoutTests(unittest.TestCase):
+    def test_initial_timeout_is_used_until_observed(self) -> None:
+        timeouts = AdaptiveTimeout(initial=(3.0, 20.0))
+
+        self.assertEqual((3.0, 20.0), timeouts.timeout())
+
+    def test_deadlines_scale_with_latency_and_throughput(self) -> None:
+        timeouts = AdaptiveTimeout(connect_bounds=(0.5, 10.0), read_bounds=(1.0, 120.0), multiplier=4.0)
+        timeouts.observe_latency(0.2)
+        timeouts.observe_transfer(1024 * 1024, 1.0)
+
+        connect, read = timeouts.timeout()
+        self.assertAlmostEqual(0.8, connect)
+        self.assertAlmostEqual(1.0, read)
+        # 预计读取 4 MB，按 1 MB/s 的吞吐追加 4 × 4 秒
+        self.assertAlmostEqual(0.8 + 16.0, timeouts.timeout(expected_bytes=4 * 1024 * 1024)[1])
+
+        # 慢链路：吞吐降下来后读取超时跟着放宽，直到上限
+        for _ in range(20):
+            timeouts.observe_transfer(1024 * 1024, 20.0)
+        self.assertEqual(120.0, timeouts.timeout(expected_bytes=4 * 1024 * 1024)[1])
+
+    def test_connect_deadline_follows_fastest_recent_response(self) -> None:
+        timeouts = AdaptiveTimeout(connect_bounds=(0.1, 10.0), multiplier=4.0)
+        timeouts.observe_latency(0.05)
+        timeouts.observe_latency(20.0)
+
+        connect, read = timeouts.timeout()
+        # 一次生成很慢的响应会抬高读取超时，但连接超时仍然贴近网络往返时间
+        self.assertLess(connect, 5.0)
+        self.assertGreater(read, connect * 5)
+
+    def test_stats_are_persisted_per_endpoint(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stats_file = Path(tmp_dir) / "stats.json"
+            AdaptiveTimeout("qwen", stats_file=stats_file).observe_latency(2.0)
+            AdaptiveTimeout("openai", stats_file=stats_file).observe_latency(5.0)
+
+            reloaded = AdaptiveTimeout("qwen", read_bounds=(1.0, 300.0), stats_file=stats_file)
+            payload = json.loads(stats_file.read_text(encoding="utf-8"))
+
+        self.assertEqual(8.0, reloaded.timeout()[1])
+        self.assertEqual({"qwen", "openai"}, set(payload["endpoints"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,16 @@
+import io
+import json
 import tempfile
 import unittest
+from contextlib import redirect_stdout
 from datetime import date
 from pathlib import Path
+from unittest.mock import patch
 
 from scripts.douyin_state import ProcessedVideoStore
+from scripts import run_daily_author_pipeline
 from scripts.run_daily_author_pipeline import _published_at_to_timestamp, run_daily_pipeline
+from scripts.stage_metrics import RunMetrics
 
 
 class RunDailyAuthorPipelineTests(unittest.TestCase):
@@ -287,6 +293,102 @@ class RunDailyAuthorPipelineTests(unittest.TestCase):
                 processed_runs,
             )
 
+    def test_staged_runner_receives_pending_videos_and_records_successes(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            state_file = Path(temp_dir) / "processed.json"
+            staged_batches: list[list[tuple[str, str]]] = []
+
+            def fake_fetch(_author_url: str) -> list[dict[str, object]]:
+                return [
+                    {"video_id": "ok", "video_url": "https://example.com/ok", "published_at_raw": 1750204800000},
+                    {"video_id": "bad", "video_url": "https://example.com/bad", "published_at_raw": 1750208400000},
+                ]
+
+            def fake_staged(videos: list[tuple[str, str]]):
+                staged_batches.append(videos)
+                # 按完成顺序产出，不一定是提交顺序
+                yield 1, False
+                yield 0, True
+
+            exit_code = run_daily_pipeline(
+                author_url="https://example.com/author",
+                author_id="author-1",
+                state_file=state_file,
+                target_day=date(2025, 6, 18),
+                fetch_author_videos=fake_fetch,
+                run_videos_staged=fake_staged,
+            )
+
+            self.assertEqual(1, exit_code)
+            self.assertEqual(
+                [["https://example.com/ok", "https://example.com/bad"]],
+                [[video_url for video_url, _ in batch] for batch in staged_batches],
+            )
+            store = ProcessedVideoStore(state_file)
+            self.assertTrue(store.is_processed("author-1", "ok"))
+            self.assertFalse(store.is_processed("author-1", "bad"))
+
+    def test_local_qwen_model_gets_a_single_summarize_worker(self) -> None:
+        from scripts import run_pipeline
+
+        with patch.object(run_pipeline, "uses_local_qwen_model", return_value=True):
+            self.assertEqual(1, run_daily_author_pipeline.default_stage_workers()["summarize"])
+        with patch.object(run_pipeline, "uses_local_qwen_model", return_value=False):
+            self.assertEqual(
+                run_daily_author_pipeline.DEFAULT_STAGE_WORKERS, run_daily_author_pipeline.default_stage_workers()
+            )
+        self.assertEqual(
+            {"summarize": 3}, run_daily_author_pipeline._parse_stage_workers(["summarize=3"])
+        )
+
+    def test_batch_aggregates_per_video_stage_metrics(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            metrics_dir = Path(temp_dir) / "news"
+            report_dir = Path(temp_dir) / "reports"
+
+            def fake_fetch(_author_url: str) -> list[dict[str, object]]:
+                return [
+                    {"video_id": "a", "video_url": "https://example.com/a", "published_at": "2025-06-18T09:00:00+08:00"},
+                    {"video_id": "b", "video_url": "https://example.com/b", "published_at": "2025-06-18T10:00:00+08:00"},
+                ]
+
+            def fake_run(video_url: str, published_at: str) -> int:
+                metrics = RunMetrics(video_url, _published_at_to_timestamp(published_at))
+                with metrics.stage("transcribe") as record:
+                    record.ok = True
+                metrics.write(metrics_dir)
+                return 0
+
+            with redirect_stdout(io.StringIO()):
+                exit_code = run_daily_pipeline(
+                    author_url="https://example.com/author",
+                    author_id="author-1",
+                    state_file=Path(temp_dir) / "processed.json",
+                    target_day=date(2025, 6, 18),
+                    fetch_author_videos=fake_fetch,
+                    run_single_video=fake_run,
+                    metrics_dir=metrics_dir,
+                    batch_report_dir=report_dir,
+                )
+
+            self.assertEqual(0, exit_code)
+            (report_file,) = report_dir.glob("batch-*.json")
+            report = json.loads(report_file.read_text(encoding="utf-8"))
+            self.assertEqual(2, report["runs"])
+            self.assertEqual(["20250618-0900", "20250618-1000"], report["timestamps"])
+            self.assertEqual(2, report["stages"]["transcribe"]["runs"])
+
+    def test_each_video_runs_in_its_own_process_unless_in_process_is_given(self) -> None:
+        with patch.object(run_daily_author_pipeline, "run_daily_pipeline", return_value=0) as run:
+            run_daily_author_pipeline.main([])
+            run_daily_author_pipeline.main(["--in-process", "--worker-socket", "w.sock"])
+
+        default_runner = run.call_args_list[0].kwargs["run_single_video"]
+        in_process_runner = run.call_args_list[1].kwargs["run_single_video"]
+        self.assertIs(run_daily_author_pipeline._run_single_video_subprocess, default_runner.func)
+        self.assertIs(run_daily_author_pipeline._run_single_video_pipeline, in_process_runner.func)
+        self.assertEqual("w.sock", in_process_runner.keywords["worker_socket"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,335 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from scripts import douyin_download, openai_news_summary, run_pipeline
+from scripts.pipeline_worker import PipelineWorker, WorkerClient
+from scripts.pipeline_workspace import RunWorkspace
+from scripts.stage_cache import StageCache
+
+
+class InProcessPipelineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.calls: list[tuple] = []
+        fake_mp3_2_txt = types.ModuleType("scripts.mp3_2_txt")
+        fake_mp3_2_txt.transcribe_audio = self._transcribe
+        # 真实模块在导入时加载 whisper，这里换成只记录参数的替身
+        modules = patch.dict(sys.modules, {"scripts.mp3_2_txt": fake_mp3_2_txt})
+        modules.start()
+        self.addCleanup(modules.stop)
+        model_type = patch.object(run_pipeline, "AI_MODEL_TYPE", "openai")
+        model_type.start()
+        self.addCleanup(model_type.stop)
+        self.workspace = types.SimpleNamespace(
+            downloads_dir=Path("ws/downloads"), segments_dir=Path("ws/segments")
+        )
+
+    def _transcribe(self, audio_path, timestamp, segment_dir=None, segmentation=None):
+        self.calls.append(("transcribe", audio_path, timestamp, segment_dir, segmentation))
+        return Path("news") / f"{timestamp}.txt"
+
+    def _summarize(self, news_file, timestamp, output_dir=None):
+        self.calls.append(("summarize", news_file, timestamp))
+        return Path("news") / f"{timestamp}_标题.md"
+
+    def _run(self, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return run_pipeline.run_stages_in_process(
+                "https://v.douyin.com/abc/", "20250101-0800", self.workspace, **kwargs
+            )
+
+    def test_stages_hand_over_explicit_artifact_paths(self) -> None:
+        with patch.object(douyin_download, "download_url", return_value="downloads/视频.mp4") as download, \
+                patch.object(run_pipeline, "convert_to_mp3", return_value=Path("downloads/视频.mp3")) as convert, \
+                patch.object(openai_news_summary, "summarize_news", side_effect=self._summarize):
+            summary = self._run()
+
+        self.assertEqual(Path("news/20250101-0800_标题.md"), summary)
+        download.assert_called_once_with(
+            "https://v.douyin.com/abc/", str(Path("ws/downloads")), audio_only=False, lowest_bitrate=True,
+            use_store=True
+        )
+        convert.assert_called_once_with(Path("downloads/视频.mp4"))
+        self.assertEqual(
+            [
+                ("transcribe", str(Path("downloads/视频.mp3")), "20250101-0800", Path("ws/segments"), "fixed"),
+                ("summarize", Path("news/20250101-0800.txt"), "20250101-0800"),
+            ],
+            self.calls,
+        )
+
+    def test_streamed_audio_skips_conversion(self) -> None:
+        with patch.object(douyin_download, "download_url", return_value="downloads/视频.mp3"), \
+                patch.object(run_pipeline, "convert_to_mp3") as convert, \
+                patch.object(openai_news_summary, "summarize_news", side_effect=self._summarize):
+            self.assertIsNotNone(self._run(stream_audio=True))
+
+        convert.assert_not_called()
+        self.assertEqual("transcribe", self.calls[0][0])
+        self.assertEqual(str(Path("downloads/视频.mp3")), self.calls[0][1])
+
+    def test_worker_runs_transcription_and_summary(self) -> None:
+        class FakeWorker:
+            def __init__(self, calls):
+                self.calls = calls
+
+            def transcribe(self, audio_path, timestamp, output_dir, segment_dir, segmentation):
+                self.calls.append(("worker-transcribe", Path(audio_path), output_dir, segment_dir, segmentation))
+                return Path(output_dir) / f"{timestamp}.txt"
+
+            def summarize(self, news_file, timestamp, output_dir):
+                self.calls.append(("worker-summarize", news_file, output_dir))
+                return Path(output_dir) / f"{timestamp}_标题.md"
+
+        with patch.object(douyin_download, "download_url", return_value="downloads/视频.mp3"):
+            summary = self._run(worker=FakeWorker(self.calls), segmentation="vad")
+
+        self.assertEqual(Path("news/20250101-0800_标题.md"), summary)
+        self.assertEqual(
+            [
+                ("worker-transcribe", Path("downloads/视频.mp3"), "news", Path("ws/segments"), "vad"),
+                ("worker-summarize", Path("news/20250101-0800.txt"), "news"),
+            ],
+            self.calls,
+        )
+
+    def test_worker_that_exits_between_videos_falls_back_in_process(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        socket_path = Path(tmp_dir.name) / "worker.sock"
+
+        def worker_transcribe(audio_path, timestamp, output_dir=None, segment_dir=None, segmentation=None):
+            self.calls.append(("worker-transcribe", timestamp))
+            return str(Path(output_dir, f"{timestamp}.txt"))
+
+        def worker_summarize(news_file, timestamp, output_dir=None):
+            self.calls.append(("worker-summarize", timestamp))
+            return str(Path(output_dir, f"{timestamp}_标题.md"))
+
+        worker = PipelineWorker(
+            socket_path, handlers={"transcribe": worker_transcribe, "summarize": worker_summarize}, loaders={}
+        )
+        stdout = redirect_stdout(io.StringIO())
+        stdout.__enter__()
+        self.addCleanup(stdout.__exit__, None, None, None)
+        thread = threading.Thread(target=worker.serve_forever, daemon=True)
+        thread.start()
+        client = WorkerClient(socket_path)
+        deadline = time.monotonic() + 5
+        while not client.available() and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        with patch.object(douyin_download, "download_url", return_value="downloads/视频.mp3"), \
+                patch.object(openai_news_summary, "summarize_news", side_effect=self._summarize):
+            self.assertIsNotNone(self._run(worker=client))
+            # 两个视频之间工作进程退出（空闲超时或崩溃）
+            client.shutdown()
+            thread.join(5)
+            summary = run_pipeline.run_stages_in_process(
+                "https://v.douyin.com/abc/", "20250101-0900", self.workspace, worker=client
+            )
+
+        self.assertEqual(Path("news/20250101-0900_标题.md"), summary)
+        self.assertEqual(
+            [
+                ("worker-transcribe", "20250101-0800"),
+                ("worker-summarize", "20250101-0800"),
+                ("transcribe", str(Path("downloads/视频.mp3")), "20250101-0900", Path("ws/segments"), "fixed"),
+                ("summarize", Path("news/20250101-0900.txt"), "20250101-0900"),
+            ],
+            self.calls,
+        )
+
+    def test_failed_stage_stops_pipeline_and_exceptions_are_contained(self) -> None:
+        with patch.object(douyin_download, "download_url", side_effect=RuntimeError("boom")):
+            self.assertIsNone(self._run())
+        self.assertEqual([], self.calls)
+
+        with patch.object(douyin_download, "download_url", return_value="downloads/视频.mp3"), \
+                patch.object(openai_news_summary, "summarize_news", return_value=None):
+            self.assertIsNone(self._run())
+        self.assertEqual("transcribe", self.calls[0][0])
+
+
+class SubprocessPipelineTests(unittest.TestCase):
+    """子进程模式：各阶段通过确切的产出路径交接，不再等待或按目录通配查找。"""
+
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        previous_cwd = os.getcwd()
+        os.chdir(tmp_dir.name)
+        self.addCleanup(os.chdir, previous_cwd)
+        # 上一次运行遗留的文件不能被当成本次的下载结果
+        Path("downloads").mkdir()
+        Path("downloads/20250101-0800.mp3").write_bytes(b"stale")
+        Path("news").mkdir()
+        self.workspace = RunWorkspace("20250101-0800", root="workspaces")
+        with redirect_stdout(io.StringIO()):
+            self.workspace.create()
+        self.addCleanup(self.workspace.cleanup)
+        self.scripts: list[tuple[str, list[str]]] = []
+
+    def _fake_run_script(self, script_name, _description, args=None):
+        self.scripts.append((script_name, list(args or [])))
+        if script_name == "douyin_download.py":
+            output_dir, name = args[args.index("-o") + 1], args[args.index("-n") + 1]
+            suffix = ".mp3" if "--audio-only" in args else ".mp4"
+            Path(output_dir, f"{name}{suffix}").write_bytes(b"media")
+        elif script_name == "mp3_2_txt.py":
+            Path("news", f"{args[args.index('--timestamp') + 1]}.txt").write_text("文字稿", encoding="utf-8")
+        else:
+            summary = Path("news", f"{args[args.index('--timestamp') + 1]}_标题.md")
+            summary.write_text("标题\n\n总结", encoding="utf-8")
+            # 同一时间戳的旧总结不能被当成本次的产出
+            Path("news", f"{args[args.index('--timestamp') + 1]}_旧标题.md").write_text("旧", encoding="utf-8")
+            Path(args[args.index("--result-file") + 1]).write_text(str(summary), encoding="utf-8")
+        return True
+
+    def _fake_convert(self, mp4_file):
+        mp3_file = Path(mp4_file).with_suffix(".mp3")
+        mp3_file.write_bytes(b"audio")
+        Path(mp4_file).unlink()
+        return mp3_file
+
+    def _run(self, timestamp="20250101-0800", **kwargs) -> bool:
+        with patch.object(run_pipeline, "run_script", side_effect=self._fake_run_script), \
+                patch.object(run_pipeline, "convert_to_mp3", side_effect=self._fake_convert), \
+                patch.object(run_pipeline, "AI_MODEL_TYPE", "openai"), \
+                redirect_stdout(io.StringIO()):
+            return run_pipeline.run_stages_subprocess(
+                "https://v.douyin.com/abc/", timestamp, self.workspace, **kwargs
+            )
+
+    def test_stages_receive_exact_paths(self) -> None:
+        self.assertTrue(self._run())
+
+        download, transcribe, summarize = self.scripts
+        downloads_dir = self.workspace.downloads_dir
+        self.assertEqual(["-o", str(downloads_dir), "-n", "20250101-0800"], download[1][3:])
+        self.assertEqual(
+            (
+                "mp3_2_txt.py",
+                [
+                    "--timestamp", "20250101-0800",
+                    "--audio-path", str(downloads_dir / "20250101-0800.mp3"),
+                    "--segment-dir", str(self.workspace.segments_dir),
+                    "--segmentation", "fixed",
+                ],
+            ),
+            transcribe,
+        )
+        self.assertEqual(["--news-file", str(Path("news/20250101-0800.txt"))], summarize[1][-4:-2])
+        self.assertEqual("--result-file", summarize[1][-2])
+        self.assertFalse(Path(summarize[1][-1]).exists())
+
+    def test_cached_transcript_is_summarized_under_the_new_timestamp(self) -> None:
+        cache = StageCache("cache")
+        self.assertTrue(self._run(cache=cache))
+        self.scripts.clear()
+
+        self.assertTrue(self._run("20250101-0900", cache=cache, force_stages=("summarize",)))
+
+        self.assertNotIn("mp3_2_txt.py", [name for name, _ in self.scripts])
+        summarize = self.scripts[-1]
+        self.assertEqual(["--news-file", str(Path("news/20250101-0900.txt"))], summarize[1][-4:-2])
+        self.assertEqual("文字稿", Path("news/20250101-0900.txt").read_text(encoding="utf-8"))
+
+    def test_streamed_audio_skips_conversion_and_missing_output_fails(self) -> None:
+        with patch.object(run_pipeline, "convert_to_mp3") as convert:
+            self.assertTrue(self._run(stream_audio=True))
+        convert.assert_not_called()
+
+        for produced in self.workspace.downloads_dir.iterdir():
+            produced.unlink()
+        with patch.object(run_pipeline, "run_script", return_value=True), redirect_stdout(io.StringIO()):
+            self.assertFalse(
+                run_pipeline.run_stages_subprocess("https://v.douyin.com/abc/", "20250101-0800", self.workspace)
+            )
+
+
+class StageCachePipelineTests(unittest.TestCase):
+    """重跑同一个视频时转写和总结命中阶段缓存，--force-stage 只让指定阶段重新执行。"""
+
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        previous_cwd = os.getcwd()
+        os.chdir(tmp_dir.name)
+        self.addCleanup(os.chdir, previous_cwd)
+        Path("news").mkdir()
+        Path("ws/downloads").mkdir(parents=True)
+        self.workspace = types.SimpleNamespace(downloads_dir=Path("ws/downloads"), segments_dir=Path("ws/segments"))
+        self.cache = StageCache("cache")
+        self.calls: list[str] = []
+        fake_mp3_2_txt = types.ModuleType("scripts.mp3_2_txt")
+        fake_mp3_2_txt.transcribe_audio = self._transcribe
+        modules = patch.dict(sys.modules, {"scripts.mp3_2_txt": fake_mp3_2_txt})
+        modules.start()
+        self.addCleanup(modules.stop)
+        model_type = patch.object(run_pipeline, "AI_MODEL_TYPE", "openai")
+        model_type.start()
+        self.addCleanup(model_type.stop)
+
+    def _download(self, url, output_dir, **_kwargs):
+        path = Path(output_dir, "视频.mp3")
+        path.write_bytes(b"audio")
+        return str(path)
+
+    def _transcribe(self, audio_path, timestamp, segment_dir=None, segmentation=None):
+        self.calls.append("transcribe")
+        path = Path("news", f"{timestamp}.txt")
+        path.write_text("文字稿", encoding="utf-8")
+        return path
+
+    def _summarize(self, news_file, timestamp, output_dir=None):
+        self.calls.append("summarize")
+        path = Path("news", f"{timestamp}_标题.md")
+        path.write_text("标题\n\n总结", encoding="utf-8")
+        return path
+
+    def _run(self, timestamp, force_stages=(), segmentation="fixed"):
+        with patch.object(douyin_download, "download_url", side_effect=self._download), \
+                patch.object(openai_news_summary, "summarize_news", side_effect=self._summarize), \
+                redirect_stdout(io.StringIO()):
+            return run_pipeline.run_stages_in_process(
+                "https://v.douyin.com/abc/", timestamp, self.workspace,
+                cache=self.cache, force_stages=force_stages, segmentation=segmentation
+            )
+
+    def test_rerun_reuses_cached_outputs(self) -> None:
+        self._run("20250101-0800")
+        summary = self._run("20250101-0900")
+
+        self.assertEqual(["transcribe", "summarize"], self.calls)
+        self.assertEqual(Path("news/20250101-0900_标题.md"), summary)
+        self.assertEqual("标题\n\n总结", summary.read_text(encoding="utf-8"))
+        self.assertEqual(
+            ["20250101-0800.txt", "20250101-0800_标题.md", "20250101-0900.txt", "20250101-0900_标题.md"],
+            sorted(path.name for path in Path("news").iterdir()),
+        )
+
+    def test_forced_stage_is_recomputed(self) -> None:
+        self._run("20250101-0800")
+        self._run("20250101-0900", force_stages=("summarize",))
+
+        self.assertEqual(["transcribe", "summarize", "summarize"], self.calls)
+
+    def test_segmentation_mode_is_part_of_the_transcript_key(self) -> None:
+        self._run("20250101-0800")
+        self._run("20250101-0900", segmentation="vad")
+
+        # 文字稿内容相同，所以总结仍然命中缓存
+        self.assertEqual(["transcribe", "summarize", "transcribe"], self.calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import time
+import unittest
+
+from scripts.segment_pool import real_time_factor, threads_per_worker, transcribe_segments_parallel
+
+
+_PREFIX = {}
+
+
+def _init(prefix: str) -> None:
+    _PREFIX["value"] = prefix
+
+
+def _transcribe(audio: int) -> str:
+    if audio < 0:
+        raise RuntimeError("bad segment")
+    # 前面的切片耗时更长，完成顺序与提交顺序相反
+    time.sleep(0.05 * (3 - audio) if audio < 3 else 0)
+    return f"{_PREFIX['value']}{audio}@{os.getpid()}"
+
+
+class SegmentPoolTests(unittest.TestCase):
+    def test_results_come_back_in_segment_order_with_failures_recorded(self) -> None:
+        segments = [(f"part{index}", index) for index in range(4)] + [("broken", -1)]
+        done = []
+
+        outcomes = transcribe_segments_parallel(
+            segments, _transcribe, workers=2, initializer=_init, initargs=("seg",), on_done=done.append
+        )
+
+        self.assertEqual(["part0", "part1", "part2", "part3", "broken"], [outcome.name for outcome in outcomes])
+        self.assertEqual(
+            ["seg0", "seg1", "seg2", "seg3"], [outcome.text.split("@")[0] for outcome in outcomes[:4]]
+        )
+        self.assertFalse(outcomes[4].ok)
+        self.assertEqual("bad segment", outcomes[4].error)
+        self.assertEqual(5, len(done))
+        self.assertNotIn(str(os.getpid()), {outcome.text.split("@")[1] for outcome in outcomes[:4]})
+
+    def test_empty_input_and_invalid_worker_count(self) -> None:
+        self.assertEqual([], transcribe_segments_parallel([], _transcribe, workers=2))
+        with self.assertRaises(ValueError):
+            transcribe_segments_parallel([("a", 1)], _transcribe, workers=0)
+
+    def test_threads_split_between_workers(self) -> None:
+        self.assertEqual(4, threads_per_worker(2, cpus=8))
+        self.assertEqual(2, threads_per_worker(3, cpus=8))
+        self.assertEqual(1, threads_per_worker(8, cpus=4))
+
+    def test_real_time_factor(self) -> None:
+        self.assertAlmostEqual(0.25, real_time_factor(15.0, 60.0))
+        self.assertIsNone(real_time_factor(15.0, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
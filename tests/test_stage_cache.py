@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.stage_cache import StageCache, stage_key, summarize_inputs, transcribe_inputs
+
+
+class StageCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.news_dir = self.root / "news"
+        self.news_dir.mkdir()
+
+    def test_keys_follow_content_and_config(self) -> None:
+        audio = self.root / "a.mp3"
+        copy = self.root / "b.mp3"
+        audio.write_bytes(b"audio")
+        copy.write_bytes(b"audio")
+
+        key = stage_key("transcribe", transcribe_inputs(audio, "base", 60))
+        self.assertEqual(key, stage_key("transcribe", transcribe_inputs(copy, "base", 60)))
+        self.assertNotEqual(key, stage_key("transcribe", transcribe_inputs(audio, "small", 60)))
+        self.assertNotEqual(key, stage_key("transcribe", transcribe_inputs(audio, "base", 30)))
+        self.assertNotEqual(key, stage_key("transcribe", transcribe_inputs(audio, "base", 60, "vad")))
+        self.assertNotEqual(key, stage_key("summarize", transcribe_inputs(audio, "base", 60)))
+
+        model = {"type": "openai", "model": "gpt-4o-mini"}
+        summary_key = stage_key("summarize", summarize_inputs(audio, "提示词", model))
+        self.assertNotEqual(summary_key, stage_key("summarize", summarize_inputs(audio, "新提示词", model)))
+        self.assertNotEqual(
+            summary_key, stage_key("summarize", summarize_inputs(audio, "提示词", {**model, "model": "gpt-4o"}))
+        )
+
+    def test_hit_links_cached_output_under_the_new_timestamp(self) -> None:
+        summary = self.news_dir / "20250101-0800_经济分析.md"
+        summary.write_text("经济分析\n\n内容", encoding="utf-8")
+        StageCache(self.root / "cache").store("summarize", "k1", summary, "20250101-0800")
+
+        cache = StageCache(self.root / "cache")
+        restored = cache.restore("summarize", "k1", "20250102-0900", self.news_dir)
+
+        self.assertEqual(self.news_dir / "20250102-0900_经济分析.md", restored)
+        self.assertEqual("经济分析\n\n内容", restored.read_text(encoding="utf-8"))
+        self.assertEqual((self.root / "cache" / "summarize" / "k1").stat().st_ino, restored.stat().st_ino)
+        self.assertIsNone(cache.restore("summarize", "other", "20250102-0900", self.news_dir))
+
+    def test_hit_replaces_a_changed_file_with_the_same_timestamp(self) -> None:
+        summary = self.news_dir / "20250101-0800_经济分析.md"
+        summary.write_text("经济分析\n\n内容", encoding="utf-8")
+        cache = StageCache(self.root / "cache")
+        cache.store("summarize", "k1", summary, "20250101-0800")
+        summary.write_text("手工改过", encoding="utf-8")
+
+        restored = cache.restore("summarize", "k1", "20250101-0800", self.news_dir)
+
+        self.assertEqual(summary, restored)
+        self.assertEqual("经济分析\n\n内容", restored.read_text(encoding="utf-8"))
+        self.assertEqual([summary], list(self.news_dir.iterdir()))
+
+    def test_evicts_least_recently_used_entries_over_max_bytes(self) -> None:
+        now = [1000.0]
+        cache = StageCache(self.root / "cache", max_bytes=25, clock=lambda: now[0])
+        for index in range(3):
+            transcript = self.news_dir / f"2025010{index + 1}-0800.txt"
+            transcript.write_text("x" * 10, encoding="utf-8")
+            cache.store("transcribe", f"k{index}", transcript, transcript.stem)
+            now[0] += 10
+            if index == 1:
+                cache.restore("transcribe", "k0", "20250101-0800", self.news_dir)
+                now[0] += 10
+
+        self.assertIsNotNone(cache.restore("transcribe", "k0", "20250109-0800", self.news_dir))
+        self.assertIsNone(cache.restore("transcribe", "k1", "20250109-0800", self.news_dir))
+        self.assertIsNotNone(cache.restore("transcribe", "k2", "20250109-0800", self.news_dir))
+        self.assertFalse((self.root / "cache" / "transcribe" / "k1").exists())
+
+    def test_invalidated_or_missing_entries_are_misses(self) -> None:
+        transcript = self.news_dir / "20250101-0800.txt"
+        transcript.write_text("文字稿", encoding="utf-8")
+        cache = StageCache(self.root / "cache")
+        cache.store("transcribe", "k1", transcript, "20250101-0800")
+        cache.store("transcribe", "k2", transcript, "20250101-0800")
+
+        cache.invalidate("transcribe", "k1")
+        (self.root / "cache" / "transcribe" / "k2").unlink()
+
+        self.assertIsNone(cache.restore("transcribe", "k1", "20250101-0900", self.news_dir))
+        self.assertIsNone(cache.restore("transcribe", "k2", "20250101-0900", self.news_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from scripts.stage_metrics import (
+    RunMetrics,
+    aggregate_run_metrics,
+    format_stage_summary,
+    load_run_metrics,
+    metrics_path,
+)
+
+
+class RunMetricsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+
+    def test_stage_records_time_sizes_and_status(self) -> None:
+        audio = self.root / "a.mp3"
+        audio.write_bytes(b"x" * 2048)
+        transcript = self.root / "a.txt"
+        metrics = RunMetrics("https://v.douyin.com/abc/", "20250101-0800")
+
+        with metrics.stage("transcribe", [audio]) as record:
+            sum(range(200000))
+            transcript.write_text("文字稿", encoding="utf-8")
+            record.ok = True
+            record.add_output(transcript)
+        with self.assertRaises(RuntimeError):
+            with metrics.stage("summarize", [transcript]):
+                raise RuntimeError("boom")
+
+        transcribe, summarize = metrics.to_dict()["stages"]
+        self.assertTrue(transcribe["ok"])
+        self.assertGreater(transcribe["wall_seconds"], 0)
+        self.assertGreater(transcribe["cpu_seconds"], 0)
+        self.assertEqual(2048, transcribe["bytes_in"])
+        self.assertEqual({str(transcript): len("文字稿".encode("utf-8"))}, transcribe["artifacts"])
+        self.assertFalse(summarize["ok"])
+        self.assertFalse(metrics.to_dict()["ok"])
+        self.assertNotIn("peak_rss_bytes", transcribe)
+
+    def test_cpu_time_includes_other_threads_of_the_process(self) -> None:
+        metrics = RunMetrics("https://v.douyin.com/abc/", "20250101-0800")
+
+        with metrics.stage("transcribe") as record:
+            worker = threading.Thread(target=lambda: sum(range(2_000_000)))
+            worker.start()
+            worker.join()
+            record.ok = True
+
+        transcribe = metrics.to_dict()["stages"][0]
+        self.assertGreater(transcribe["cpu_seconds"], 0.01)
+
+    def test_reports_round_trip_and_aggregate_per_stage(self) -> None:
+        runs = []
+        for timestamp, ok in (("20250101-0800", True), ("20250101-0900", False)):
+            metrics = RunMetrics("https://v.douyin.com/abc/", timestamp)
+            with metrics.stage("download") as record:
+                record.ok = True
+            with metrics.stage("transcribe") as record:
+                record.ok = ok
+            path = metrics.write(self.root)
+            self.assertEqual(metrics_path(self.root, timestamp), path)
+            runs.append(load_run_metrics(path))
+
+        report = aggregate_run_metrics(runs)
+
+        self.assertEqual((2, 1), (report["runs"], report["succeeded"]))
+        self.assertEqual({"download", "transcribe"}, set(report["stages"]))
+        self.assertEqual((2, 1), (report["stages"]["transcribe"]["runs"], report["stages"]["transcribe"]["failed"]))
+        self.assertEqual(max(run["peak_rss_bytes"] for run in runs), report["peak_rss_bytes"])
+        self.assertIn("进程峰值内存", format_stage_summary(report).splitlines()[-1])
+        json.dumps(report)
+        (self.root / "broken.metrics.json").write_text("{", encoding="utf-8")
+        self.assertIsNone(load_run_metrics(self.root / "broken.metrics.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
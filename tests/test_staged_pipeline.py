@@ -0,0 +1,84 @@
+import threading
+import time
+import unittest
+
+from scripts.staged_pipeline import PipelineStage, StagedExecutor
+
+
+class StagedExecutorTests(unittest.TestCase):
+    def test_items_flow_through_all_stages_and_failures_stop_early(self) -> None:
+        seen: list[tuple[str, int]] = []
+        lock = threading.Lock()
+
+        def stage(name, fail_on=None):
+            def run(value):
+                with lock:
+                    seen.append((name, value))
+                if value == fail_on:
+                    raise RuntimeError("boom")
+                return value
+            return run
+
+        executor = StagedExecutor(
+            [PipelineStage("download", stage("download"), workers=2), PipelineStage("transcribe", stage("transcribe", 2))]
+        )
+        results = sorted(executor.run([1, 2, 3]), key=lambda result: result.index)
+
+        self.assertEqual([True, False, True], [result.ok for result in results])
+        self.assertEqual("transcribe", results[1].failed_stage)
+        self.assertIsInstance(results[1].error, RuntimeError)
+        report = executor.report()
+        self.assertEqual((2, 1), (report["succeeded"], report["failed"]))
+        self.assertEqual([3, 2], [stage["completed"] for stage in report["stages"]])
+
+    def test_different_items_occupy_different_stages_at_once(self) -> None:
+        active: set[str] = set()
+        overlapped = threading.Event()
+        lock = threading.Lock()
+
+        def stage(name):
+            def run(value):
+                with lock:
+                    active.add(name)
+                    if len(active) > 1:
+                        overlapped.set()
+                time.sleep(0.05)
+                with lock:
+                    active.discard(name)
+                return value
+            return run
+
+        executor = StagedExecutor([PipelineStage(name, stage(name)) for name in ("download", "transcribe", "summarize")])
+        started = time.perf_counter()
+        results = list(executor.run(range(1, 5)))
+        elapsed = time.perf_counter() - started
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertTrue(overlapped.is_set())
+        # 串行需要 4 × 3 × 0.05 = 0.6 秒，流水线约为 (4 + 2) × 0.05 秒
+        self.assertLess(elapsed, 0.5)
+        self.assertGreater(executor.report()["overlap_speedup"], 1.2)
+
+    def test_bounded_queue_limits_how_far_upstream_runs_ahead(self) -> None:
+        downloaded: list[int] = []
+        release = threading.Event()
+
+        def transcribe(value):
+            release.wait(5)
+            return value
+
+        executor = StagedExecutor(
+            [PipelineStage("download", lambda value: downloaded.append(value) or value + 1), PipelineStage("transcribe", transcribe)],
+            queue_size=1,
+        )
+        results = executor.run(range(10))
+        threading.Timer(0.2, release.set).start()
+        first = next(results)
+        # 转写卡住时：一个在转写、一个在队列中、一个下载完成等待入队
+        self.assertLessEqual(len(downloaded), 4)
+        self.assertTrue(first.ok)
+        self.assertEqual(9, len(list(results)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+
+import numpy as np
+
+from scripts.vad import detect_speech, frame_energy_db, pack_segments, speech_regions
+
+
+SAMPLE_RATE = 1000
+
+
+def _tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 50 * t)).astype(np.float32)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    return (np.random.default_rng(0).standard_normal(int(seconds * SAMPLE_RATE)) * 0.001).astype(np.float32)
+
+
+def _seconds(result) -> list[tuple[float, float]]:
+    return [(start / SAMPLE_RATE, end / SAMPLE_RATE) for start, end in result.segments]
+
+
+class FrameEnergyTests(unittest.TestCase):
+    def test_partial_last_frame_is_its_own_frame(self) -> None:
+        energy = frame_energy_db(np.array([1.0, 1.0, 0.5], dtype=np.float32), 2)
+
+        np.testing.assert_allclose(energy, [0.0, 20 * np.log10(0.5)], atol=1e-4)
+        self.assertEqual(0, len(frame_energy_db(np.zeros(0, dtype=np.float32), 2)))
+
+
+class DetectSpeechTests(unittest.TestCase):
+    def test_leading_and_trailing_silence_is_skipped(self) -> None:
+        audio = np.concatenate([_silence(5), _tone(10), _silence(0.3), _tone(5), _silence(3), _tone(8), _silence(10)])
+
+        result = detect_speech(audio, max_seconds=60, sample_rate=SAMPLE_RATE)
+
+        # 0.3 秒的停顿被填平；3 秒的静音不超过最大长度，两段合并为一个切片
+        self.assertEqual(1, len(result.segments))
+        start, end = _seconds(result)[0]
+        self.assertAlmostEqual(4.8, start, places=1)
+        self.assertAlmostEqual(31.5, end, places=1)
+        self.assertAlmostEqual(41.3, result.total_seconds)
+        self.assertAlmostEqual(result.total_seconds - result.speech_seconds, result.skipped_seconds)
+        self.assertGreater(result.skipped_seconds, 14)
+
+    def test_segments_respect_max_length_and_split_at_silence(self) -> None:
+        audio = np.concatenate([_tone(20), _silence(2), _tone(20), _silence(2), _tone(20)])
+
+        segments = _seconds(detect_speech(audio, max_seconds=30, sample_rate=SAMPLE_RATE))
+
+        self.assertEqual(3, len(segments))
+        for start, end in segments:
+            self.assertLessEqual(end - start, 30)
+        # 切口落在静音里，而不是某段声音中间
+        self.assertTrue(20 <= segments[0][1] <= 22)
+        self.assertTrue(42 <= segments[2][0] <= 44)
+
+    def test_continuous_speech_is_cut_under_max_length(self) -> None:
+        audio = _tone(100)
+
+        result = detect_speech(audio, max_seconds=30, sample_rate=SAMPLE_RATE)
+
+        self.assertEqual(0, result.segments[0][0])
+        self.assertEqual(len(audio), result.segments[-1][1])
+        self.assertTrue(all(end - start <= 30 * SAMPLE_RATE for start, end in result.segments))
+        # 切片首尾相接，不丢音频
+        for (_, end), (start, _) in zip(result.segments, result.segments[1:]):
+            self.assertEqual(end, start)
+
+    def test_silent_audio_has_no_segments(self) -> None:
+        result = detect_speech(_silence(10), max_seconds=30, sample_rate=SAMPLE_RATE)
+
+        self.assertEqual([], result.segments)
+        self.assertAlmostEqual(10, result.skipped_seconds)
+
+
+class RegionTests(unittest.TestCase):
+    def test_short_blips_are_dropped_and_regions_padded(self) -> None:
+        energy = np.full(40, -80.0)
+        energy[5:6] = 0.0  # 1 帧的噪声
+        energy[10:20] = 0.0
+        energy[22:30] = 0.0  # 与上一段间隔 2 帧，会被合并
+
+        regions = speech_regions(energy, -40.0, min_silence_frames=3, min_speech_frames=2, pad_frames=1)
+
+        self.assertEqual([[9, 31]], regions.tolist())
+
+    def test_adjacent_regions_are_packed_until_max_length(self) -> None:
+        regions = np.array([[0, 4], [6, 9], [12, 20]])
+
+        self.assertEqual([(0, 9), (12, 20)], pack_segments(regions, np.zeros(20), max_frames=10))
+
+
+if __name__ == "__main__":
+    unittest.main()